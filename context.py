@@ -30,9 +30,9 @@ STR_NOT_SELECTED = getstring(32163)
 STR_CHOOSE_CONTENT_TYPE = getstring(32159)
 
 # possible values ​​that content can have
-LIST_TYPE_SERIES = ['series', 'directory',
-                    'show', 'browse', 'root', 'mode=series']
-LIST_TYPE_MOVIES = ['movie', 'PlayVideo', 'play&_play']
+LIST_TYPE_SERIES = ('series', 'directory',
+                    'show', 'browse', 'root', 'mode=series')
+LIST_TYPE_MOVIES = ('movie', 'PlayVideo', 'play&_play')
 
 
 @entrypoint
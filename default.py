@@ -28,6 +28,10 @@ def main():
         from resources.test.fuzz import fuzz
         fuzz()
 
+    elif sys.argv[1] == 'bench':
+        from resources.test.bench import bench
+        bench(save_baseline='baseline' in sys.argv[2:])
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,172 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Run the addon outside Kodi, with the stub modules in resources/test/kodi.
+
+    python headless.py test [pattern]
+        run the unit tests, test_*.py by default
+    python headless.py bench [pattern] [--baseline]
+        run the benchmarks and compare them with the baseline, see resources/test/bench.py
+    python headless.py sync [--providers netflix,amazon] [--shows 500] ...
+        sync synthetic plugins (see resources/test/simulator.py) and print the plan
+
+Kodi folders are created in a temporary folder, or in KODI_HOME if set,
+so every run starts with an empty database unless KODI_HOME is reused.
+"""
+
+import os
+import sys
+import argparse
+import unittest
+
+from time import monotonic
+
+ADDON_PATH = os.path.dirname(os.path.abspath(__file__))
+
+# The stub modules replace the modules of Kodi, resources can be imported after this
+sys.path.insert(0, os.path.join(ADDON_PATH, 'resources', 'test', 'kodi'))
+sys.path.insert(0, ADDON_PATH)
+
+import xbmc  # pylint: disable=import-error,wrong-import-position
+import xbmcvfs  # pylint: disable=import-error,wrong-import-position
+import xbmcaddon  # pylint: disable=import-error,wrong-import-position
+
+
+def prepare():
+    """Create the managed folder and subfolders, as the entrypoints do in Kodi."""
+    from resources.lib.utils import check_managed_folder, check_subfolders
+    check_managed_folder()
+    check_subfolders()
+
+
+def test(args):
+    """Run the unit tests, return True if all passed."""
+    prepare()
+    suite = unittest.TestLoader().discover(
+        os.path.join(ADDON_PATH, 'resources', 'test'),
+        pattern=args.pattern,
+        top_level_dir=ADDON_PATH
+    )
+    return unittest.TextTestRunner(verbosity=args.verbosity).run(suite).wasSuccessful()
+
+
+def bench(args):
+    """Run the benchmarks, return True if none regressed."""
+    from resources.test.bench import bench as run_benchmarks
+    prepare()
+    return not run_benchmarks(save_baseline=args.baseline, pattern=args.pattern)
+
+
+def simulators(args):
+    """Return a PluginSimulator of each provider in args, installed."""
+    from resources.test.simulator import PluginSimulator, install
+    plugins = [
+        PluginSimulator(
+            provider,
+            shows=args.shows,
+            seasons=args.seasons,
+            episodes=args.episodes,
+            movies=args.movies,
+            latency=args.latency,
+            item_latency=args.item_latency,
+            call_latency=args.call_latency,
+            error_rate=args.error_rate,
+            seed=args.seed
+        ) for provider in args.providers.split(',')
+    ]
+    install(*plugins)
+    return plugins
+
+
+def sync(args):
+    """Sync the synthetic plugins of args, return True if no directory failed."""
+    from resources.lib.database import Database
+    from resources.lib.pluginhost import PLUGIN_SCHEDULER
+    from resources.lib.sync import SyncEngine, SyncApplier
+    from resources.lib.trace import dump
+    from resources.lib.metrics import SyncMetrics, run_report
+    from resources.lib.profiler import profiled
+    prepare()
+    database = Database()
+    plugins = simulators(args)
+    for plugin in plugins:
+        if args.type in ('tvshow', 'all'):
+            database.add_item_to_synced(
+                '%s shows' % plugin.provider, plugin.tvshows_root, 'tvshow'
+            )
+        if args.type in ('movie', 'all'):
+            database.add_item_to_synced(
+                '%s movies' % plugin.provider, plugin.movies_root, 'movie'
+            )
+    _type = None if args.type == 'all' else args.type
+    engine = SyncEngine(database)
+    start = monotonic()
+    metrics = SyncMetrics(database, _type)
+    with profiled('headless-sync'):
+        plan = engine.plan(engine.select(_type), _type=_type, refresh=args.refresh)
+        if args.apply:
+            SyncApplier(database).apply(plan)
+    print(run_report(metrics.finish(plan, args.apply)))
+    print('Plugin requests:\n%s' % PLUGIN_SCHEDULER.summary())
+    for plugin in plugins:
+        print(plugin)
+    print('Total %.2fs, Kodi home %s' % (monotonic() - start, xbmcvfs.KODI_HOME))
+    dump('headless.py sync')
+    return not plan.failed
+
+
+def parse_args(argv):
+    """Return the arguments of the command line."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        '--set', action='append', default=[], metavar='KEY=VALUE',
+        help='change a setting of the addon'
+    )
+    common.add_argument(
+        '--log-level', type=int, default=xbmc.LOGWARNING,
+        help='min level of the log messages written to stderr (0 to 4)'
+    )
+    parser = argparse.ArgumentParser(description='Run the addon outside Kodi.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    parser_test = commands.add_parser('test', parents=[common], help='run the unit tests')
+    parser_test.add_argument('pattern', nargs='?', default='test_*.py')
+    parser_test.add_argument('-v', '--verbosity', type=int, default=1)
+    parser_test.set_defaults(func=test)
+    parser_bench = commands.add_parser('bench', parents=[common], help='run the benchmarks')
+    parser_bench.add_argument('pattern', nargs='?', default='bench_')
+    parser_bench.add_argument(
+        '--baseline', action='store_true', help='save the results as the new baseline'
+    )
+    parser_bench.set_defaults(func=bench)
+    parser_sync = commands.add_parser('sync', parents=[common], help='sync synthetic plugins')
+    parser_sync.add_argument('--providers', default='netflix,amazon,disney,crunchyroll')
+    parser_sync.add_argument('--type', choices=['tvshow', 'movie', 'all'], default='all')
+    parser_sync.add_argument('--shows', type=int, default=50)
+    parser_sync.add_argument('--seasons', type=int, default=5)
+    parser_sync.add_argument('--episodes', type=int, default=10)
+    parser_sync.add_argument('--movies', type=int, default=200)
+    parser_sync.add_argument('--latency', type=float, default=0., help='seconds per directory')
+    parser_sync.add_argument('--item-latency', type=float, default=0., help='seconds per item')
+    parser_sync.add_argument('--call-latency', type=float, default=0., help='seconds per call')
+    parser_sync.add_argument('--error-rate', type=float, default=0.)
+    parser_sync.add_argument('--seed', type=int, default=0)
+    parser_sync.add_argument('--refresh', action='store_true', help='ignore cached listings')
+    parser_sync.add_argument('--apply', action='store_true', help='stage the new items')
+    parser_sync.set_defaults(func=sync)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Configure the stub modules and run a command."""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    xbmc.LOG_LEVEL = args.log_level
+    for setting in args.set:
+        key, _, value = setting.partition('=')
+        xbmcaddon.SETTINGS[key] = value
+    return 0 if args.func(args) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,7 +17,23 @@ AUTO_ADD_TVSHOWS = ADDON.getSettingBool('auto_add_tvshows')
 AUTO_CREATE_NFO_MOVIES = ADDON.getSettingBool('auto_create_nfo_movies')
 AUTO_CREATE_NFO_SHOWS = ADDON.getSettingBool('auto_create_nfo_shows')
 IN_DEVELOPMENT = ADDON.getSetting('in_development') == 'true'
-RECURSION_LIMIT = int(ADDON.getSetting('recursion_limit'))
+# Count and time calls of traced functions, see resources/lib/trace.py
+TRACING = IN_DEVELOPMENT and ADDON.getSetting('tracing') == 'true'
+# Profile entrypoints with cProfile, keeping runs of at least PROFILE_MIN_SECONDS
+PROFILING = IN_DEVELOPMENT and ADDON.getSetting('profiling') == 'true'
+PROFILE_MIN_SECONDS = int(ADDON.getSetting('profile_min_seconds') or 0)
+# Max depth of subdirectories crawled, 0 for unlimited
+RECURSION_LIMIT = int(ADDON.getSetting('recursion_limit') or 0)
+# Max directories, items and minutes crawled by an update, 0 for unlimited
+CRAWL_MAX_DIRECTORIES = int(ADDON.getSetting('crawl_max_directories') or 0)
+CRAWL_MAX_ITEMS = int(ADDON.getSetting('crawl_max_items') or 0)
+CRAWL_MAX_MINUTES = int(ADDON.getSetting('crawl_max_minutes') or 0)
+# Min interval in milliseconds between two requests to the same plugin
+PLUGIN_RATE_LIMIT = int(ADDON.getSetting('plugin_rate_limit') or 0)
+# Default time in hours that a directory listing is reused from cache
+LISTING_CACHE_TTL = int(ADDON.getSetting('listing_cache_ttl') or 0)
+# Max directories of the same plugin requested in a single JSON-RPC call
+JSON_RPC_BATCH_SIZE = int(ADDON.getSetting('json_rpc_batch_size') or 1)
 # USE_SHOW_ARTWORK_SHOW = ADDON.getSetting('use_show_artwork_show') == 'true'
 
 USING_CUSTOM_MANAGED_FOLDER = ADDON.getSetting('custom_managed_folder') == 'true'
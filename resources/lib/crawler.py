@@ -0,0 +1,503 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Crawler to load items from plugin directories using the JSON-RPC interface."""
+
+import hashlib
+import simplejson as json
+
+from time import time
+from time import monotonic
+from collections import namedtuple
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import xbmc  # pylint: disable=import-error
+
+from resources import RECURSION_LIMIT
+from resources import CRAWL_MAX_ITEMS
+from resources import CRAWL_MAX_MINUTES
+from resources import CRAWL_MAX_DIRECTORIES
+from resources import JSON_RPC_BATCH_SIZE
+
+from resources.lib.log import log_msg
+from resources.lib.trace import span
+from resources.lib.trace import traced
+
+from resources.lib.utils import SKIP_STRINGS
+from resources.lib.utils import re_search
+from resources.lib.utils import skip_filter
+from resources.lib.utils import list_reorder
+from resources.lib.utils import selected_list
+from resources.lib.utils import plugin_id
+from resources.lib.utils import normalize_url
+from resources.lib.utils import JSONRPCError
+from resources.lib.utils import execute_json_rpc
+from resources.lib.utils import execute_json_rpc_batch
+
+from resources.lib.throttle import Throttle
+
+from resources.lib.providers import get_provider
+
+from resources.lib.pluginhost import PLUGIN_SCHEDULER
+from resources.lib.pluginhost import PLUGIN_MAX_CONCURRENCY
+
+# Max number of directories requested at the same time, each plugin
+# is also limited by the adaptive concurrency of its PluginHost
+CRAWLER_WORKERS = PLUGIN_MAX_CONCURRENCY
+
+# Max number of directories requested ahead of the one being parsed,
+# bounds the listings held in memory when a directory has many subdirectories
+CRAWLER_PREFETCH = 2 * CRAWLER_WORKERS
+
+# Min interval in seconds between two checkpoints of the crawl frontier
+CHECKPOINT_INTERVAL = 10
+
+# Max seconds waiting for a directory, after that the directory is skipped
+CRAWLER_TIMEOUT = 120
+
+# Kodi types of directories crawled for their items
+DIRECTORY_TYPES = ('season', 'tvshow')
+
+# A directory waiting to be crawled, with the context inherited from its parent
+CrawlJob = namedtuple(
+    'CrawlJob', ['path', 'depth', 'showtitle', 'season', 'year']
+)
+
+
+class CrawlBudgetExceeded(Exception):
+    """A crawl stopped because its CrawlBudget is exhausted."""
+
+
+class CrawlBudget(object):
+    """
+    Max directories, items and seconds of the crawls of an update, 0 for unlimited.
+
+    A single budget is shared by all crawls of an update, so a plugin that
+    loops or fans out cannot make the update run, or hold items, forever.
+    stop, if given, is called between directories and returns the reason
+    to stop the crawl early, i.e. playback started during a background update.
+    """
+
+    def __init__(self, directories=CRAWL_MAX_DIRECTORIES, items=CRAWL_MAX_ITEMS,
+                 seconds=CRAWL_MAX_MINUTES * 60, stop=None):
+        """__init__ CrawlBudget."""
+        self.directories = directories
+        self.items = items
+        self.seconds = seconds
+        self.stop = stop
+        self.directories_used = 0
+        self.items_used = 0
+        self.start = monotonic()
+
+    def spend(self, directories=0, items=0):
+        """Count directories loaded and items found."""
+        self.directories_used += directories
+        self.items_used += items
+
+    def exceeded(self):
+        """Return the reason why the budget is exhausted, or None."""
+        if self.directories and self.directories_used >= self.directories:
+            return '%s directories crawled' % self.directories_used
+        if self.items and self.items_used >= self.items:
+            return '%s items found' % self.items_used
+        if self.seconds and monotonic() - self.start >= self.seconds:
+            return '%s minutes crawling' % int(self.seconds / 60)
+        if self.stop:
+            return self.stop()
+        return None
+
+
+@traced
+def get_directory(path, properties=None):
+    """Return the list of files in a plugin directory."""
+    return execute_json_rpc(
+        'Files.GetDirectory',
+        _path=path,
+        properties=properties
+    )['result']['files']
+
+
+def fetch_directory(path, properties=None):
+    """Return the list of files in a plugin directory, scheduled by the plugin host."""
+    return PLUGIN_SCHEDULER.call(path, get_directory, path, properties)
+
+
+@traced
+def get_directories(paths, properties=None):
+    """Return the list of files, or the JSONRPCError, of each plugin directory in paths."""
+    return [
+        x if isinstance(x, JSONRPCError) else x['result']['files']
+        for x in execute_json_rpc_batch('Files.GetDirectory', paths, properties)
+    ]
+
+
+def fetch_directories(paths, futures, properties=None):
+    """
+    Resolve futures with the lists of files of paths, of the same plugin, requested in a single call.
+
+    Directories that fail with a retryable error are requested again one by
+    one, after the others are resolved. Futures cancelled before the call
+    are skipped.
+    """
+    running = [
+        (path, future) for path, future in zip(paths, futures)
+        if future.set_running_or_notify_cancel()
+    ]
+    if not running:
+        return
+    try:
+        results = PLUGIN_SCHEDULER.call(
+            running[0][0], get_directories, [path for path, _ in running], properties
+        )
+    except Exception as error:  # pylint: disable=broad-except
+        for _, future in running:
+            future.set_exception(error)
+        return
+    retries = []
+    for (path, future), result in zip(running, results):
+        if not isinstance(result, JSONRPCError):
+            future.set_result(result)
+        elif result.retryable:
+            retries.append((path, future))
+        else:
+            future.set_exception(result)
+    for path, future in retries:
+        try:
+            future.set_result(fetch_directory(path, properties))
+        except Exception as error:  # pylint: disable=broad-except
+            future.set_exception(error)
+
+
+def listing_fingerprint(files):
+    """Return a hash that changes only if the content of a directory listing changes."""
+    return hashlib.sha1(
+        json.dumps(files, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+class DirectoryCrawler(object):
+    """
+    Crawl a directory tree, fetching the next directories concurrently.
+
+    JSON-RPC requests run in a bounded pool of workers, while parsing and
+    progress updates stay in the calling thread, so items are yielded in the
+    same depth-first order of a sequential crawl. Only the next prefetch
+    directories in that order are requested, so a consumer that stops reading
+    items also stops the crawl.
+
+    With a database and a ttl (seconds), listings fetched less than ttl ago are
+    read from the listing cache, so subtrees with fresh listings are crawled
+    without any request, refresh ignores the cache but still updates it.
+
+    Items only have the given properties, see JSON_RPC_PROPERTY_PRESETS,
+    listings of seasons, that only have episodes, can request the slimmer
+    season_properties instead. Listings are cached separately for each list
+    of properties.
+
+    Directories of the same plugin requested together are sent in JSON-RPC
+    batches of up to batch_size requests, each one resolves its own future.
+
+    With a checkpoint function, it is called with the frontier (pending
+    directories, as lists of CrawlJob fields) between two directories, at
+    most every CHECKPOINT_INTERVAL seconds. All items of the directories not
+    in the frontier were already yielded, so a crawl started from a saved
+    frontier continues where the previous one stopped.
+
+    Directories that fail to load or time out are logged and skipped, and
+    passed to on_error with the error, so the caller knows the crawl is
+    incomplete.
+
+    A directory is crawled only once, even if it is linked from several
+    directories (i.e. "related" or "next page" links that loop), directories
+    deeper than RECURSION_LIMIT are skipped, and the crawl stops when its
+    budget is exhausted, passing the crawled path and a CrawlBudgetExceeded
+    to on_error. Subdirectories for which skip_directory returns True,
+    i.e. blocked shows, are not crawled.
+    """
+
+    def __init__(self, progressdialog=None, sync_type=False, workers=CRAWLER_WORKERS,
+                 database=None, ttl=0, refresh=False, prefetch=CRAWLER_PREFETCH,
+                 checkpoint=None, on_error=None, budget=None,
+                 max_depth=RECURSION_LIMIT, batch_size=JSON_RPC_BATCH_SIZE,
+                 properties=None, season_properties=None, skip_directory=None):
+        """__init__ DirectoryCrawler."""
+        self.progressdialog = progressdialog
+        self.sync_type = sync_type
+        self.workers = workers
+        self.prefetch = max(prefetch, 1)
+        self.database = database
+        self.ttl = ttl if database else 0
+        self.refresh = refresh
+        self.checkpoint = checkpoint
+        self.checkpoint_throttle = Throttle(CHECKPOINT_INTERVAL)
+        self.on_error = on_error
+        self.budget = budget or CrawlBudget(0, 0, 0)
+        self.max_depth = max_depth
+        self.batch_size = max(batch_size, 1)
+        self.properties = properties
+        self.season_properties = season_properties or properties
+        self.skip_directory = skip_directory
+        self._batches = dict()
+        self.visited = set()
+        self.listings_fetched = 0
+        self.listings_cached = 0
+        self.listings_failed = 0
+        self.directories_revisited = 0
+        self.directories_too_deep = 0
+        self.directories_skipped = 0
+
+    def _properties(self, job):
+        """Return the properties requested for the items of the listing of job."""
+        # only jobs of season directories have a season, see parse
+        if job.season is not False:
+            return self.season_properties
+        return self.properties
+
+    def _cache_key(self, job):
+        """Return the key of the cached listing of job with the requested properties."""
+        properties = self._properties(job)
+        if properties:
+            return '%s#%s' % (job.path, ','.join(properties))
+        return job.path
+
+    def _schedule(self, pool, job):
+        """Return a tuple (future, from_cache) with the listing of job."""
+        if self.ttl and not self.refresh:
+            cached = self.database.get_cached_listing(self._cache_key(job))
+            if cached and time() - cached[2] < self.ttl:
+                future = Future()
+                future.set_result(cached[0])
+                return future, True
+        properties = self._properties(job)
+        if self.batch_size == 1:
+            return pool.submit(fetch_directory, job.path, properties), False
+        # resolved by fetch_directories, see _submit
+        future = Future()
+        key = (plugin_id(job.path), tuple(properties) if properties else None)
+        self._batches.setdefault(key, []).append((job.path, future))
+        return future, False
+
+    def _submit(self, pool):
+        """
+        Send the directories scheduled with the same plugin and properties in batches.
+
+        Batches have up to batch_size directories. Kodi runs the directories
+        of a batch one after another, so they are split across the workers
+        first, and batches only group the directories left once every worker
+        has one.
+        """
+        for (_, properties), pending in self._batches.items():
+            size = min(self.batch_size, -(-len(pending) // self.workers))
+            for index in range(0, len(pending), size):
+                batch = pending[index:index + size]
+                pool.submit(
+                    fetch_directories,
+                    [x[0] for x in batch],
+                    [x[1] for x in batch],
+                    list(properties) if properties else None
+                )
+        self._batches = dict()
+
+    def _prefetch(self, pool, stack):
+        """Request the listings of the next directories in the stack not requested yet."""
+        for entry in reversed(stack[-self.prefetch:]):
+            if entry[1] is None:
+                entry[1] = self._schedule(pool, entry[0])
+        self._submit(pool)
+
+    def _store(self, job, results):
+        """Save a fetched listing in cache, before parse changes its items."""
+        if self.ttl:
+            self.database.set_cached_listing(
+                self._cache_key(job), results, listing_fingerprint(results), time()
+            )
+
+    def _push(self, stack, jobs):
+        """Add jobs not visited and not too deep to the stack, so the first job is the next."""
+        pending = []
+        for job in jobs:
+            if self.max_depth and job.depth > self.max_depth:
+                self.directories_too_deep += 1
+                continue
+            url = normalize_url(job.path)
+            if url in self.visited:
+                self.directories_revisited += 1
+                continue
+            self.visited.add(url)
+            pending.append([job, None])
+        stack.extend(reversed(pending))
+
+    def _update(self, perc, msg):
+        """Update progressdialog if there is one."""
+        if self.progressdialog:
+            self.progressdialog._update(perc, msg)
+
+    def parse(self, job, results, sync_type):
+        """Return a tuple with items and subdirectory jobs found in a directory listing."""
+        showtitle = job.showtitle
+        try:
+            listofitems = list(
+                list_reorder(
+                    list(skip_filter(results, 'label', SKIP_STRINGS)),
+                    showtitle=showtitle,
+                    year=job.year,
+                    sync_type=sync_type,
+                    provider=get_provider(plugin_id(job.path))
+                )
+            )
+        except (KeyError, TypeError):
+            listofitems = []
+        items = []
+        jobs = []
+        for index, item in enumerate(listofitems):
+            perc = index / len(listofitems)
+            if item['type'] == 'movie':
+                self._update(perc, 'Processando items:\n%s' % item['title'])
+                items.append(item)
+                continue
+            if job.season:
+                item['season'] = job.season
+            if job.year:
+                item['year'] = job.year
+            # if content is a directory will be crawled with its context
+            if item['filetype'] == 'directory':
+                if re_search(item['type'], DIRECTORY_TYPES):
+                    if self.skip_directory and self.skip_directory(item):
+                        self.directories_skipped += 1
+                        continue
+                    showtitle = item.get('showtitle', showtitle)
+                    self._update(
+                        perc, 'Coletando itens no diretorio!\n%s' % item['label']
+                    )
+                    jobs.append(
+                        CrawlJob(
+                            path=item['file'],
+                            depth=job.depth + 1,
+                            showtitle=item.get('showtitle', False),
+                            season=item.get('season', False),
+                            year=item.get('year', False)
+                        )
+                    )
+            if item['type'] == 'episode':
+                # change type to 'tvshow' to padronize in build_contentitem
+                item['type'] = 'tvshow'
+                self._update(perc, 'Processando items:\n%s' % item['label'])
+                item['showtitle'] = showtitle
+                items.append(item)
+        return items, jobs
+
+    def crawl(self, _path, recursive=True, showtitle=False, season=False, year=False,
+              frontier=None):
+        """
+        Yield all movies and episodes in _path and, if recursive, in its subdirectories.
+
+        With a frontier saved by a checkpoint, only the directories in it are crawled.
+        """
+        sync_type = self.sync_type
+        # stack of [job, (future, from_cache) or None if not requested yet],
+        # the top is always the next directory in order
+        stack = []
+        if frontier:
+            # saved with the top of the stack last
+            self._push(stack, reversed([CrawlJob(*x) for x in frontier]))
+            if sync_type == 'filter':
+                # the root directory was already filtered
+                sync_type = 'all_items'
+        else:
+            self._push(stack, [CrawlJob(_path, 1, showtitle, season, year)])
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while stack:
+                exceeded = self.budget.exceeded()
+                if exceeded:
+                    log_msg(
+                        'Stopping crawl of %s: %s' % (_path, exceeded),
+                        xbmc.LOGWARNING
+                    )
+                    if self.on_error:
+                        self.on_error(_path, CrawlBudgetExceeded(exceeded))
+                    break
+                if self.checkpoint and self.checkpoint_throttle.ready():
+                    self.checkpoint([list(job) for job, _ in stack])
+                self._prefetch(pool, stack)
+                job, (future, from_cache) = stack.pop()
+                try:
+                    with span('wait'):
+                        results = future.result(timeout=CRAWLER_TIMEOUT)
+                except Exception as error:  # pylint: disable=broad-except
+                    if not isinstance(error, (JSONRPCError, FutureTimeoutError)):
+                        # i.e. a malformed response, the same request would fail again
+                        error = JSONRPCError('%s: %s' % (type(error).__name__, error))
+                    self.listings_failed += 1
+                    log_msg(
+                        'Skipping directory %s: %s' % (job.path, str(error) or 'timeout'),
+                        xbmc.LOGWARNING
+                    )
+                    if self.on_error:
+                        self.on_error(job.path, error)
+                    continue
+                if from_cache:
+                    self.listings_cached += 1
+                else:
+                    self.listings_fetched += 1
+                    self._store(job, results)
+                if sync_type == 'filter':
+                    sync_type = 'all_items'
+                    results = list(selected_list(results))
+                with span('classify'):
+                    items, jobs = self.parse(job, results, sync_type)
+                self.budget.spend(directories=1, items=len(items))
+                for item in items:
+                    yield item
+                if recursive:
+                    self._push(stack, jobs)
+        finally:
+            for _, pending in stack:
+                if pending:
+                    pending[0].cancel()
+            # do not wait for requests to plugins that timed out
+            pool.shutdown(wait=False)
+            if self.ttl:
+                self.database.conn.commit()
+            log_msg(
+                'Crawled %s: %s fetched, %s cached, %s failed, %s revisited, %s too deep, '
+                '%s skipped' % (
+                    _path,
+                    self.listings_fetched,
+                    self.listings_cached,
+                    self.listings_failed,
+                    self.directories_revisited,
+                    self.directories_too_deep,
+                    self.directories_skipped
+                )
+            )
+
+
+def load_directory_items(progressdialog, _path, recursive=False, showtitle=False,
+                         season=False, year=False, sync_type=False,
+                         database=None, ttl=0, refresh=False,
+                         frontier=None, checkpoint=None, on_error=None, budget=None,
+                         properties=None, season_properties=None, skip_directory=None):
+    """Load items in a directory using the JSON-RPC interface."""
+    return DirectoryCrawler(
+        progressdialog=progressdialog,
+        sync_type=sync_type,
+        database=database,
+        ttl=ttl,
+        refresh=refresh,
+        checkpoint=checkpoint,
+        on_error=on_error,
+        budget=budget,
+        properties=properties,
+        season_properties=season_properties,
+        skip_directory=skip_directory
+    ).crawl(
+        _path,
+        recursive=recursive,
+        showtitle=showtitle,
+        season=season,
+        year=year,
+        frontier=frontier
+    )
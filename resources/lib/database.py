@@ -4,9 +4,12 @@
 """Defines the DatabaseHandler class."""
 
 import sqlite3
+import simplejson as json
 
 from os.path import join
 
+import xbmc  # pylint: disable=import-error
+
 from resources import AUTO_ADD_MOVIES
 from resources import AUTO_ADD_TVSHOWS
 
@@ -14,18 +17,105 @@ from resources.lib import build_json_item
 from resources.lib import build_contentitem
 from resources.lib import build_contentmanager
 
-from resources.lib.log import logged_function
+from resources.lib.log import log_msg
+from resources.lib.trace import span
+from resources.lib.trace import traced
 
 from resources.lib.utils import MANAGED_FOLDER
 
 from resources.lib.items.blocked import BlockedItem
+from resources.lib.items.blocked import BlockedMatcher
 from resources.lib.items.synced import SyncedItem
 
+# Schema migrations, each entry is a list of statements that upgrades the
+# database one version, the current version is stored in PRAGMA user_version.
+# Never edit an entry that was already released, append a new one instead.
+MIGRATIONS = [
+    # 1: indexes for menu queries, that filter by status, showtitle and season
+    [
+        """CREATE INDEX IF NOT EXISTS
+                tvshow_status_showtitle_season
+            ON
+                tvshow (status, showtitle, season)""",
+        """CREATE INDEX IF NOT EXISTS
+                movie_status
+            ON
+                movie (status)""",
+        """CREATE INDEX IF NOT EXISTS
+                blocked_value_type
+            ON
+                blocked (value, type)""",
+    ],
+    # 2: directory listings cache, with an optional ttl (hours) per synced directory
+    [
+        """CREATE TABLE IF NOT EXISTS listing_cache
+            (
+                file TEXT PRIMARY KEY,
+                response TEXT,
+                fingerprint TEXT,
+                fetched REAL
+            )""",
+        """ALTER TABLE synced ADD COLUMN cache_ttl INTEGER""",
+    ],
+    # 3: sync generation, stamped on every item seen by a sync, to sweep the missing ones
+    [
+        """ALTER TABLE movie ADD COLUMN last_seen_generation INTEGER NOT NULL DEFAULT 0""",
+        """ALTER TABLE tvshow ADD COLUMN last_seen_generation INTEGER NOT NULL DEFAULT 0""",
+        """CREATE TABLE IF NOT EXISTS sync_generation
+            (
+                generation INTEGER NOT NULL
+            )""",
+        """INSERT INTO sync_generation (generation) VALUES (0)""",
+    ],
+    # 4: background updates, interval (hours) and time of last update per synced directory
+    [
+        """ALTER TABLE synced ADD COLUMN update_interval INTEGER""",
+        """ALTER TABLE synced ADD COLUMN last_update REAL""",
+    ],
+    # 5: checkpoint of an interrupted sync, with its crawl frontier and the new items found
+    [
+        """CREATE TABLE IF NOT EXISTS sync_checkpoint
+            (
+                generation INTEGER NOT NULL,
+                type TEXT,
+                done TEXT,
+                current TEXT,
+                frontier TEXT,
+                unchanged INTEGER NOT NULL DEFAULT 0,
+                updated REAL
+            )""",
+        """CREATE TABLE IF NOT EXISTS sync_pending
+            (
+                file TEXT PRIMARY KEY,
+                item TEXT
+            )""",
+    ],
+    # 6: directories that failed to load in an interrupted sync
+    [
+        """ALTER TABLE sync_checkpoint ADD COLUMN failed TEXT""",
+    ],
+    # 7: metrics of each sync run, see SyncMetrics
+    [
+        """CREATE TABLE IF NOT EXISTS sync_runs
+            (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started REAL NOT NULL,
+                type TEXT,
+                metrics TEXT
+            )""",
+    ],
+]
+
+# Sync runs kept in sync_runs, older ones are removed when a run is added
+SYNC_RUNS_KEPT = 50
+
+# New items of a sync read from sync_pending at a time, when they are staged
+SYNC_PENDING_PAGE = 500
+
 
 class Database(object):
     """Database class with all database methods."""
 
-    # TODO: Reimplement blocked keywords
     # TODO: Combine remove_content_item functions using **kwargs
     def __init__(self):
         """__init__ database."""
@@ -33,6 +123,7 @@ class Database(object):
         self.conn = sqlite3.connect(join(MANAGED_FOLDER, 'managed.db'))
         self.conn.text_factory = str
         self.cur = self.conn.cursor()
+        self._blocked_matcher = None
         self.UPDATE_DICT_QUERY = {
             "movie": "UPDATE movie",
             "tvshow": "UPDATE tvshow",
@@ -49,12 +140,17 @@ class Database(object):
             "music": "INSERT OR IGNORE INTO music",
         }
         self.SELECT_DICT_QUERY = {
-            'movie': 'SELECT * FROM movie',
-            'tvshow': 'SELECT * FROM tvshow',
+            'movie': 'SELECT file, title, type, status, year FROM movie',
+            'tvshow': '''SELECT
+                            file, title, type, status, year, showtitle, season, episode
+                        FROM
+                            tvshow''',
             'music': 'SELECT * FROM music',
             'blocked': 'SELECT * FROM blocked',
-            'synced': 'SELECT * FROM synced',
-            'content': 'SELECT * FROM content',
+            'synced': '''SELECT
+                            file, label, type, cache_ttl, update_interval, last_update
+                        FROM
+                            synced''',
         }
         # Create tables if they doesn't exist
         self.cur.execute(
@@ -98,12 +194,40 @@ class Database(object):
             )'''
         )
         self.conn.commit()
+        self.migrate()
 
     def __del__(self):
         """Close database connection."""
         self.conn.close()
 
-    @logged_function
+    @traced
+    def migrate(self):
+        """
+        Apply all schema migrations newer than the database version, return the new version.
+
+        Each migration takes the write lock before reading the version, so
+        when the service and the addon start together, only one of them
+        applies it and the other finds it applied.
+        """
+        while True:
+            try:
+                # DDL does not open a transaction implicitly
+                self.cur.execute('BEGIN IMMEDIATE')
+                version = self.cur.execute('PRAGMA user_version').fetchone()[0]
+                if version >= len(MIGRATIONS):
+                    self.conn.commit()
+                    return version
+                for statement in MIGRATIONS[version]:
+                    self.cur.execute(statement)
+                # PRAGMA does not accept bound parameters
+                self.cur.execute('PRAGMA user_version = %d' % (version + 1))
+                self.conn.commit()
+            except sqlite3.Error as error:
+                self.conn.rollback()
+                log_msg('Database migration failed: %s' % error, xbmc.LOGERROR)
+                raise
+
+    @traced
     def check_if_is_blocked(self, value, _type=None):
         """Check if value exist in blocked and return True else None """
         self.cur.execute(
@@ -117,20 +241,48 @@ class Database(object):
         )
         return True if self.cur.fetchone() else None
 
-    @logged_function
+    @property
+    def blocked_matcher(self):
+        """
+        Return a BlockedMatcher with the current blocked list.
+
+        The list is loaded once and reused until blocked is changed
+        by add_blocked_item or delete_entrie_from_blocked.
+        """
+        if self._blocked_matcher is None:
+            self._blocked_matcher = BlockedMatcher(self.get_all_blocked_itens())
+        return self._blocked_matcher
+
+    def reset_caches(self):
+        """Forget data cached from database, i.e. after other connections changed it."""
+        self._blocked_matcher = None
+
+    @traced
     def load_item(self, file):
         """Query a single item and return as a json."""
-        self.cur.execute(
-            ' '.join(
-                [
-                    self.SELECT_DICT_QUERY['content'],
-                    "WHERE file=:file"
-                ]
-            ), {'file': file}
-        )
-        return build_json_item(self.cur.fetchone())
+        for jsonitem in self.load_items([file]):
+            return jsonitem
+        return None
+
+    def load_items(self, files):
+        """Yield items in movie and tvshow with a file in files as json."""
+        files = list(files)
+        # sqlite limits the number of variables in a query
+        for index in range(0, len(files), 500):
+            batch = files[index:index + 500]
+            for _type in ['movie', 'tvshow']:
+                self.cur.execute(
+                    ' '.join(
+                        [
+                            self.SELECT_DICT_QUERY[_type],
+                            'WHERE file IN (%s)' % ', '.join('?' * len(batch))
+                        ]
+                    ), batch
+                )
+                for item in self.cur.fetchall():
+                    yield build_json_item(item)
 
-    @logged_function
+    @traced
     def path_exists(self, file):
         """
         Check if item exist in all tables.
@@ -164,7 +316,23 @@ class Database(object):
         else:
             return None
 
-    @logged_function
+    def get_known_paths(self):
+        """
+        Load every file in movie and tvshow tables at once.
+
+        Return a dict mapping file to a list with table and status,
+        the same values returned by path_exists for a single file.
+        """
+        self.cur.execute(
+            '''SELECT file, 'movie', status FROM movie
+                UNION ALL
+                SELECT file, 'tvshow', status FROM tvshow'''
+        )
+        return {
+            file: [table, status] for file, table, status in self.cur.fetchall() if status
+        }
+
+    @traced
     def add_blocked_item(self, value, _type):
         """Add an item to blocked with the specified values."""
         # Ignore if already in table
@@ -172,11 +340,10 @@ class Database(object):
             self.cur.execute(
                 "INSERT INTO blocked (value, type) VALUES (?, ?)", (value, _type))
             self.conn.commit()
+            self._blocked_matcher = None
 
-    @logged_function
-    def add_content_item(self, jsondata):
-        """Add content to library."""
-        _type = jsondata['type']
+    def _content_insert_query(self, _type):
+        """Return the INSERT query used to stage a content item of _type."""
         query_defs = {
             'tvshow': (
                 "(file,title,type,status,year,showtitle,season,episode)",
@@ -186,35 +353,113 @@ class Database(object):
                 "(file,title,type,status,year)",
                 "(:file,:title,:type,'staged',:year)"
             ),
-            'music': ValueError("Not implemented yet, music")
         }
-        # sqlite named style:
-        self.cur.execute(
-            ' '.join(
-                [
-                    self.INSERT_DICT_QUERY[_type],
-                    '%s VALUES %s' % query_defs[_type],
-                ]
-            ), jsondata
-        )
-        self.conn.commit()
-        contentmanager = build_contentmanager(
-            self,
-            jsondata
-        )
-        if jsondata['type'] == 'tvshow':
-            if AUTO_ADD_TVSHOWS:
-                contentmanager.add_to_library()
-        elif jsondata['type'] == 'movie':
-            if AUTO_ADD_MOVIES:
-                contentmanager.add_to_library()
-        elif jsondata['type'] == 'music':
+        if _type == 'music':
             # TODO: Music params
             raise NotImplementedError(
                 'Not implemented yet'
             )
+        # sqlite named style:
+        return ' '.join(
+            [
+                self.INSERT_DICT_QUERY[_type],
+                '%s VALUES %s' % query_defs[_type],
+            ]
+        )
+
+    def _auto_add_to_library(self, jsondata):
+        """Add the staged item to library if auto add is enabled for its type."""
+        if jsondata['type'] == 'tvshow' and AUTO_ADD_TVSHOWS:
+            with span('write files'):
+                build_contentmanager(self, jsondata).add_to_library()
+        elif jsondata['type'] == 'movie' and AUTO_ADD_MOVIES:
+            with span('write files'):
+                build_contentmanager(self, jsondata).add_to_library()
 
-    @logged_function
+    @traced
+    def add_content_item(self, jsondata):
+        """Add content to library."""
+        self.cur.execute(
+            self._content_insert_query(jsondata['type']),
+            jsondata
+        )
+        self.conn.commit()
+        self._auto_add_to_library(jsondata)
+
+    @traced
+    def add_content_items(self, jsonitems):
+        """
+        Add a group of contents to library in a single transaction.
+
+        Items are inserted with executemany, one savepoint per type,
+        if a batch fails, only that batch is retried row by row,
+        and rows that still fail are logged and skipped. Only the rows
+        inserted, not the ones of files already staged or managed, are
+        added to library by auto add.
+        If a transaction is already open, it is left to the caller to
+        commit, and an error only rolls back the items of this call.
+        Return the number of new items staged.
+        """
+        batches = dict()
+        for jsondata in jsonitems:
+            batches.setdefault(jsondata['type'], []).append(jsondata)
+        if not batches:
+            return 0
+        # files of the rows inserted, rows of files already in database are ignored
+        new_files = set()
+        began = not self.conn.in_transaction
+        if began:
+            self.cur.execute('BEGIN')
+        self.cur.execute('SAVEPOINT add_content_items')
+        try:
+            for _type, items in batches.items():
+                query = self._content_insert_query(_type)
+                # new rows get a rowid greater than all rows before them
+                last_rowid = self.cur.execute(
+                    'SELECT MAX(rowid) FROM %s' % _type
+                ).fetchone()[0] or 0
+                self.cur.execute('SAVEPOINT add_content_batch')
+                try:
+                    self.cur.executemany(query, items)
+                except sqlite3.Error:
+                    self.cur.execute('ROLLBACK TO add_content_batch')
+                    for jsondata in items:
+                        self.cur.execute('SAVEPOINT add_content_item')
+                        try:
+                            self.cur.execute(query, jsondata)
+                        except sqlite3.Error as error:
+                            self.cur.execute('ROLLBACK TO add_content_item')
+                            log_msg(
+                                'Failed to stage %s: %s' % (jsondata['file'], error),
+                                xbmc.LOGWARNING
+                            )
+                        self.cur.execute('RELEASE add_content_item')
+                self.cur.execute('RELEASE add_content_batch')
+                new_files.update(
+                    x[0] for x in self.cur.execute(
+                        'SELECT file FROM %s WHERE rowid > ?' % _type, (last_rowid,)
+                    )
+                )
+            self.cur.execute('RELEASE add_content_items')
+            if began:
+                self.conn.commit()
+        except Exception:
+            if began:
+                self.conn.rollback()
+            elif self.conn.in_transaction:
+                self.cur.execute('ROLLBACK TO add_content_items')
+                self.cur.execute('RELEASE add_content_items')
+            raise
+        staged = len(new_files)
+        for items in batches.values():
+            for jsondata in items:
+                # once for each new file, even if it is repeated in jsonitems
+                if jsondata['file'] in new_files:
+                    new_files.remove(jsondata['file'])
+                    self._auto_add_to_library(jsondata)
+        return staged
+
+    @traced
     def add_item_to_synced(self, label, path, _type):
         """Create an entry in synced with specified values."""
         self.cur.execute(
@@ -232,7 +477,7 @@ class Database(object):
         )
         self.conn.commit()
 
-    @logged_function
+    @traced
     def get_all_blocked_itens(self):
         """Return all items in blocked as a list of BlockedItem objects."""
         self.cur.execute(
@@ -245,7 +490,7 @@ class Database(object):
         )
         return [BlockedItem(*x) for x in self.cur.fetchall()]
 
-    @logged_function
+    @traced
     def get_all_shows(self, status):
         """Query Content table for all (not null) distinct showtitles and cast results as list of strings."""
         # Query database
@@ -274,7 +519,7 @@ class Database(object):
         for item in self.cur.fetchall():
             yield item[0]
 
-    @logged_function
+    @traced
     def get_content_items(self, status, _type):
         """
         Query Content table for sorted items with given constaints and casts results as contentitem subclasses.
@@ -298,12 +543,54 @@ class Database(object):
             json_item = build_json_item(content)
             yield build_contentmanager(self, build_contentitem(json_item))
 
-    @logged_function
+    @traced
+    def new_sync_generation(self):
+        """Start a new sync generation and return its number."""
+        self.cur.execute('UPDATE sync_generation SET generation = generation + 1')
+        self.conn.commit()
+        return self.cur.execute('SELECT generation FROM sync_generation').fetchone()[0]
+
+    def mark_paths_seen(self, files, generation):
+        """Stamp generation on every item in movie and tvshow with a file in files."""
+        rows = [(generation, file) for file in files]
+        for _type in ['movie', 'tvshow']:
+            self.cur.executemany(
+                ' '.join(
+                    [
+                        self.UPDATE_DICT_QUERY[_type],
+                        'SET last_seen_generation=? WHERE file=?'
+                    ]
+                ), rows
+            )
+        self.conn.commit()
+
+    @traced
+    def get_unseen_paths(self, generation, _type=None):
+        """Return files of managed items not seen since generation, in _type or all tables."""
+        LOCAL_SELECT_DICT_QUERY = {
+            "movie": "SELECT file FROM movie",
+            "tvshow": "SELECT file FROM tvshow"
+        }
+        files = []
+        for table_type in [_type] if _type else ['movie', 'tvshow']:
+            self.cur.execute(
+                ' '.join(
+                    [
+                        LOCAL_SELECT_DICT_QUERY[table_type],
+                        'WHERE status=:status AND last_seen_generation < :generation'
+                    ]
+                ),
+                {'status': 'managed', 'generation': generation}
+            )
+            files += [x[0] for x in self.cur.fetchall()]
+        return files
+
+    @traced
     def get_season_items(self, status, showtitle):
         """Get seasons of a show and return as ContentManager object."""
         self.cur.execute('''
                         SELECT
-                            *
+                            file, title, type, status, year, showtitle, season, episode
                         FROM
                             tvshow
                         WHERE
@@ -321,12 +608,12 @@ class Database(object):
             json_item = build_json_item(content)
             yield build_contentmanager(self, build_contentitem(json_item))
 
-    @logged_function
+    @traced
     def get_episode_items(self, status, showtitle, season):
         """Get episodes of a show and return as a ContentManager object."""
         sql_comm = '''
                     SELECT
-                        *
+                        file, title, type, status, year, showtitle, season, episode
                     FROM
                         tvshow
                     WHERE
@@ -351,7 +638,7 @@ class Database(object):
             json_item = build_json_item(content)
             yield build_contentmanager(self, build_contentitem(json_item))
 
-    @logged_function
+    @traced
     def get_synced_dirs(self, synced_type=None):
         """Get all itens in synced or itens by type."""
         orderby_str = '''ORDER BY
@@ -369,7 +656,7 @@ class Database(object):
         self.cur.execute(
             ' '.join(
                 [
-                    self.SELECT_DICT_QUERY['select'],
+                    self.SELECT_DICT_QUERY['synced'],
                     "WHERE type=:type" if synced_type else '',
                     orderby_str
                 ]
@@ -377,7 +664,191 @@ class Database(object):
         )
         return [SyncedItem(*x) for x in self.cur.fetchall()]
 
-    @logged_function
+    @traced
+    def set_synced_cache_ttl(self, file, cache_ttl):
+        """Set the listing cache ttl (hours) of a synced dir, None to use the default."""
+        self.cur.execute(
+            "UPDATE synced SET cache_ttl=:cache_ttl WHERE file=:file",
+            {'file': file, 'cache_ttl': cache_ttl}
+        )
+        self.conn.commit()
+
+    @traced
+    def set_synced_update_interval(self, file, update_interval):
+        """Set the background update interval (hours) of a synced dir, None to only update manually."""
+        self.cur.execute(
+            "UPDATE synced SET update_interval=:update_interval WHERE file=:file",
+            {'file': file, 'update_interval': update_interval}
+        )
+        self.conn.commit()
+
+    @traced
+    def set_synced_last_update(self, file, last_update):
+        """Set the time (timestamp) of the last update of a synced dir."""
+        self.cur.execute(
+            "UPDATE synced SET last_update=:last_update WHERE file=:file",
+            {'file': file, 'last_update': last_update}
+        )
+        self.conn.commit()
+
+    def get_cached_listing(self, file):
+        """Return a cached directory listing as (files, fingerprint, fetched) or None."""
+        row = self.cur.execute(
+            "SELECT response, fingerprint, fetched FROM listing_cache WHERE file=:file",
+            {'file': file}
+        ).fetchone()
+        if row:
+            return json.loads(row[0]), row[1], row[2]
+        return None
+
+    def set_cached_listing(self, file, files, fingerprint, fetched):
+        """
+        Store a directory listing in cache, without commit.
+
+        If the fingerprint did not change only the fetch time is updated.
+        """
+        self.cur.execute(
+            "UPDATE listing_cache SET fetched=:fetched WHERE file=:file AND fingerprint=:fingerprint",
+            {'file': file, 'fingerprint': fingerprint, 'fetched': fetched}
+        )
+        if not self.cur.rowcount:
+            self.cur.execute(
+                '''INSERT OR REPLACE INTO
+                        listing_cache
+                        (file, response, fingerprint, fetched)
+                    VALUES
+                        (:file, :response, :fingerprint, :fetched)
+                ''',
+                {
+                    'file': file,
+                    'response': json.dumps(files),
+                    'fingerprint': fingerprint,
+                    'fetched': fetched
+                }
+            )
+
+    @traced
+    def clear_listing_cache(self):
+        """Remove all cached directory listings."""
+        self.cur.execute('DELETE FROM listing_cache')
+        self.conn.commit()
+
+    def get_sync_checkpoint(self):
+        """Return the checkpoint of an interrupted sync as a dict, or None."""
+        row = self.cur.execute(
+            '''SELECT
+                    generation, type, done, current, frontier, unchanged, updated, failed
+                FROM
+                    sync_checkpoint'''
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            'generation': row[0],
+            '_type': row[1],
+            'done': json.loads(row[2]),
+            'current': row[3],
+            'frontier': json.loads(row[4]) if row[4] else None,
+            'unchanged': row[5],
+            'updated': row[6],
+            'failed': json.loads(row[7]) if row[7] else []
+        }
+
+    def set_sync_checkpoint(self, generation, _type, done, current, frontier,
+                            unchanged, updated, failed=None):
+        """Replace the checkpoint of the running sync, without commit."""
+        self.cur.execute('DELETE FROM sync_checkpoint')
+        self.cur.execute(
+            '''INSERT INTO
+                    sync_checkpoint
+                    (generation, type, done, current, frontier, unchanged, updated, failed)
+                VALUES
+                    (:generation, :type, :done, :current, :frontier, :unchanged, :updated,
+                     :failed)
+            ''',
+            {
+                'generation': generation,
+                'type': _type,
+                'done': json.dumps(done),
+                'current': current,
+                'frontier': json.dumps(frontier) if frontier else None,
+                'unchanged': unchanged,
+                'updated': updated,
+                'failed': json.dumps(failed or [])
+            }
+        )
+
+    def add_sync_pending_items(self, contentitems):
+        """Store new items found by the running sync, without commit."""
+        self.cur.executemany(
+            "INSERT OR REPLACE INTO sync_pending (file, item) VALUES (?, ?)",
+            [(x['file'], json.dumps(x)) for x in contentitems]
+        )
+
+    def get_sync_pending_items(self):
+        """Return the new items found by a sync, not staged yet."""
+        return list(self.iter_sync_pending_items())
+
+    def iter_sync_pending_items(self, size=SYNC_PENDING_PAGE):
+        """Yield the new items found by a sync, reading size items at a time."""
+        last_rowid = 0
+        while True:
+            rows = self.cur.execute(
+                '''SELECT
+                        rowid, item
+                    FROM
+                        sync_pending
+                    WHERE
+                        rowid > :rowid
+                    ORDER BY
+                        rowid
+                    LIMIT :size''',
+                {'rowid': last_rowid, 'size': size}
+            ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            for row in rows:
+                yield json.loads(row[1])
+
+    def get_sync_pending_files(self):
+        """Return the files of the new items found by a sync, not staged yet."""
+        self.cur.execute('SELECT file FROM sync_pending')
+        return [x[0] for x in self.cur.fetchall()]
+
+    @traced
+    def add_sync_run(self, started, _type, metrics):
+        """Store the metrics (a dict) of a sync run, keeping only the last SYNC_RUNS_KEPT."""
+        self.cur.execute(
+            "INSERT INTO sync_runs (started, type, metrics) VALUES (:started, :type, :metrics)",
+            {'started': started, 'type': _type, 'metrics': json.dumps(metrics)}
+        )
+        self.cur.execute(
+            '''DELETE FROM
+                    sync_runs
+                WHERE
+                    id NOT IN (SELECT id FROM sync_runs ORDER BY id DESC LIMIT :kept)''',
+            {'kept': SYNC_RUNS_KEPT}
+        )
+        self.conn.commit()
+
+    def get_sync_runs(self, limit=SYNC_RUNS_KEPT):
+        """Return the metrics of the last sync runs, the newest first."""
+        self.cur.execute(
+            "SELECT metrics FROM sync_runs ORDER BY id DESC LIMIT :limit",
+            {'limit': limit}
+        )
+        return [json.loads(x[0]) for x in self.cur.fetchall()]
+
+    @traced
+    def clear_sync_checkpoint(self, keep_pending=False):
+        """Remove the checkpoint and, unless keep_pending, the new items of a sync."""
+        self.cur.execute('DELETE FROM sync_checkpoint')
+        if not keep_pending:
+            self.cur.execute('DELETE FROM sync_pending')
+        self.conn.commit()
+
+    @traced
     def delete_item_from_table(self, _type, file):
         """Delete an entry in the table using the 'file' key, regardless of status."""
         self.cur.execute(
@@ -391,7 +862,21 @@ class Database(object):
         )
         self.conn.commit()
 
-    @logged_function
+    @traced
+    def delete_items_from_table(self, _type, files):
+        """Delete all entries in the table with a file in files, in a single transaction."""
+        self.cur.executemany(
+            ' '.join(
+                [
+                    self.DELETE_DICT_QUERY[_type],
+                    "WHERE file=?"
+                ]
+            ),
+            [(file,) for file in files]
+        )
+        self.conn.commit()
+
+    @traced
     def delete_item_from_table_with_status_or_showtitle(self, _type, status, showtitle=None):
         """
         Delete an entry in the table using the 'status' and 'showtitle', key.
@@ -416,7 +901,7 @@ class Database(object):
         )
         self.conn.commit()
 
-    @logged_function
+    @traced
     def delete_item_from_table_with_season(self, _type, showtitle, season):
         """Delete an entry in the table using the 'showtitle' and 'season' key."""
         self.cur.execute(
@@ -433,36 +918,37 @@ class Database(object):
         )
         self.conn.commit()
 
-    @logged_function
+    @traced
     def delete_entrie_from_blocked(self, value, _type):
         """Delete one entrie from blocked."""
         self.cur.execute(
             '''DELETE FROM
                     blocked
                 WHERE
-                            showtitle="%s"
-                        AND
+                    value=:value
+                AND
                     type=:type''',
             {'value': value, 'type': _type}
         )
         self.conn.commit()
+        self._blocked_matcher = None
 
-    @logged_function
+    @traced
     def delete_all_from_synced(self):
         """Remove all dirs from synced."""
         self.cur.execute('DELETE FROM synced')
         self.conn.commit()
 
-    @logged_function
+    @traced
     def delete_dir_from_synced(self, file):
         """Remove one dir from synced."""
         self.cur.execute(
-            "DELETE FROM synced WHERE file=?",
+            "DELETE FROM synced WHERE file=:file",
             {'file': file}
         )
         self.conn.commit()
 
-    @logged_function
+    @traced
     def update_title_in_database(self, file, _type, title):
         """Update a title for a single entrie in database."""
         self.cur.execute(
@@ -475,7 +961,7 @@ class Database(object):
         )
         self.conn.commit()
 
-    @logged_function
+    @traced
     def update_showtitle_in_database(self, file, _type, showtitle):
         """Update a showtitle for a single entrie in database."""
         self.cur.execute(
@@ -488,7 +974,7 @@ class Database(object):
         )
         self.conn.commit()
 
-    @logged_function
+    @traced
     def update_status_in_database(self, file, _type, status):
         """Update a status for a single entrie in database."""
         self.cur.execute(
@@ -5,6 +5,7 @@
 import os
 from os import remove
 
+from time import monotonic
 from pathlib import Path
 from shutil import rmtree
 
@@ -16,6 +17,17 @@ from os.path import isfile
 from os.path import exists
 
 from resources.lib.log import log_msg
+from resources.lib.trace import traced
+
+# Files, bytes and seconds written by CreateNfo and create_stream_file, see SyncMetrics
+WRITE_STATS = {'files': 0, 'bytes': 0, 'seconds': 0.}
+
+
+def count_write(text, start):
+    """Add a file with text, written since start (monotonic), to WRITE_STATS."""
+    WRITE_STATS['files'] += 1
+    WRITE_STATS['bytes'] += len(text.encode('utf-8'))
+    WRITE_STATS['seconds'] += monotonic() - start
 
 
 class CreateNfo(object):
@@ -100,6 +112,7 @@ class CreateNfo(object):
         except KeyError:
             pass
 
+    @traced
     def create(self):
         """
         Create the nfo file.
@@ -111,6 +124,7 @@ class CreateNfo(object):
         """
         body = self.tvshow() or self.episodedetails() or self.movie()
         self.root = self.root % body
+        start = monotonic()
         with open(self.filepath, "w+") as nfofile:
             try:
                 nfofile.write(self.root)
@@ -118,10 +132,13 @@ class CreateNfo(object):
                 log_msg(e)
             finally:
                 nfofile.close()
+        count_write(self.root, start)
 
 
+@traced
 def create_stream_file(plugin_path, filepath):
     """Create stream file with plugin_path at filepath."""
+    start = monotonic()
     with open(filepath, "w+") as strm:
         try:
             strm.write(plugin_path)
@@ -129,6 +146,7 @@ def create_stream_file(plugin_path, filepath):
             log_msg(e)
         finally:
             strm.close()
+    count_write(plugin_path, start)
     return True
 
 
@@ -1,6 +1,8 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
-"""Defines BlockedItem class."""
+"""Defines BlockedItem and BlockedMatcher classes."""
+
+import re
 
 from resources.lib.utils import getstring
 
@@ -31,3 +33,38 @@ class BlockedItem(dict):
             except KeyError:
                 self._localized_type = self['type']
         return self._localized_type
+
+
+class BlockedMatcher(object):
+    """
+    In memory view of the blocked list, to filter many items without queries.
+
+    Values are kept in one set per type, and all keywords are compiled
+    in a single case insensitive regex that matches anywhere in the value.
+    """
+
+    def __init__(self, blocked_items):
+        """__init__ BlockedMatcher."""
+        self.values = dict()
+        keywords = []
+        for item in blocked_items:
+            if item['type'] == 'keyword':
+                keywords.append(item['value'])
+            else:
+                self.values.setdefault(item['type'], set()).add(item['value'])
+        self.all_values = set().union(*self.values.values())
+        self.keywords = None
+        if keywords:
+            # longest first, so the alternation prefers the most specific keyword
+            self.keywords = re.compile(
+                '|'.join(re.escape(x) for x in sorted(keywords, key=len, reverse=True)),
+                re.I
+            )
+
+    def is_blocked(self, value, _type=None):
+        """Return True if value is blocked for _type (any type if None) or has a blocked keyword."""
+        if not value:
+            return False
+        if value in (self.values.get(_type, ()) if _type else self.all_values):
+            return True
+        return bool(self.keywords and self.keywords.search(value))
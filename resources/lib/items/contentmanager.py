@@ -11,7 +11,7 @@ from resources import AUTO_CREATE_NFO_SHOWS
 from resources import AUTO_CREATE_NFO_MOVIES
 
 # from resources import USE_SHOW_ARTWORK_SHOW
-from resources.lib.log import logged_function
+from resources.lib.trace import traced
 
 from resources.lib.filesystem import mkdir
 from resources.lib.filesystem import CreateNfo
@@ -93,7 +93,7 @@ class ContentManagerShow(ABSContentManagerShow):
         """Return managed_episode_nfo_path."""
         return ''.join([self.managed_episode_path, '.nfo'])
 
-    @logged_function
+    @traced
     def add_to_library(self):
         """Add item to library."""
         # Create show_dir (tv show folder) in managed/tvshow/ diretory
@@ -113,7 +113,7 @@ class ContentManagerShow(ABSContentManagerShow):
         )
         return True
 
-    @logged_function
+    @traced
     def create_metadata_item(self):
         """Create metadata."""
         # Create show_dir (tv show folder) in managed/tvshow/ diretory
@@ -137,7 +137,7 @@ class ContentManagerShow(ABSContentManagerShow):
             title=self.jsondata['title']
         )
 
-    @logged_function
+    @traced
     def remove_and_block(self):
         """Remove item from library and block."""
         # TODO: Need to remove nfo for all other items that match blocked
@@ -154,7 +154,7 @@ class ContentManagerShow(ABSContentManagerShow):
             _type='tvshow'
         )
 
-    @logged_function
+    @traced
     def remove_from_library(self):
         """Remove from library."""
         # Delete stream & episode nfo
@@ -171,7 +171,7 @@ class ContentManagerShow(ABSContentManagerShow):
     # TODO: in future, rename can be usefull to rename showtitle and title (episode_title),
     # store a table with file, original_title and newtitle can be a more easily way to performe this
 
-    # @logged_function
+    # @traced
     # def rename(self, name):
     #     # Rename files if they exist
     #     # TODO: I supose this function is working, but not change the name,
@@ -252,7 +252,7 @@ class ContentManagerMovie(ABSContentManagerMovie):
         """Return movie_nfo."""
         return join(self.managed_movie_dir, ''.join([self.title, '.nfo']))
 
-    @logged_function
+    @traced
     def add_to_library(self):
         """Add item to library."""
         # Create managed_movie_dir (movie folder) in managed/movies/ diretory
@@ -269,7 +269,7 @@ class ContentManagerMovie(ABSContentManagerMovie):
             status='managed'
         )
 
-    @logged_function
+    @traced
     def create_metadata_item(self):
         """Create metadata movie item."""
         # Create managed_movie_dir (movie folder) in managed/movies/ diretory
@@ -286,7 +286,7 @@ class ContentManagerMovie(ABSContentManagerMovie):
             title=self.jsondata['title']
         )
 
-    @logged_function
+    @traced
     def remove_and_block(self):
         """Remove item and block."""
         # Add title to blocked
@@ -302,7 +302,7 @@ class ContentManagerMovie(ABSContentManagerMovie):
             _type='movie'
         )
 
-    @logged_function
+    @traced
     def remove_from_library(self):
         """Remove from library."""
 
@@ -5,8 +5,8 @@
 from os.path import join
 
 from resources.lib.utils import MANAGED_FOLDER
-from resources.lib.manipulator import Cleaner
-from resources.lib.log import logged_function
+from resources.lib.manipulator import CLEANER
+from resources.lib.trace import traced
 
 from resources.lib.abs.item import ABSItemShow
 
@@ -17,7 +17,7 @@ class EpisodeItem(ABSItemShow):
     def __init__(self, jsonitem, year=None):
         """__init__ EpisodeItem."""
         super(EpisodeItem, self).__init__(jsonitem, year)
-        self.cleaner = Cleaner()
+        self.cleaner = CLEANER
         self._file = jsonitem['file']
         self._showtitle = self.cleaner.showtitle(
             jsonitem['showtitle']
@@ -93,7 +93,7 @@ class EpisodeItem(ABSItemShow):
             )
         return self._managed_dir
 
-    @logged_function
+    @traced
     def returasjson(self):
         """Return a dict with all information about tvshow."""
         try:
@@ -5,10 +5,10 @@
 
 from os.path import join
 
-from resources.lib.log import logged_function
+from resources.lib.trace import traced
 from resources.lib.abs.item import ABSItemMovie
 
-from resources.lib.manipulator import Cleaner
+from resources.lib.manipulator import CLEANER
 from resources.lib.utils import MANAGED_FOLDER
 
 
@@ -18,7 +18,7 @@ class MovieItem(ABSItemMovie):
     def __init__(self, jsonitem, year=None):
         """__init__ MovieItem."""
         super(MovieItem, self).__init__(jsonitem, year)
-        self.cleaner = Cleaner()
+        self.cleaner = CLEANER
         self._file = jsonitem['file']
         self._title = self.cleaner.title(title=jsonitem['title'])
         self._year = year if year else jsonitem['year']
@@ -47,7 +47,7 @@ class MovieItem(ABSItemMovie):
             )
         return self._managed_dir
 
-    @logged_function
+    @traced
     def returasjson(self):
         """Return the json with information from content."""
         try:
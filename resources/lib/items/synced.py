@@ -3,20 +3,40 @@
 
 """Defines the SyncedItem class."""
 
+from resources import LISTING_CACHE_TTL
+
 from resources.lib.utils import getstring
 
 
 class SyncedItem(dict):
     """Dictionary-like class that contains information about a synced directory in the database."""
 
-    def __init__(self, directory, label, synced_type):
+    def __init__(self, directory, label, synced_type, cache_ttl=None,
+                 update_interval=None, last_update=None):
         """SyncedItem __init__."""
         super(SyncedItem, self).__init__()
         self['file'] = directory
         self['label'] = label
         self['type'] = synced_type
+        self['cache_ttl'] = cache_ttl
+        self['update_interval'] = update_interval
+        self['last_update'] = last_update
         self._localized_type = None
 
+    @property
+    def cache_ttl(self):
+        """Return how long (seconds) listings of this directory can be reused from cache."""
+        if self['cache_ttl'] is None:
+            return LISTING_CACHE_TTL * 3600
+        return self['cache_ttl'] * 3600
+
+    @property
+    def next_update(self):
+        """Return when (timestamp) this directory is due for a background update, None if manual."""
+        if not self['update_interval']:
+            return None
+        return (self['last_update'] or 0) + self['update_interval'] * 3600
+
     def localize_type(self):
         """Localize tags used for identifying type."""
         _TYPES = {
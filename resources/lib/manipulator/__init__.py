@@ -6,6 +6,8 @@
 import os
 import re
 
+from functools import lru_cache
+
 # TODO: Use combined list on all platforms. Would need to be combined with version check
 # to re-add all managed items
 MAPPED_STRINGS = {
@@ -35,18 +37,12 @@ MAPPED_STRINGS = {
     r'Part 5': 'Part Five',
     r'Part 6': 'Part Six',
     r'Final Season': ' ',
-    r'\s{1,10}': ' ',
 }
 
 if os.name == 'nt':
-    MAPPED_STRINGS += {
-        '?': ' ',
-        '<': ' ',
-        '>': ' ',
-        '\\': ' ',
-        '*': ' ',
-        '|': ' ',
-    }
+    MAPPED_STRINGS.update({
+        re.escape(x): ' ' for x in ['?', '<', '>', '\\', '*', '|']
+    })
 
     # [
     #('+', ''),
@@ -69,24 +65,75 @@ if os.name == 'nt':
 # use system language to auto select:
 
 
+# Runs of whitespace left by MAPPED_STRINGS, replaced by a single space after them
+WHITESPACE = re.compile(r'\s{1,10}')
+
+# Patterns of MAPPED_STRINGS that begin a new pass of the Cleaner, as they can
+# match the replacements of the previous patterns, i.e. "Part.1" or "(Leg)S1 "
+CLEANER_PASSES = frozenset([
+    r'\s{1,3}S\d{1,5}\s{1,3}',
+    r'\s{1,4}\#\d{1,6}\s{1,4}\-\s{1,4}',
+    r'Part 1',
+])
+
+# Number of cleaned strings kept by each Cleaner, the least recently used are dropped
+CLEANER_CACHE_SIZE = 4096
+
+
 class Cleaner(object):
-    """Class with methods to clear strings from content."""
+    """
+    Class with methods to clear strings from content.
 
-    def __init__(self) -> None:
+    MAPPED_STRINGS are compiled into alternations, so a string is scanned
+    once per pass (see CLEANER_PASSES) instead of once per pattern, and
+    the results are the same as replacing each pattern in order. Results are
+    memoized by the raw string in a bounded LRU, so the showtitle shared
+    by all episodes of a show is only cleaned once.
+    """
+
+    def __init__(self, strings=None, cache_size=CLEANER_CACHE_SIZE) -> None:
         """Cleaner __init__."""
         super().__init__()
-        self.strings = MAPPED_STRINGS
+        self.strings = MAPPED_STRINGS if strings is None else strings
+        self._replacements = dict()
+        self._passes = []
+        patterns = []
+        for index, (key, val) in enumerate(self.strings.items()):
+            if patterns and key in CLEANER_PASSES:
+                self._passes.append(re.compile('|'.join(patterns)))
+                patterns = []
+            self._replacements['p%s' % index] = val
+            patterns.append('(?P<p%s>%s)' % (index, key))
+        if patterns:
+            self._passes.append(re.compile('|'.join(patterns)))
+        self._clean = lru_cache(maxsize=cache_size)(self._sub)
+
+    def _replace(self, match):
+        """Return the replacement of the pattern that matched."""
+        return self._replacements[match.lastgroup]
+
+    def _sub(self, string):
+        """Return string with all MAPPED_STRINGS replaced."""
+        for pattern in self._passes:
+            string = pattern.sub(self._replace, string)
+        return WHITESPACE.sub(' ', string).strip()
 
     def showtitle(self, showtitle):
         """Function to remove strings from showtitle."""
-        for key, val in self.strings.items():
-            showtitle = re.sub(key, val, showtitle)
-        return showtitle.strip()
+        return self._clean(showtitle)
 
     def title(self, title, showtitle=None):
         """Function to remove strings and showtitle from title."""
-        for key, val in self.strings.items():
-            title = re.sub(key, val, title)
-        return title.replace(self.showtitle(showtitle), ' ').strip()
+        title = self._clean(title)
+        if showtitle:
+            title = title.replace(self.showtitle(showtitle), ' ').strip()
+        return title
+
+
+# Shared by all items, so the memoized strings are reused across directories
+CLEANER = Cleaner()
 
 
+def clean_name(name):
+    """Return name with MAPPED_STRINGS removed, i.e. to use as file name."""
+    return CLEANER.showtitle(name)
@@ -6,7 +6,7 @@
 import xbmcgui  # pylint: disable=import-error
 
 from resources import ADDON_NAME
-from resources.lib.log import logged_function
+from resources.lib.trace import traced
 from resources.lib.utils import getstring
 
 
@@ -17,7 +17,7 @@ class BlockedMenu(object):
         """__init__ BlockedMenu."""
         self.database = database
 
-    @logged_function
+    @traced
     def view(self):
         """
         Display all blocked items, which are selectable and lead to options.
@@ -51,7 +51,7 @@ class BlockedMenu(object):
             elif lines[ret] == STR_BACK:
                 return
 
-    @logged_function
+    @traced
     def options(self, item):
         """Provide options for a single blocked item in a dialog window."""
         STR_REMOVE = getstring(32017)
@@ -14,7 +14,7 @@ from resources import ADDON_NAME
 from resources.lib.utils import MANAGED_FOLDER
 from resources.lib.dialog_select import Select
 
-from resources.lib.log import logged_function
+from resources.lib.trace import traced
 
 from resources.lib.utils import bold
 from resources.lib.utils import color
@@ -36,7 +36,7 @@ class ManagedMoviesMenu(object):
         self.database = database
         self.progressdialog = progressdialog
 
-    @logged_function
+    @traced
     def move_all_to_staged(self, items):
         """Remove all managed movies from library, and add them to staged."""
         STR_MOVING_ALL_MOVIES_BACK_TO_STAGED = getstring(32015)
@@ -53,7 +53,7 @@ class ManagedMoviesMenu(object):
         self.progressdialog._close()
         notification(STR_MOVING_ALL_MOVIES_BACK_TO_STAGED)
 
-    @logged_function
+    @traced
     def remove_all(self, items):
         """Remove all managed movies from library."""
         STR_REMOVING_ALL_MOVIES = getstring(32013)
@@ -72,7 +72,7 @@ class ManagedMoviesMenu(object):
         notification(STR_ALL_MOVIES_REMOVED)
 
     @staticmethod
-    @logged_function
+    @traced
     def clean_up_managed_metadata():
         """Remove all unused metadata."""
         STR_MOVIE_METADATA_CLEANED = getstring(32136)
@@ -86,7 +86,7 @@ class ManagedMoviesMenu(object):
                         remove(join(full_path, filepath))
         notification(STR_MOVIE_METADATA_CLEANED)
 
-    @logged_function
+    @traced
     def generate_all_managed_metadata(self, items):
         """Generate metadata items for all managed movies."""
         STR_GENERATING_ALL_MOVIE_METADATA = getstring(32046)
@@ -103,7 +103,7 @@ class ManagedMoviesMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_MOVIE_METADTA_CREATED)
 
-    @logged_function
+    @traced
     def options(self, item):
         """Provide options for a single managed movie in a dialog window."""
         # TODO: add rename option
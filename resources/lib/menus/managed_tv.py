@@ -6,7 +6,7 @@
 import xbmcgui  # pylint: disable=import-error
 
 from resources import ADDON_NAME
-from resources.lib.log import logged_function
+from resources.lib.trace import traced
 
 from resources.lib.utils import bold
 from resources.lib.utils import color
@@ -26,7 +26,7 @@ class ManagedTVMenu(object):
         self.database = database
         self.progressdialog = progressdialog
 
-    @logged_function
+    @traced
     def move_all_episodes_to_staged(self, items):
         """Remove staged spisodes from library and move to staged."""
         showtitle = bold(items[0].showtitle)
@@ -51,7 +51,7 @@ class ManagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_x_EPISODES_MOVED_TO_STAGED)
 
-    @logged_function
+    @traced
     def move_all_seasons_to_staged(self, showtitle):
         """Remove staged seasons from library and move to staged."""
         _showtitle = bold(showtitle)
@@ -81,7 +81,7 @@ class ManagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_x_SEASONS_MOVED_TO_STAGED)
 
-    @logged_function
+    @traced
     def move_all_tvshows_to_staged(self):
         """Remove all managed tvshow from library, move to staged."""
         STR_MOVING_ALL_TV_SHOWS_TO_STAGED = getstring(32026)
@@ -110,7 +110,7 @@ class ManagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_TV_SHOWS_MOVED_TO_STAGED)
 
-    @logged_function
+    @traced
     def generate_all_managed_episodes_metadata(self, episodes):
         """Create metadata for all managed episodes."""
         STR_GENERATING_ALL_TV_EPISODES_METADATA = getstring(32181)
@@ -130,7 +130,7 @@ class ManagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_TV_EPISODES_METADATA_CREATED)
 
-    @logged_function
+    @traced
     def generate_all_managed_seasons_metadata(self, showtitle):
         """Create metadata for all managed seasons."""
         STR_GENERATING_ALL_TV_SEASONS_METADATA = getstring(32181)
@@ -156,7 +156,7 @@ class ManagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_TV_SEASONS_METADATA_CREATED)
 
-    @logged_function
+    @traced
     def generate_all_managed_tvshows_metadata(self):
         """Create metadata for all managed tvshows."""
         STR_GENERATING_ALL_TV_SHOWS_METADATA = getstring(32063)
@@ -185,7 +185,7 @@ class ManagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_TV_SHOWS_METADATA_CREATED)
 
-    @logged_function
+    @traced
     def episode_options(self, item, season):
         """Provide options for a single managed episode in a dialog window."""
         STR_GENERATE_EPISODE_METADATA = getstring(32017)
@@ -215,7 +215,7 @@ class ManagedTVMenu(object):
                 self.view_episodes(item.showtitle, season)
         self.view_episodes(item.showtitle, season)
 
-    @logged_function
+    @traced
     def view_episodes(self, showtitle, season):
         """
         Display all managed episodes in the specified show, which are selectable and lead to options.
@@ -269,7 +269,7 @@ class ManagedTVMenu(object):
         else:
             self.view_seasons(showtitle)
 
-    @logged_function
+    @traced
     def view_seasons(self, showtitle):
         """
         Display all managed seasons in the specified show, which are selectable and lead to options.
@@ -330,7 +330,7 @@ class ManagedTVMenu(object):
         else:
             self.view_shows()
 
-    @logged_function
+    @traced
     def view_shows(self):
         """
         Display all managed tvshows, which are selectable and lead to options.
@@ -7,7 +7,7 @@ import xbmcgui  # pylint: disable=import-error
 
 
 from resources import ADDON_NAME
-from resources.lib.log import logged_function
+from resources.lib.trace import traced
 
 from resources.lib.utils import notification
 from resources.lib.utils import getstring
@@ -25,7 +25,7 @@ class StagedMoviesMenu(object):
         self.database = database
         self.progressdialog = progressdialog
 
-    @logged_function
+    @traced
     def add_all(self, items):
         """Add all staged movies to library."""
         STR_ADDING_ALL_MOVIES = getstring(32042)
@@ -53,7 +53,7 @@ class StagedMoviesMenu(object):
         if input_ret:
             item.rename(input_ret)
 
-    @logged_function
+    @traced
     def options(self, item):
         """Provide options for a single staged movie in a dialog window."""
         STR_ADD = getstring(32048)
@@ -95,7 +95,7 @@ class StagedMoviesMenu(object):
         else:
             self.view_all()
 
-    @logged_function
+    @traced
     def remove_all(self):
         """Remove all staged movies."""
         STR_REMOVING_ALL_MOVIES = getstring(32013)
@@ -110,7 +110,7 @@ class StagedMoviesMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_MOVIES_REMOVED)
 
-    @logged_function
+    @traced
     def view_all(self):
         """
         Display all staged movies, which are selectable and lead to options.
@@ -7,7 +7,7 @@ import xbmcgui  # pylint: disable=import-error
 
 from resources import ADDON_NAME
 
-from resources.lib.log import logged_function
+from resources.lib.trace import traced
 
 from resources.lib.dialog_select import Select
 
@@ -39,7 +39,7 @@ class StagedTVMenu(object):
     #     if input_ret:
     #         item.rename(input_ret)
 
-    # @logged_function
+    # @traced
     # def rename_episodes_using_metadata(self, items):
     #     """Rename all episodes in show using nfo files."""
     #     STR_RENAMING_x_EPISODES_USING_METADATA = getstring(32075)
@@ -56,7 +56,7 @@ class StagedTVMenu(object):
     #     self.progressdialog._close()
     #     notification(STR_x_EPISODES_RENAMED_USING_METADATA % showtitle)
 
-    @logged_function
+    @traced
     def add_all_staged_episodes_to_library(self, episodes):
         """Add all episodes from specified show to library."""
         STR_ADDING_ALL_x_EPISODES = getstring(32071)
@@ -84,7 +84,7 @@ class StagedTVMenu(object):
             )
         )
 
-    @logged_function
+    @traced
     def add_all_staged_seasons_to_library(self, showtitle):
         """Add all episodes from specified show to library."""
         STR_ADDING_ALL_x_SEASONS = 'Adding all %s seasons...'
@@ -117,7 +117,7 @@ class StagedTVMenu(object):
             )
         )
 
-    @logged_function
+    @traced
     def add_all_staged_shows_to_library(self):
         """Add all tvshow items to library."""
         STR_ADDING_ALL_TV_SHOWS = getstring(32059)
@@ -145,7 +145,7 @@ class StagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_TV_SHOWS_ADDED)
 
-    @logged_function
+    @traced
     def remove_all_shows(self):
         """Remove all staged tvshow items."""
         STR_REMOVING_ALL_TV_SHOWS = getstring(32024)
@@ -160,7 +160,7 @@ class StagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_TV_SHOW_REMOVED)
 
-    @logged_function
+    @traced
     def remove_all_seasons(self, showtitle):
         """Remove all seasons from the specified show."""
         STR_REMOVING_ALL_x_SEASONS = getstring(32032) % showtitle
@@ -176,7 +176,7 @@ class StagedTVMenu(object):
         self.progressdialog._close()
         notification(STR_ALL_x_SEASONS_REMOVED)
 
-    @logged_function
+    @traced
     def remove_all_episodes(self, showtitle):
         """Remove all episodes from the specified show."""
         formed_title = color(bold(showtitle), 'skyblue')
@@ -194,7 +194,7 @@ class StagedTVMenu(object):
         notification(STR_ALL_x_EPISODES_REMOVED)
 
     # TODO: CONTINUE HERE
-    @logged_function
+    @traced
     def remove_and_block_show(self, showtitle, season, episode):
         """Remove all itens from staged and add to blocked list."""
         raise NotImplementedError("Fix in future")
@@ -207,7 +207,7 @@ class StagedTVMenu(object):
         # )
 
     # TODO: this method need update to follow dict style
-    @logged_function
+    @traced
     def episode_options(self, item, season):
         """Provide options for a single staged episode in a dialog window."""
         # TODO: rename associated metadata when renaming
@@ -255,7 +255,7 @@ class StagedTVMenu(object):
         else:
             self.view_episodes(item.showtitle, season)
 
-    @logged_function
+    @traced
     def view_episodes(self, showtitle, season):
         """
         Display all staged episodes in the specified show, which are selectable and lead to options.
@@ -306,7 +306,7 @@ class StagedTVMenu(object):
                 command[0](command[1])
             self.view_shows()
 
-    @logged_function
+    @traced
     def view_seasons(self, showtitle):
         """
         Display all staged seasons in the specified show, which are selectable and lead to options.
@@ -369,7 +369,7 @@ class StagedTVMenu(object):
                 command = OPTIONS[list(OPTIONS.keys())[selection['index1']]]
                 command(showtitle)
 
-    @logged_function
+    @traced
     def view_shows(self):
         """Display all managed tvshows, which are selectable and lead to options."""
         STR_NO_STAGED_TV_SHOWS = getstring(32054)
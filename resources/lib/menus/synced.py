@@ -10,16 +10,28 @@ import xbmc  # pylint: disable=import-error
 import xbmcgui  # pylint: disable=import-error
 
 from resources import ADDON_NAME
+from resources import LISTING_CACHE_TTL
 
 from resources.lib import build_json_item
 from resources.lib import build_contentitem
 
-from resources.lib.log import logged_function
+from resources.lib.trace import traced
 
 from resources.lib.utils import notification
 from resources.lib.utils import title_with_color
 from resources.lib.utils import getstring
-from resources.lib.utils import load_directory_items
+from resources.lib.utils import JSON_RPC_PROPERTY_PRESETS
+
+from resources.lib.crawler import load_directory_items
+
+from resources.lib.pipeline import stage
+
+from resources.lib.sync import SyncEngine
+from resources.lib.sync import SyncApplier
+
+from resources.lib.metrics import run_label
+from resources.lib.metrics import run_report
+from resources.lib.metrics import SyncMetrics
 
 from resources.lib.progressbar import BGProgressBar
 
@@ -38,108 +50,16 @@ class SyncedMenu(object):
         self.progressdialog = progressdialog
         self.bgprogressbar = BGProgressBar()
 
-    def filter_blocked_items(self, items, _type):
-        """Filter out all blocked items in the list."""
-        return [x for x in items if not self.database.check_if_is_blocked(x['label'], _type)]
-
-    @logged_function
-    def find_items_to_stage(self, all_items):
-        """Find items in the list not present in database."""
-        items_to_stage = []
-        for jsonitem in all_items:
-            file = jsonitem['file']
-            label = jsonitem['label']
-            _type = jsonitem['type']
-            if self.database.path_exists(file=file):
-                continue
-            if _type == 'movie':
-                items_to_stage.append((file, label, _type))
-            elif _type in ['tvshow', 'episode']:
-                items_to_stage.append(
-                    (file, label, _type, jsonitem['showtitle']))
-        return items_to_stage
-
-    @logged_function
-    def find_paths_to_remove(self, all_paths, _type):
-        """Find paths in database no longer available."""
-        managed_items = self.database.get_content_items(
-            status='managed', _type=_type)
-        return [x.file for x in managed_items if x.file not in all_paths]
-
-    @logged_function
-    def get_movies_in_directory(self, directory):
-        """Get all movies in the directory and tags them."""
-        dir_items = self.filter_blocked_items(
-            list(load_directory_items(
-                progressdialog=None,
-                _path=directory,
-                recursive=True,
-                sync_type='movie'
-            )), _type='movie'
-        )
-        # TODO: this loop aparently not realy work
-        for item in dir_items:
-            # Add tag to items
-            item['type'] = 'movie'
-        return dir_items
-
-    @logged_function
-    def get_single_tvshow(self, directory, showtitle, progressdialog=None):
-        """Get the single TV show in the directory, and tag the items."""
-        show_items = self.filter_blocked_items(
-            list(load_directory_items(
-                progressdialog=progressdialog,
-                _path=directory,
-                recursive=True,
-                sync_type='tvshow'
-            )), _type='episode'
-        )
-        for item in show_items:
-            item['type'] = 'tvshow'
-            item['showtitle'] = showtitle
-        return show_items
-
-    @logged_function
-    def get_tvshows_in_directory(self, directory, progressdialog=None):
-        """Get all TV shows in the directory, and tag the items."""
-        dir_items = self.filter_blocked_items(
-            list(load_directory_items(
-                progressdialog=progressdialog,
-                _path=directory,
-                allow_directories=True,
-                recursive=True,
-                sync_type='tvshow'
-            )), _type='tvshow'
-        )
-        all_items = []
-        # Check every tvshow in list
-        for jsonitem in dir_items:
-            showtitle = jsonitem['label']
-            # Load results if show isn't blocked
-            show_path = jsonitem['file']
-            show_items = self.filter_blocked_items(
-                list(load_directory_items(
-                    progressdialog=None,
-                    _path=show_path,
-                    recursive=True,
-                    sync_type='tvshow'
-                )), _type='episode'
-            )
-            for show_item in show_items:
-                # Add formatted item
-                show_item['type'] = 'tvshow'
-                show_item['showtitle'] = showtitle
-            all_items += show_items
-        return all_items
-
     def options(self, item):
         """Provide options for a single synced directory in a dialog window."""
         # TODO: Remove all from plugin
         # TODO: Rename label
         STR_REMOVE = getstring(32017)
         STR_SYNCED_DIR_OPTIONS = getstring(32085)
+        STR_LISTING_CACHE_TIME = getstring(32189)
+        STR_UPDATE_INTERVAL = getstring(32193)
         STR_BACK = getstring(32011)
-        lines = [STR_REMOVE, STR_BACK]
+        lines = [STR_REMOVE, STR_LISTING_CACHE_TIME, STR_UPDATE_INTERVAL, STR_BACK]
         ret = xbmcgui.Dialog().select(
             '{0} - {1} - {2}'.format(ADDON_NAME,
                                      STR_SYNCED_DIR_OPTIONS, item['label']), lines
@@ -147,10 +67,50 @@ class SyncedMenu(object):
         if ret >= 0:
             if lines[ret] == STR_REMOVE:
                 self.database.delete_dir_from_synced(item['file'])
+            elif lines[ret] == STR_LISTING_CACHE_TIME:
+                self.set_cache_ttl(item)
+            elif lines[ret] == STR_UPDATE_INTERVAL:
+                self.set_update_interval(item)
             elif lines[ret] == STR_BACK:
                 pass
         self.view()
 
+    def set_cache_ttl(self, item):
+        """Choose for how many hours the listings of a synced directory are reused."""
+        STR_LISTING_CACHE_TIME = getstring(32189)
+        STR_DEFAULT_i_HOURS = getstring(32190)
+        STR_i_HOURS = getstring(32191)
+        # None uses the default from settings, 0 disables the cache
+        options = [None, 0, 1, 6, 24, 168]
+        lines = [
+            STR_DEFAULT_i_HOURS % LISTING_CACHE_TTL if x is None else STR_i_HOURS % x
+            for x in options
+        ]
+        ret = xbmcgui.Dialog().select(
+            '{0} - {1} - {2}'.format(ADDON_NAME, STR_LISTING_CACHE_TIME, item['label']),
+            lines,
+            preselect=options.index(item['cache_ttl']) if item['cache_ttl'] in options else 0
+        )
+        if ret >= 0:
+            self.database.set_synced_cache_ttl(item['file'], options[ret])
+
+    def set_update_interval(self, item):
+        """Choose every how many hours a synced directory is updated in background."""
+        STR_UPDATE_INTERVAL = getstring(32193)
+        STR_MANUAL = getstring(32194)
+        STR_i_HOURS = getstring(32191)
+        # None only updates when requested in this menu
+        options = [None, 6, 12, 24, 168, 720]
+        lines = [STR_MANUAL if x is None else STR_i_HOURS % x for x in options]
+        ret = xbmcgui.Dialog().select(
+            '{0} - {1} - {2}'.format(ADDON_NAME, STR_UPDATE_INTERVAL, item['label']),
+            lines,
+            preselect=options.index(item['update_interval'])
+            if item['update_interval'] in options else 0
+        )
+        if ret >= 0:
+            self.database.set_synced_update_interval(item['file'], options[ret])
+
     def remove_all(self):
         """Remove all synced directories."""
         STR_REMOVE_ALL_SYNCED_DIRS = getstring(32086)
@@ -161,19 +121,7 @@ class SyncedMenu(object):
             self.database.delete_all_from_synced()
             notification(STR_ALL_SYNCED_DIRS_REMOVED)
 
-    def remove_paths(self, paths_to_remove):
-        """Remove and delete all items with the given paths."""
-        for file in paths_to_remove:
-            item = self.database.load_item(file)
-            item.remove_from_library()
-            item.delete()
-
-    def stage_items(self, items_to_stage):
-        """Stage all items in the list."""
-        for item in items_to_stage:
-            self.database.add_content_item(*item)
-
-    @logged_function
+    @traced
     def add_single_movie(self, title, year, file):
         """Sync single movie path and stage item."""
         STR_MOVIE_STAGED = getstring(32105)
@@ -198,7 +146,7 @@ class SyncedMenu(object):
             )
             )
 
-    @logged_function
+    @traced
     def add_single_tvshow(self, title, year, file):
         """Sync single tvshow directory and stage items."""
         STR_i_NEW = getstring(32107)
@@ -212,69 +160,47 @@ class SyncedMenu(object):
             file,
             'single-tvshow'
         )
-        # Get everything inside tvshow path
-        files_list = list(load_directory_items(
+        # Get everything inside tvshow path, staged while the crawl goes on
+        files_list = load_directory_items(
             progressdialog=self.progressdialog,
             _path=file,
-            allow_directories=True,
             recursive=True,
             year=year,
             showtitle=title,
-            sync_type='tvshow'
+            sync_type='tvshow',
+            properties=JSON_RPC_PROPERTY_PRESETS['episode']
         )
-        )
-        # Get all items to stage
-        items_to_stage = 0
-        num_already_staged = 0
-        num_already_managed = 0
+        counts = {'staged': 0, 'managed': 0}
         self.progressdialog._update(0, STR_GETTING_ITEMS_IN_DIR)
-        for index, jsonitem in enumerate(files_list):
-            try:
+        known_paths = self.database.get_known_paths()
+        blocked = self.database.blocked_matcher
+
+        def unknown_items():
+            """Yield episodes not in database and not blocked as contentitems."""
+            for jsonitem in files_list:
                 contentitem = build_contentitem(jsonitem)
-                exist_in_db = self.database.path_exists(
-                    file=contentitem['file'])
-                if exist_in_db == ['tvshow', 'staged']:
-                    num_already_staged += 1
+                exist_in_db = known_paths.get(contentitem['file'])
+                if exist_in_db in [['tvshow', 'staged'], ['tvshow', 'managed']]:
+                    counts[exist_in_db[1]] += 1
                     continue
-                elif exist_in_db == ['tvshow', 'managed']:
-                    num_already_managed += 1
+                elif blocked.is_blocked(contentitem['showtitle'], 'episode'):
                     continue
-                elif self.database.check_if_is_blocked(contentitem['showtitle'], 'episode'):
-                    continue
-                self.progressdialog._update(
-                    index / len(files_list),
-                    '\n'.join(
-                        [
-                            title_with_color(
-                                contentitem['showtitle'],
-                                year=contentitem['year']
-                            ),
-                            contentitem['episode_title_with_id']]
-                    )
-                )
-                self.database.add_content_item(contentitem)
-                items_to_stage += 1
-                xbmc.sleep(300)
-            except Exception as e:
-                raise e
-
-        if num_already_staged > 0 or num_already_managed > 0:
+                yield contentitem
+
+        num_staged = stage(unknown_items(), self.database)
+        if counts['staged'] > 0 or counts['managed'] > 0:
             notification(
                 STR_i_NEW_i_STAGED_i_MANAGED %
-                (items_to_stage, num_already_staged, num_already_managed)
+                (num_staged, counts['staged'], counts['managed'])
             )
         else:
-            notification(STR_i_NEW % items_to_stage)
+            notification(STR_i_NEW % num_staged)
 
-    @logged_function
+    @traced
     def add_all_items_in_directory(self, sync_type, dir_label, dir_path):
         """Synchronize all items in a directory (movies/series or all)."""
         # TODO: new notification label to show movies,
         #  TV shows and episodes that have been added
-        contentitem = None
-        content_title = None
-        STR_MOVIE_STAGED = getstring(32165)
-        STR_GETTING_ITEMS_IN_x = getstring(32126)
         STR_i_EPISODES_STAGED = getstring(32112)
         STR_GETTING_ITEMS_IN_DIR = getstring(32125)
         self.progressdialog._create(head=ADDON_NAME)
@@ -285,268 +211,100 @@ class SyncedMenu(object):
                 dir_path,
                 'tvshow'
             )
-            # query json-rpc to get files in directory
+            # query json-rpc to get files in directory, staged while the crawl goes on
             self.progressdialog._update(0, STR_GETTING_ITEMS_IN_DIR)
-            files_list = list(
-                load_directory_items(
-                    progressdialog=self.progressdialog,
-                    _path=dir_path,
-                    allow_directories=True,
-                    recursive=True,
-                    sync_type=sync_type
-                )
+            files_list = load_directory_items(
+                progressdialog=self.progressdialog,
+                _path=dir_path,
+                recursive=True,
+                sync_type=sync_type
             )
-            items_to_stage = 0
-            for index, jsonitem in enumerate(files_list):
-                contentitem = build_contentitem(jsonitem)
-                try:
-                    content_title = contentitem['title']
-                except KeyError:
-                    pass
-
-                try:
-                    content_title = contentitem['showtitle']
-                except KeyError:
-                    pass
-
-                if self.database.check_if_is_blocked(content_title, contentitem['type']):
-                    continue
-                if self.database.path_exists(file=contentitem['file']):
-                    continue
-                # Check for duplicate paths and blocked items
-                try:
-                    self.progressdialog._update(
-                        index / len(files_list),
-                        '\n'.join(
-                            [
-                                STR_GETTING_ITEMS_IN_x % contentitem['showtitle'],
-                                contentitem['episode_title_with_id']
-                            ]
-                        )
-                    )
-                    # try add tvshow
-                    self.database.add_content_item(
-                        contentitem,
+            known_paths = self.database.get_known_paths()
+            blocked = self.database.blocked_matcher
+
+            def unknown_items():
+                """Yield items not in database and not blocked as contentitems."""
+                for jsonitem in files_list:
+                    contentitem = build_contentitem(jsonitem)
+                    content_title = contentitem.get(
+                        'showtitle', contentitem.get('title')
                     )
-                    xbmc.sleep(300)
-                except KeyError:
-                    # TODO: new dialog str to movie
-                    self.progressdialog._update(
-                        index / len(files_list),
-                        STR_MOVIE_STAGED % content_title,
-                    )
-                    # try add movie
-                    self.database.add_content_item(
-                        contentitem,
-                    )
-                    xbmc.sleep(500)
-                items_to_stage += 1
-            notification(STR_i_EPISODES_STAGED % items_to_stage)
+                    # Check for duplicate paths and blocked items
+                    if blocked.is_blocked(content_title, contentitem['type']):
+                        continue
+                    if contentitem['file'] in known_paths:
+                        continue
+                    yield contentitem
+
+            notification(
+                STR_i_EPISODES_STAGED % stage(unknown_items(), self.database)
+            )
         finally:
             self.progressdialog._close()
 
-    def update_all(self):
+    def update(self, _type=None, refresh=False):
         """
-        Get all items from synced directories.
+        Update synced directories with content of _type, or all.
 
-        Find unavailable items to remove from managed and new items to stage.
+        Find unavailable items to remove from managed and new items to stage,
+        with refresh, cached directory listings are requested again.
+        The metrics of the run are stored, see view_sync_runs.
         """
         # TODO: bugfix: single-movies won't actually get removed if they become unavailable
         #       maybe load parent dir and check for path or label?  it would be slower though
-        # TODO: option to only update specified or managed items
-        # TODO: option to add update frequencies for specific directories (i.e. weekly/monthly/etc.)
-        # TODO: better error handling when plugins dont load during update
-        STR_FINDING_ITEMS_TO_REMOVE = getstring(32090)
-        STR_FINDING_ITEMS_TO_ADD = getstring(32092)
-        STR_i_TO_REMOVE_i_TO_STAGE_PROCEED = getstring(32093)
-        STR_REMOVING_ITEMS = getstring(32094)
-        STR_STAGING_ITEMS = getstring(32095)
-        STR_ALL_ITEMS_UPTODATE = getstring(32121)
-        STR_SUCCESS = getstring(32122)
-        self.bgprogressbar._create(ADDON_NAME)
-        try:
-            # Get current items in all directories
-            synced_dirs = self.database.get_synced_dirs()
-            all_items = []
-            for index, diretory in enumerate(synced_dirs):
-                self.bgprogressbar._update(
-                    int(99 * index / len(synced_dirs)),
-                    '{label} - {type}'.format(
-                        label=diretory['label'],
-                        type=diretory.localize_type(
-                        )
-                    )
-                )
-                if diretory['type'] == 'single-movie':
-                    # Directory is just a path to a single movie
-                    all_items.append({
-                        'file': diretory['file'],
-                        'label': diretory['label'],
-                        'type': 'movie'
-                    })
-                elif diretory['type'] == 'single-tvshow':
-                    # Directory is a path to a tv show folder
-                    all_items += self.get_single_tvshow(
-                        diretory['file'],
-                        diretory['label'],
-                        progressdialog=self.bgprogressbar
-                    )
-                elif diretory['type'] == 'movie':
-                    # Directory is a path to list of movies
-                    all_items += self.get_movies_in_directory(
-                        diretory['file'])
-                elif diretory['type'] == 'tvshow':
-                    # Directory is a path to a list of tv shows
-                    all_items += self.get_tvshows_in_directory(
-                        diretory['file'],
-                        self.bgprogressbar
-                    )
-            # Find managed paths not in dir_items, and prepare to remove
-            self.bgprogressbar._update(99, STR_FINDING_ITEMS_TO_REMOVE)
-            all_paths = [x['file'] for x in all_items]
-            paths_to_remove = self.find_paths_to_remove(all_paths)
-            # Find dir_items not in managed_items or staged_items, and prepare to add
-            self.bgprogressbar._update(99, STR_FINDING_ITEMS_TO_ADD)
-            items_to_stage = self.find_items_to_stage(all_items)
-            # Prompt user to remove & stage
-            if paths_to_remove or items_to_stage:
-                if xbmcgui.Dialog().yesno(
-                        ADDON_NAME,
-                        STR_i_TO_REMOVE_i_TO_STAGE_PROCEED % (
-                            len(paths_to_remove),
-                            len(items_to_stage))):
-                    if paths_to_remove:
-                        self.bgprogressbar._update(99, STR_REMOVING_ITEMS)
-                        self.remove_paths(paths_to_remove)
-                    if items_to_stage:
-                        self.bgprogressbar._update(99, STR_STAGING_ITEMS)
-                        self.stage_items(items_to_stage)
-                    # TODO: update/clean managed folder
-                    xbmcgui.Dialog().ok(ADDON_NAME, STR_SUCCESS)
-            else:
-                xbmcgui.Dialog().ok(ADDON_NAME, STR_ALL_ITEMS_UPTODATE)
-        finally:
-            self.bgprogressbar._close()
-
-    def update_movies(self):
-        """Update all synced movie directories."""
-        STR_FINDING_ITEMS_TO_REMOVE = getstring(32090)
-        STR_FINDING_ITEMS_TO_ADD = getstring(32092)
         STR_i_TO_REMOVE_i_TO_STAGE_PROCEED = getstring(32093)
-        STR_REMOVING_ITEMS = getstring(32094)
-        STR_STAGING_ITEMS = getstring(32095)
+        STR_i_DIRS_FAILED = getstring(32196)
         STR_ALL_ITEMS_UPTODATE = getstring(32121)
         STR_SUCCESS = getstring(32122)
         self.bgprogressbar._create(ADDON_NAME)
+        metrics = SyncMetrics(self.database, _type)
+        plan = None
+        applied = False
         try:
-            all_items = []
-            movie_dirs = self.database.get_synced_dirs(synced_type='movie')
-            single_movie_dirs = self.database.get_synced_dirs(
-                synced_type='single-movie')
-            total_num_dirs = len(movie_dirs + single_movie_dirs)
-            for index, synced_dir in enumerate(movie_dirs):
-                self.bgprogressbar._update(
-                    index / total_num_dirs, synced_dir['label']
-                )
-                all_items += self.get_movies_in_directory(synced_dir['file'])
-            for index, synced_dir in enumerate(single_movie_dirs):
-                self.bgprogressbar._update(
-                    (index + len(movie_dirs) / total_num_dirs),
-                    synced_dir['label']
-                )
-                all_items.append({
-                    'file': synced_dir['file'],
-                    'label': synced_dir['label'],
-                    'type': 'movie'
-                })
-            # Find managed paths not in dir_items, and prepare to remove
-            self.bgprogressbar._update(99, STR_FINDING_ITEMS_TO_REMOVE)
-            all_paths = [x['file'] for x in all_items]
-            paths_to_remove = self.find_paths_to_remove(
-                all_paths, _type='movie')
-            # Find dir_items not in managed_items or staged_items, and prepare to add
-            self.bgprogressbar._update(99, STR_FINDING_ITEMS_TO_ADD)
-            items_to_stage = self.find_items_to_stage(all_items)
+            engine = SyncEngine(self.database, self.bgprogressbar)
+            plan = engine.plan(engine.select(_type), _type=_type, refresh=refresh)
+            if plan.failed:
+                notification(STR_i_DIRS_FAILED % len(plan.failed))
             # Prompt user to remove & stage
-            if paths_to_remove or items_to_stage:
+            if plan:
                 if xbmcgui.Dialog().yesno(
                         ADDON_NAME,
                         STR_i_TO_REMOVE_i_TO_STAGE_PROCEED % (
-                            len(paths_to_remove),
-                            len(items_to_stage))):
-                    if paths_to_remove:
-                        self.bgprogressbar._update(99, STR_REMOVING_ITEMS)
-                        self.remove_paths(paths_to_remove)
-                    if items_to_stage:
-                        self.bgprogressbar._update(99, STR_STAGING_ITEMS)
-                        self.stage_items(items_to_stage)
+                            len(plan.to_remove),
+                            plan.new)):
+                    SyncApplier(self.database, self.bgprogressbar).apply(plan)
+                    applied = True
                     # TODO: update/clean managed folder
                     xbmcgui.Dialog().ok(ADDON_NAME, STR_SUCCESS)
             else:
                 xbmcgui.Dialog().ok(ADDON_NAME, STR_ALL_ITEMS_UPTODATE)
         finally:
+            metrics.stop()
+            if plan is not None:
+                metrics.finish(plan, applied)
             self.bgprogressbar._close()
 
-    def update_tvshows(self):
-        """Update all TV show directories."""
-        STR_FINDING_ITEMS_TO_REMOVE = getstring(32090)
-        STR_FINDING_ITEMS_TO_ADD = getstring(32092)
-        STR_i_TO_REMOVE_i_TO_STAGE_PROCEED = getstring(32093)
-        STR_REMOVING_ITEMS = getstring(32094)
-        STR_STAGING_ITEMS = getstring(32095)
-        STR_ALL_ITEMS_UPTODATE = getstring(32121)
-        STR_SUCCESS = getstring(32122)
-        self.bgprogressbar._create(ADDON_NAME)
-        try:
-            all_items = []
-            show_dirs = self.database.get_synced_dirs(synced_type='tvshow')
-            single_show_dirs = self.database.get_synced_dirs(
-                synced_type='single-tvshow')
-            total_num_dirs = len(show_dirs + single_show_dirs)
-            for index, synced_dir in enumerate(show_dirs):
-                self.bgprogressbar._update(
-                    index / total_num_dirs,
-                    synced_dir['label']
-                )
-                all_items += self.get_tvshows_in_directory(
-                    synced_dir['file'],
-                    self.bgprogressbar
-                )
-            for index, synced_dir in enumerate(single_show_dirs):
-                self.bgprogressbar._update(
-                    int(99. * (index + len(show_dirs)) / total_num_dirs),
-                    synced_dir['label']
-                )
-                all_items += self.get_single_tvshow(
-                    synced_dir['file'],
-                    synced_dir['label']
-                )
-            # Find managed paths not in dir_items, and prepare to remove
-            self.bgprogressbar._update(99, STR_FINDING_ITEMS_TO_REMOVE)
-            all_paths = [x['file'] for x in all_items]
-            paths_to_remove = self.find_paths_to_remove(
-                all_paths, _type='tvshow')
-            # Find dir_items not in managed_items or staged_items, and prepare to add
-            self.bgprogressbar._update(99, STR_FINDING_ITEMS_TO_ADD)
-            items_to_stage = self.find_items_to_stage(all_items)
-            # Prompt user to remove & stage
-            if paths_to_remove or items_to_stage:
-                if xbmcgui.Dialog().yesno(ADDON_NAME, STR_i_TO_REMOVE_i_TO_STAGE_PROCEED %
-                                          (len(paths_to_remove), len(items_to_stage))):
-                    if paths_to_remove:
-                        self.bgprogressbar._update(99, STR_REMOVING_ITEMS)
-                        self.remove_paths(paths_to_remove)
-                    if items_to_stage:
-                        self.bgprogressbar._update(99, STR_STAGING_ITEMS)
-                        self.stage_items(items_to_stage)
-                    # TODO: update/clean managed folder
-                    xbmcgui.Dialog().ok(ADDON_NAME, STR_SUCCESS)
-            else:
-                xbmcgui.Dialog().ok(ADDON_NAME, STR_ALL_ITEMS_UPTODATE)
-        finally:
-            self.bgprogressbar._close()
+    @traced
+    def view_sync_runs(self):
+        """Display the last sync runs, a selected run shows its metrics."""
+        STR_SYNC_REPORTS = getstring(32204)
+        STR_NO_SYNC_REPORTS = getstring(32205)
+        runs = self.database.get_sync_runs()
+        if not runs:
+            xbmcgui.Dialog().ok(ADDON_NAME, STR_NO_SYNC_REPORTS)
+            return
+        ret = xbmcgui.Dialog().select(
+            '{0} - {1}'.format(ADDON_NAME, STR_SYNC_REPORTS),
+            [run_label(x) for x in runs]
+        )
+        if ret >= 0:
+            xbmcgui.Dialog().textviewer(
+                '{0} - {1}'.format(ADDON_NAME, STR_SYNC_REPORTS),
+                run_report(runs[ret])
+            )
+            self.view_sync_runs()
 
-    @logged_function
+    @traced
     def view(self):
         """
         Display all synced directories, which are selectable and lead to options.
@@ -554,9 +312,11 @@ class SyncedMenu(object):
         Also provides additional options at bottom of menu.
         """
         STR_UPDATE_ALL = getstring(32081)
+        STR_UPDATE_ALL_REFRESH = getstring(32188)
         STR_UPDATE_TV_SHOWS = getstring(32137)
         STR_UPDATE_MOVIES = getstring(32138)
         STR_REMOVE_ALL = getstring(32082)
+        STR_SYNC_REPORTS = getstring(32204)
         STR_BACK = getstring(32011)
         STOP_CURRENT_UPDATE = 'Stop current update'
         STR_SYNCED_DIRECTORIES = getstring(32128)
@@ -577,9 +337,11 @@ class SyncedMenu(object):
         ]
         lines += [
             STR_UPDATE_ALL,
+            STR_UPDATE_ALL_REFRESH,
             STR_UPDATE_MOVIES,
             STR_UPDATE_TV_SHOWS,
             STOP_CURRENT_UPDATE,
+            STR_SYNC_REPORTS,
             STR_REMOVE_ALL, STR_BACK
             ]
         ret = xbmcgui.Dialog().select(
@@ -592,17 +354,22 @@ class SyncedMenu(object):
                         self.options(directory)
                         break
             elif lines[ret] == STR_UPDATE_ALL:
-                self.update_all()
+                self.update()
+                sys.exit()
+            elif lines[ret] == STR_UPDATE_ALL_REFRESH:
+                self.update(refresh=True)
                 sys.exit()
             elif lines[ret] == STR_UPDATE_MOVIES:
-                self.update_movies()
+                self.update(_type='movie')
                 sys.exit()
             elif lines[ret] == STR_UPDATE_TV_SHOWS:
-                self.update_tvshows()
+                self.update(_type='tvshow')
                 sys.exit()
             elif lines[ret] == STOP_CURRENT_UPDATE:
                 xbmc.executebuiltin('Dialog.isFinished(extendedprogressdialog)')
                 sys.exit()
+            elif lines[ret] == STR_SYNC_REPORTS:
+                self.view_sync_runs()
             elif lines[ret] == STR_REMOVE_ALL:
                 self.remove_all()
             elif lines[ret] == STR_BACK:
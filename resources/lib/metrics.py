@@ -0,0 +1,143 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Metrics of each sync run, stored in sync_runs and shown in SyncedMenu.
+
+They tell where the time of a slow sync goes: requests to plugins (count,
+errors and latency by plugin, from PLUGIN_SCHEDULER), the database
+(statements and commits, counted with a trace callback on the connection)
+or the disk (files, bytes and seconds written, from WRITE_STATS).
+"""
+
+from time import time
+from time import monotonic
+from datetime import datetime
+
+from resources.lib.pluginhost import PLUGIN_SCHEDULER
+from resources.lib.filesystem import WRITE_STATS
+
+
+class SyncMetrics(object):
+    """Count the work of a sync run on database, from its start to finish."""
+
+    def __init__(self, database, _type=None):
+        """__init__ SyncMetrics."""
+        self.database = database
+        self._type = _type
+        self.started = time()
+        self.start = monotonic()
+        self.seconds = None
+        self.statements = 0
+        self.commits = 0
+        self._plugins = PLUGIN_SCHEDULER.snapshot()
+        self._writes = dict(WRITE_STATS)
+        self.database.conn.set_trace_callback(self._statement)
+
+    def _statement(self, statement):
+        """Count a statement executed by the connection, called by sqlite."""
+        self.statements += 1
+        if statement.startswith('COMMIT'):
+            self.commits += 1
+
+    def plugins(self):
+        """Return the requests, errors and latency (seconds) of each plugin since start."""
+        plugins = dict()
+        for name, (requests, errors, total) in PLUGIN_SCHEDULER.snapshot().items():
+            before = self._plugins.get(name, (0, 0, 0.))
+            if requests == before[0]:
+                continue
+            plugins[name] = {
+                'requests': requests - before[0],
+                'errors': errors - before[1],
+                'seconds': total - before[2],
+            }
+        return plugins
+
+    def stop(self):
+        """Stop counting database statements and the time of the run, if not stopped yet."""
+        self.database.conn.set_trace_callback(None)
+        if self.seconds is None:
+            self.seconds = monotonic() - self.start
+
+    def finish(self, plan, applied=False):
+        """Stop counting, store the metrics of the run of plan and return them."""
+        self.stop()
+        metrics = {
+            'started': self.started,
+            'type': self._type or 'all',
+            'applied': applied,
+            'seconds': self.seconds,
+            'phases': dict(plan.timings),
+            'directories': plan.directories,
+            'crawled': plan.crawled,
+            'failed': len(plan.failed),
+            'seen': plan.seen,
+            'duplicates': plan.duplicate_urls + plan.duplicate_items,
+            'blocked': plan.blocked,
+            'unchanged': plan.unchanged,
+            # background updates stage items while crawling
+            'to_stage': plan.new + plan.staged,
+            'to_remove': len(plan.to_remove),
+            'plugins': self.plugins(),
+            'statements': self.statements,
+            'commits': self.commits,
+            'files': WRITE_STATS['files'] - self._writes['files'],
+            'bytes': WRITE_STATS['bytes'] - self._writes['bytes'],
+            'write_seconds': WRITE_STATS['seconds'] - self._writes['seconds'],
+        }
+        self.database.add_sync_run(self.started, self._type, metrics)
+        return metrics
+
+
+def run_label(metrics):
+    """Return a line with the date, type and result of a sync run, used in lists."""
+    return '%s - %s - %.1fs - %s staged, %s removed%s' % (
+        datetime.fromtimestamp(metrics['started']).strftime('%Y-%m-%d %H:%M'),
+        metrics['type'],
+        metrics['seconds'],
+        metrics['to_stage'] if metrics['applied'] else 0,
+        metrics['to_remove'] if metrics['applied'] else 0,
+        ', %s failed' % metrics['failed'] if metrics['failed'] else ''
+    )
+
+
+def run_report(metrics):
+    """Return the metrics of a sync run as text, split by plugins, database and disk."""
+    requests = sum(x['requests'] for x in metrics['plugins'].values())
+    lines = [
+        run_label(metrics),
+        '',
+        '[B]Phases[/B]',
+    ]
+    lines.extend(
+        '    %s: %.2fs' % (key, val) for key, val in metrics['phases'].items()
+    )
+    lines.extend([
+        '[B]Items[/B]',
+        '    %s synced directories, %s directories crawled, %s failed' % (
+            metrics['directories'], metrics['crawled'], metrics['failed']
+        ),
+        '    %s seen, %s duplicates, %s blocked, %s unchanged' % (
+            metrics['seen'], metrics['duplicates'], metrics['blocked'], metrics['unchanged']
+        ),
+        '    %s to stage, %s to remove, %s' % (
+            metrics['to_stage'], metrics['to_remove'],
+            'applied' if metrics['applied'] else 'not applied'
+        ),
+        '[B]Plugins[/B] (%s requests)' % requests,
+    ])
+    lines.extend(
+        '    %s: %s requests, %s errors, %.2fs total, %.3fs mean' % (
+            name, x['requests'], x['errors'], x['seconds'], x['seconds'] / x['requests']
+        ) for name, x in sorted(metrics['plugins'].items())
+    )
+    lines.extend([
+        '[B]Database[/B]',
+        '    %s statements, %s commits' % (metrics['statements'], metrics['commits']),
+        '[B]Disk[/B]',
+        '    %s files, %.1f KB, %.2fs' % (
+            metrics['files'], metrics['bytes'] / 1024., metrics['write_seconds']
+        ),
+    ])
+    return '\n'.join(lines)
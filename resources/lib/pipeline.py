@@ -0,0 +1,124 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Generator stages to stream items from plugin directories to the database.
+
+Stages are chained as crawl -> filter -> dedup -> diff -> stage, each one
+consumes the previous lazily, so only one batch of items is held at a time
+and items are staged while the crawler is still fetching directories.
+"""
+
+from itertools import islice
+
+from resources.lib import build_contentitem
+
+from resources.lib.utils import plugin_id
+from resources.lib.utils import normalize_url
+
+from resources.lib.manipulator import CLEANER
+
+# Max number of items held by a stage before they are written to database
+PIPELINE_BATCH_SIZE = 500
+
+
+def batched(iterable, size=PIPELINE_BATCH_SIZE):
+    """Yield lists with up to size items of iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def filter_blocked(items, matcher, _type, on_blocked=None, key='label'):
+    """Yield items whose key (label) is not blocked as _type, calling on_blocked with the others."""
+    for item in items:
+        if not matcher.is_blocked(item.get(key), _type):
+            yield item
+        elif on_blocked:
+            on_blocked(item)
+
+
+def tag_items(items, **fields):
+    """Yield items with fields set, i.e. the type or showtitle of a synced directory."""
+    for item in items:
+        item.update(fields)
+        yield item
+
+
+class Deduplicator(object):
+    """
+    Drop items already found in another directory, i.e. in overlapping synced directories.
+
+    Items are the same if their normalized URLs are equal or, for items with
+    different URLs, if they have the same plugin, cleaned title, year and,
+    for episodes, season and episode, as they would be written to the same
+    file in library.
+    """
+
+    def __init__(self):
+        """__init__ Deduplicator."""
+        self.urls = set()
+        self.keys = set()
+        self.same_url = 0
+        self.same_item = 0
+
+    @staticmethod
+    def key(item):
+        """Return the secondary key of item, or None if it lacks the needed fields."""
+        if item['type'] == 'tvshow':
+            if item.get('season') is None or item.get('episode') is None:
+                return None
+            title = item.get('showtitle')
+            number = 'S%02dE%02d' % (int(item['season']), int(item['episode']))
+        else:
+            title = item.get('title')
+            number = None
+        if not title:
+            return None
+        return (
+            plugin_id(item['file']),
+            CLEANER.showtitle(title).lower(),
+            item.get('year'),
+            number
+        )
+
+    def filter(self, items):
+        """Yield items not yielded before, counting the duplicates."""
+        for item in items:
+            url = normalize_url(item['file'])
+            if url in self.urls:
+                self.same_url += 1
+                continue
+            key = self.key(item)
+            if key is not None and key in self.keys:
+                self.same_item += 1
+                continue
+            self.urls.add(url)
+            if key is not None:
+                self.keys.add(key)
+            yield item
+
+
+def new_contentitems(items, known_paths):
+    """
+    Yield items with paths not in known_paths built as contentitems.
+
+    Yielded paths are added to known_paths, so an item found in two
+    directories is only yielded once.
+    """
+    for item in items:
+        if item['file'] in known_paths or item['type'] not in ['movie', 'tvshow']:
+            continue
+        known_paths[item['file']] = [item['type'], 'staged']
+        yield build_contentitem(item)
+
+
+def stage(contentitems, database, size=PIPELINE_BATCH_SIZE):
+    """Stage contentitems in database by batch, return the number of staged items."""
+    staged = 0
+    for batch in batched(contentitems, size):
+        staged += database.add_content_items(batch)
+    return staged
@@ -0,0 +1,259 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Per plugin scheduling of JSON-RPC requests.
+
+Each plugin (plugin://plugin.video.x) gets its own PluginHost, with an
+adaptive concurrency limit, a circuit breaker and latency statistics, so a
+slow or failing plugin only slows down the requests sent to itself.
+"""
+
+import random
+
+from time import monotonic
+from threading import Lock
+from threading import Condition
+from collections import deque
+
+import xbmc  # pylint: disable=import-error
+
+from resources import PLUGIN_RATE_LIMIT
+
+from resources.lib.log import log_msg
+
+from resources.lib.utils import plugin_id
+from resources.lib.utils import JSONRPCError
+
+from resources.lib.throttle import RateLimiter
+
+# Concurrent requests per plugin, the limit starts low and grows while requests succeed
+PLUGIN_MIN_CONCURRENCY = 1
+PLUGIN_INITIAL_CONCURRENCY = 2
+PLUGIN_MAX_CONCURRENCY = 8
+
+# Seconds after which a request halves the concurrency limit, even if it succeeds
+PLUGIN_SLOW_REQUEST = 30
+
+# Retries of a retryable error, after a jittered exponential backoff (seconds)
+PLUGIN_RETRIES = 2
+PLUGIN_BACKOFF = 1.
+PLUGIN_MAX_BACKOFF = 30.
+
+# Consecutive errors that open the circuit of a plugin, and seconds until it is tried again
+CIRCUIT_FAILURES = 5
+CIRCUIT_COOLDOWN = 120
+
+# Number of recent latencies kept for percentiles
+LATENCY_SAMPLES = 200
+
+
+class PluginUnavailable(JSONRPCError):
+    """Request not sent because the circuit of the plugin is open."""
+
+
+class LatencyStats(object):
+    """Count, errors and latency (seconds) of the requests to a plugin."""
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        """__init__ LatencyStats."""
+        self.requests = 0
+        self.errors = 0
+        self.total = 0.
+        self.max = 0.
+        self.recent = deque(maxlen=samples)
+
+    def add(self, latency, error=False):
+        """Add the latency of a request."""
+        self.requests += 1
+        self.errors += bool(error)
+        self.total += latency
+        self.max = max(self.max, latency)
+        self.recent.append(latency)
+
+    @property
+    def mean(self):
+        """Return the mean latency of all requests."""
+        return self.total / self.requests if self.requests else 0.
+
+    def percentile(self, perc):
+        """Return the latency percentile (0 to 100) of the recent requests."""
+        if not self.recent:
+            return 0.
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(perc / 100. * len(values)))]
+
+    def __str__(self):
+        """Return a summary of the statistics, used in logs."""
+        return '%s requests, %s errors, mean %.2fs, p50 %.2fs, p95 %.2fs, max %.2fs' % (
+            self.requests,
+            self.errors,
+            self.mean,
+            self.percentile(50),
+            self.percentile(95),
+            self.max
+        )
+
+
+class CircuitBreaker(object):
+    """
+    Stop requests to a plugin after consecutive failures.
+
+    After cooldown seconds a single request is allowed (half open),
+    the circuit closes if it succeeds and opens again if it fails.
+    Not thread safe, used under the lock of a PluginHost.
+    """
+
+    def __init__(self, failures=CIRCUIT_FAILURES, cooldown=CIRCUIT_COOLDOWN):
+        """__init__ CircuitBreaker."""
+        self.failures = failures
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened = None
+        self._trial = False
+
+    @property
+    def is_open(self):
+        """Return True if requests are being refused."""
+        return self._opened is not None
+
+    def allow(self):
+        """Return True if a request can be sent."""
+        if self._opened is None:
+            return True
+        if not self._trial and monotonic() - self._opened >= self.cooldown:
+            self._trial = True
+            return True
+        return False
+
+    def success(self):
+        """Close the circuit."""
+        self._failures = 0
+        self._opened = None
+        self._trial = False
+
+    def failure(self):
+        """Count a failure, opening the circuit after too many or if the trial request failed."""
+        self._failures += 1
+        if self._trial or self._failures >= self.failures:
+            self._opened = monotonic()
+            self._trial = False
+
+
+class PluginHost(object):
+    """
+    Concurrency limit, circuit breaker and latency statistics of a single plugin.
+
+    The limit is adapted AIMD-style: it grows by one for each limit requests
+    that succeed (additive increase), and is halved by each error or slow
+    request (multiplicative decrease).
+    """
+
+    def __init__(self, name):
+        """__init__ PluginHost."""
+        self.name = name
+        self.limit = float(PLUGIN_INITIAL_CONCURRENCY)
+        self.in_flight = 0
+        self.stats = LatencyStats()
+        self.breaker = CircuitBreaker()
+        self._cond = Condition()
+
+    def acquire(self):
+        """Wait for a free request slot, raise PluginUnavailable if the circuit is open."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            if not self.breaker.allow():
+                raise PluginUnavailable(
+                    '%s unavailable after %s consecutive errors' % (
+                        self.name, self.breaker.failures
+                    )
+                )
+            self.in_flight += 1
+
+    def release(self, latency, error=False):
+        """Free a request slot, adapting the limit to the result of the request."""
+        with self._cond:
+            self.in_flight -= 1
+            self.stats.add(latency, error)
+            if error:
+                self.breaker.failure()
+            else:
+                self.breaker.success()
+            if error or latency >= PLUGIN_SLOW_REQUEST:
+                self.limit = max(PLUGIN_MIN_CONCURRENCY, self.limit / 2)
+            else:
+                self.limit = min(PLUGIN_MAX_CONCURRENCY, self.limit + 1. / self.limit)
+            self._cond.notify_all()
+
+
+def backoff(attempt):
+    """Return the seconds to wait before retry number attempt (from 0), with jitter."""
+    return random.uniform(0.5, 1.) * min(PLUGIN_MAX_BACKOFF, PLUGIN_BACKOFF * 2 ** attempt)
+
+
+class PluginScheduler(object):
+    """Send requests through the PluginHost of their plugin, retrying retryable errors."""
+
+    def __init__(self, rate_limit=0, retries=PLUGIN_RETRIES):
+        """__init__ PluginScheduler."""
+        self.hosts = dict()
+        self.retries = retries
+        self.rate_limiter = RateLimiter(rate_limit)
+        self._lock = Lock()
+
+    def host(self, path):
+        """Return the PluginHost of the plugin of path."""
+        name = plugin_id(path)
+        with self._lock:
+            if name not in self.hosts:
+                self.hosts[name] = PluginHost(name)
+            return self.hosts[name]
+
+    def call(self, path, func, *args):
+        """Return func(*args), a request to the plugin of path."""
+        host = self.host(path)
+        attempt = 0
+        while True:
+            host.acquire()
+            self.rate_limiter.wait(host.name)
+            start = monotonic()
+            try:
+                result = func(*args)
+            except JSONRPCError as error:
+                host.release(monotonic() - start, error=True)
+                if not error.retryable or attempt >= self.retries:
+                    raise
+                wait = backoff(attempt)
+                log_msg(
+                    'Retrying %s in %.1fs: %s' % (path, wait, error),
+                    xbmc.LOGWARNING
+                )
+                xbmc.sleep(int(1000 * wait))
+                attempt += 1
+                continue
+            except Exception:
+                host.release(monotonic() - start, error=True)
+                raise
+            host.release(monotonic() - start)
+            return result
+
+    def snapshot(self):
+        """Return the requests, errors and total latency of each plugin so far, by plugin id."""
+        with self._lock:
+            hosts = list(self.hosts.values())
+        return {x.name: (x.stats.requests, x.stats.errors, x.stats.total) for x in hosts}
+
+    def summary(self):
+        """Return the latency statistics of each plugin, used in logs."""
+        with self._lock:
+            hosts = list(self.hosts.values())
+        return '\n'.join(
+            '%s (limit %s%s): %s' % (
+                x.name, int(x.limit), ', open' if x.breaker.is_open else '', x.stats
+            ) for x in hosts
+        )
+
+
+# Shared by all crawlers, so limits and statistics are per plugin across workers
+PLUGIN_SCHEDULER = PluginScheduler(rate_limit=PLUGIN_RATE_LIMIT / 1000.)
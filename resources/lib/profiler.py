@@ -0,0 +1,77 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+cProfile of entrypoints, enabled by the profiling setting (a development option).
+
+Each profiled run longer than PROFILE_MIN_SECONDS writes a .prof file, to
+open with pstats or snakeviz, and a .txt file with the PROFILE_TOP functions
+by cumulative time, into the profiles folder of the addon data folder.
+Only the thread of the entrypoint is profiled, not the crawler workers,
+their requests show as time waiting for results.
+"""
+
+import os
+import pstats
+import cProfile
+
+from time import strftime
+from time import monotonic
+from contextlib import contextmanager
+
+import xbmcvfs  # pylint: disable=import-error
+
+from resources import ADDON_ID
+from resources import PROFILING
+from resources import PROFILE_MIN_SECONDS
+
+from resources.lib.log import log_msg
+
+PROFILE_FOLDER = 'special://userdata/addon_data/{}/profiles/'.format(ADDON_ID)
+# Functions in the text summary of a profile
+PROFILE_TOP = 40
+# Profiles kept in the folder, older ones are removed when a profile is saved
+PROFILES_KEPT = 20
+
+
+def save_profile(profile, name, elapsed, folder=None):
+    """Write profile of a run of name that took elapsed seconds, return the path without extension."""
+    folder = folder or xbmcvfs.translatePath(PROFILE_FOLDER)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    path = os.path.join(folder, '%s-%s' % (strftime('%Y%m%d-%H%M%S'), name))
+    profile.dump_stats(path + '.prof')
+    with open(path + '.txt', 'w') as summary:
+        summary.write('%s: %.2fs\n' % (name, elapsed))
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(PROFILE_TOP)
+    # names start with the date, so the oldest sort first
+    profiles = sorted(x for x in os.listdir(folder) if x.endswith('.prof'))
+    for old in profiles[:-PROFILES_KEPT]:
+        for extension in ['.prof', '.txt']:
+            old_path = os.path.join(folder, old[:-len('.prof')] + extension)
+            if os.path.exists(old_path):
+                os.remove(old_path)
+    return path
+
+
+@contextmanager
+def profiled(name):
+    """Profile the block if PROFILING, and save it if it took PROFILE_MIN_SECONDS or more."""
+    if not PROFILING:
+        yield
+        return
+    profile = cProfile.Profile()
+    start = monotonic()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        elapsed = monotonic() - start
+        if elapsed >= PROFILE_MIN_SECONDS:
+            try:
+                log_msg('Profile of %s saved in %s' % (
+                    name, save_profile(profile, name, elapsed)
+                ))
+            except (IOError, OSError) as error:
+                log_msg('Failed to save profile of %s: %s' % (name, error))
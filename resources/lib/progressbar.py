@@ -4,12 +4,15 @@
 
 import sys
 
-import xbmc # pylint: disable=import-error
 import xbmcgui # pylint: disable=import-error
 
 from resources import ADDON_NAME
 from resources.lib.log import log_msg
 from resources.lib.utils import notification
+from resources.lib.throttle import Throttle
+
+# Min interval in seconds between two redraws of a progress dialog
+PROGRESS_REFRESH_INTERVAL = 0.25
 
 
 class ProgressBar(xbmcgui.DialogProgress):
@@ -18,6 +21,7 @@ class ProgressBar(xbmcgui.DialogProgress):
     def __init__(self):
         """ProgressBar __init__."""
         super(ProgressBar, self).__init__()
+        self.throttle = Throttle(PROGRESS_REFRESH_INTERVAL)
         log_msg("""ProgressBar __init__.""")
 
     def _create(self, head=ADDON_NAME, msg=''):
@@ -28,8 +32,9 @@ class ProgressBar(xbmcgui.DialogProgress):
         """Method to update ProgressBar window."""
         if self.iscanceled():
             self._iscanceled_close()
-        self.update(int(100 * perc), msg)
-        xbmc.sleep(200)
+        # Skip redraws that would not be noticed, always show the end
+        if self.throttle.ready(force=perc >= 1):
+            self.update(int(100 * perc), msg)
 
     def _iscanceled_close(self):
         """Close method to close progress by cancel button."""
@@ -49,6 +54,7 @@ class BGProgressBar(xbmcgui.DialogProgressBG):
     def __init__(self):
         """BGProgressBar __init__."""
         super(BGProgressBar, self).__init__()
+        self.throttle = Throttle(PROGRESS_REFRESH_INTERVAL)
         log_msg("""BGProgressBar __init__.""")
 
     def _create(self, head=ADDON_NAME, msg=''):
@@ -58,9 +64,10 @@ class BGProgressBar(xbmcgui.DialogProgressBG):
     def _update(self, perc, msg):
         """Method to update BGProgressBar window."""
         if self.isFinished():
-            xbmc.sleep(100)
-            self._isFinished_close()
-        self.update(int(perc), msg)
+            self._isfinished_close()
+        # Skip redraws that would not be noticed, always show the end
+        if self.throttle.ready(force=perc >= 99):
+            self.update(int(perc), msg)
 
     def _isfinished_close(self):
         """Close method to close progress by cancel button."""
@@ -0,0 +1,273 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Rules to classify the items of plugin directories by provider.
+
+A provider is picked once per directory from its plugin id. Its rules are
+declarative and tried in order for each item that is not a movie file; the
+first rule whose conditions match changes the item and tells its position
+in the reordered directory. To support a new provider, add it to PROVIDERS.
+
+Rule keys, all optional except filetype and position:
+    filetype: 'directory' or 'file'
+    type: Kodi types the item can have
+    equal, not_equal: {key: value} the item must or must not have
+    file, not_file: pattern that the item file must or must not contain
+    is_season: if the label must (True) or must not (False) look like a season
+    set: {key: value} set in the item
+    showtitle: 'parent', 'label' or 'title', the value used as showtitle
+    delete: keys removed from the item
+    first_season: season 0 becomes 1
+    year: collect the item year, the lower year is used for all items
+    renumber: the episode number is the position in the directory
+    position: 'number' (position in the directory), 'season' or 'episode'
+"""
+
+import re
+
+# Labels of season directories, i.e. "Season 1", "Temporada 1" or "S1"
+SEASON_LABEL = re.compile(r'season|temporada|S\d{1,4}', re.I)
+
+PROVIDERS = [
+    {
+        'name': 'crunchyroll',
+        'rules': [
+            # show directory
+            {
+                'filetype': 'directory',
+                'type': ['tvshow', 'unknown'],
+                'file': r'mode\=series',
+                'set': {'type': 'tvshow'},
+                'delete': ['episode', 'season', 'title'],
+                'position': 'number',
+            },
+            # season directory
+            {
+                'filetype': 'directory',
+                'type': ['unknown'],
+                'not_file': r'mode\=series|episode\=',
+                'set': {'type': 'season'},
+                'showtitle': 'parent',
+                'delete': ['episode'],
+                'first_season': True,
+                'year': True,
+                'position': 'number',
+            },
+            # episode file
+            {
+                'filetype': 'file',
+                'file': r'episode\=',
+                'set': {'type': 'episode'},
+                'first_season': True,
+                'year': True,
+                'position': 'number',
+            },
+        ],
+    },
+    {
+        'name': 'amazon',
+        'rules': [
+            # show directory
+            {
+                'filetype': 'directory',
+                'type': ['tvshow', 'unknown'],
+                'equal': {'episode': -1},
+                'is_season': False,
+                'set': {'type': 'tvshow'},
+                'showtitle': 'label',
+                'delete': ['episode', 'season'],
+                'position': 'number',
+            },
+            # season directory
+            {
+                'filetype': 'directory',
+                'is_season': True,
+                'set': {'type': 'season'},
+                'showtitle': 'parent',
+                'delete': ['episode', 'number'],
+                'year': True,
+                'position': 'season',
+            },
+            # episode file
+            {
+                'filetype': 'file',
+                'type': ['episode'],
+                'not_equal': {'episode': -1, 'season': -1},
+                'year': True,
+                'position': 'episode',
+            },
+        ],
+    },
+    {
+        'name': 'disney',
+        'rules': [
+            # show directory
+            {
+                'filetype': 'directory',
+                'type': ['tvshow'],
+                'equal': {'season': -1},
+                'is_season': False,
+                'set': {'type': 'tvshow'},
+                'showtitle': 'title',
+                'delete': ['episode', 'season'],
+                'position': 'number',
+            },
+            # season directory
+            {
+                'filetype': 'directory',
+                'type': ['unknown'],
+                'is_season': True,
+                'set': {'type': 'season'},
+                'showtitle': 'parent',
+                'delete': ['episode'],
+                'year': True,
+                'position': 'season',
+            },
+            # episode file
+            {
+                'filetype': 'file',
+                'type': ['episode'],
+                'year': True,
+                'position': 'episode',
+            },
+        ],
+    },
+    {
+        'name': 'netflix',
+        'rules': [
+            # show directory
+            {
+                'filetype': 'directory',
+                'type': ['tvshow'],
+                'not_file': r'season|episode',
+                'delete': ['episode', 'season'],
+                'position': 'number',
+            },
+            # season directory
+            {
+                'filetype': 'directory',
+                'type': ['unknown'],
+                'file': r'show|season',
+                'not_file': r'episode',
+                'is_season': True,
+                'set': {'type': 'season'},
+                'showtitle': 'parent',
+                'delete': ['episode'],
+                'year': True,
+                'position': 'season',
+            },
+            # episode file
+            {
+                'filetype': 'file',
+                'type': ['episode'],
+                'file': r'show|season|episode',
+                'year': True,
+                'renumber': True,
+                'position': 'number',
+            },
+        ],
+    },
+]
+
+
+class Rule(object):
+    """A rule of PROVIDERS with its patterns compiled."""
+
+    def __init__(self, rule):
+        """__init__ Rule."""
+        self.filetype = rule['filetype']
+        self.types = frozenset(rule['type']) if 'type' in rule else None
+        self.equal = list(rule.get('equal', dict()).items())
+        self.not_equal = list(rule.get('not_equal', dict()).items())
+        self.file = re.compile(rule['file'], re.I) if 'file' in rule else None
+        self.not_file = re.compile(rule['not_file'], re.I) if 'not_file' in rule else None
+        self.is_season = rule.get('is_season')
+        self.set = list(rule.get('set', dict()).items())
+        self.showtitle = rule.get('showtitle')
+        self.delete = rule.get('delete', [])
+        self.first_season = rule.get('first_season', False)
+        self.year = rule.get('year', False)
+        self.renumber = rule.get('renumber', False)
+        self.position = rule['position']
+
+    def match(self, item):
+        """Return True if item fulfills the conditions, except filetype and type."""
+        for key, value in self.equal:
+            if item.get(key) != value:
+                return False
+        for key, value in self.not_equal:
+            if item.get(key) == value:
+                return False
+        if self.file and not self.file.search(item['file']):
+            return False
+        if self.not_file and self.not_file.search(item['file']):
+            return False
+        if self.is_season is not None:
+            if bool(SEASON_LABEL.search(item['label'])) is not self.is_season:
+                return False
+        return True
+
+    def apply(self, item, showtitle, years):
+        """
+        Change item, collect its year in years and return its position (from 1).
+
+        Items only have the properties requested, see JSON_RPC_PROPERTY_PRESETS,
+        so None is returned if the position is missing.
+        """
+        for key, value in self.set:
+            item[key] = value
+        if self.showtitle == 'parent':
+            item['showtitle'] = showtitle
+        elif self.showtitle:
+            item['showtitle'] = item.get(self.showtitle)
+        if self.first_season and item.get('season') == 0:
+            item['season'] = 1
+        if self.year and 'year' in item:
+            years.append(item['year'])
+        if self.renumber:
+            item['episode'] = item['number']
+        position = item.get(self.position)
+        for key in self.delete:
+            item.pop(key, None)
+        return position
+
+
+class Provider(object):
+    """Rules of a provider, indexed by filetype and type of the items they apply to."""
+
+    def __init__(self, provider):
+        """__init__ Provider."""
+        self.name = provider['name']
+        self.rules = [Rule(x) for x in provider['rules']]
+        self._candidates = dict()
+
+    def candidates(self, filetype, _type):
+        """Return the rules that can apply to items of filetype and _type, in order."""
+        key = (filetype, _type)
+        if key not in self._candidates:
+            self._candidates[key] = [
+                x for x in self.rules
+                if x.filetype == filetype and (x.types is None or _type in x.types)
+            ]
+        return self._candidates[key]
+
+    def classify(self, item, showtitle, years):
+        """Apply the first matching rule to item and return its position, or None."""
+        for rule in self.candidates(item['filetype'], item['type']):
+            if rule.match(item):
+                return rule.apply(item, showtitle, years)
+        return None
+
+
+_PROVIDERS = [Provider(x) for x in PROVIDERS]
+_PROVIDER_BY_PLUGIN = dict()
+
+
+def get_provider(plugin):
+    """Return the Provider of a plugin id, i.e. plugin.video.netflix, or None."""
+    if plugin not in _PROVIDER_BY_PLUGIN:
+        _PROVIDER_BY_PLUGIN[plugin] = next(
+            (x for x in _PROVIDERS if x.name in plugin), None
+        )
+    return _PROVIDER_BY_PLUGIN[plugin]
@@ -0,0 +1,134 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Defines the SyncScheduler, that updates synced directories in background."""
+
+import heapq
+
+from time import time
+from threading import Thread
+
+import xbmc  # pylint: disable=import-error
+import xbmcaddon  # pylint: disable=import-error
+
+from resources.lib.log import log_msg
+from resources.lib.trace import dump
+from resources.lib.database import Database
+from resources.lib.sync import SyncEngine
+from resources.lib.metrics import SyncMetrics
+
+# Max seconds between two checks of the schedule and abort requests
+CHECK_INTERVAL = 60
+
+
+class SyncScheduler(Thread):
+    """
+    Thread that updates each synced directory when its update interval is due.
+
+    Directories are kept in a priority queue ordered by due time, only the
+    first one is checked, and updates only start while nothing is playing
+    and Kodi has been idle for the minutes of the service_idle_time setting.
+    The queue is rebuilt on each check, as intervals are set by the addon
+    in another process, and an update stops when playback starts or Kodi
+    exits, to be retried in the next check.
+    """
+
+    def __init__(self, monitor):
+        """__init__ SyncScheduler."""
+        super(SyncScheduler, self).__init__(name='SyncScheduler')
+        self.monitor = monitor
+        self.player = xbmc.Player()
+        self.queue = []
+        self._reload = True
+
+    def reload(self):
+        """Rebuild the queue from database before the next check, i.e. after settings change."""
+        self._reload = True
+
+    def load(self, database):
+        """Fill the queue with (due time, file) of every directory with an update interval."""
+        self.queue = [
+            (x.next_update, x['file']) for x in database.get_synced_dirs()
+            if x.next_update is not None
+        ]
+        heapq.heapify(self.queue)
+        self._reload = False
+        # rebuilt on each check, only logged in debug
+        log_msg('SyncScheduler: %s directories scheduled' % len(self.queue), xbmc.LOGDEBUG)
+
+    def is_idle(self):
+        """Return True if nothing is playing and user is idle long enough."""
+        if self.player.isPlaying():
+            return False
+        # A new Addon reads the current settings, they can change while the service runs
+        idle_time = int(xbmcaddon.Addon().getSetting('service_idle_time') or 0)
+        return xbmc.getGlobalIdleTime() >= idle_time * 60
+
+    def interrupted(self):
+        """Return the reason to stop a running update, or None."""
+        if self.monitor.abortRequested():
+            return 'Kodi is exiting'
+        if self.player.isPlaying():
+            return 'playback started'
+        return None
+
+    def update(self, database, file):
+        """Update a single synced directory and schedule its next update."""
+        for directory in database.get_synced_dirs():
+            if directory['file'] == file:
+                break
+        else:
+            # Removed since the queue was loaded
+            return
+        if directory.next_update is None or directory.next_update > time():
+            # Changed since the queue was loaded
+            self.reload()
+            return
+        # blocked can be changed by the addon, in another process, between updates
+        database.reset_caches()
+        metrics = SyncMetrics(database, directory['type'])
+        plan = None
+        try:
+            plan = SyncEngine(database).sync_directory(directory, stop=self.interrupted)
+            log_msg(
+                'SyncScheduler: %s new items staged from %s' % (plan.staged, directory['label'])
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            # A plugin failing must not stop the service, retry in the next interval
+            log_msg(
+                'SyncScheduler: update of %s failed: %s' % (directory['label'], error),
+                xbmc.LOGERROR
+            )
+        finally:
+            metrics.stop()
+            if plan is not None:
+                metrics.finish(plan, applied=True)
+            dump('service')
+        interrupted = self.interrupted()
+        if interrupted:
+            # still due, so it is updated again in the next check
+            log_msg('SyncScheduler: update of %s stopped, %s' % (directory['label'], interrupted))
+            return
+        database.set_synced_last_update(file, time())
+        directory['last_update'] = time()
+        heapq.heappush(self.queue, (directory.next_update, file))
+
+    def run(self):
+        """Thread loop, until Kodi requests abort."""
+        # sqlite connections can only be used by the thread that created them
+        database = Database()
+        while not self.monitor.abortRequested():
+            if self._reload:
+                self.load(database)
+            if not self.queue:
+                wait = CHECK_INTERVAL
+            elif self.queue[0][0] > time():
+                wait = min(CHECK_INTERVAL, self.queue[0][0] - time())
+            elif not self.is_idle():
+                wait = CHECK_INTERVAL
+            else:
+                self.update(database, heapq.heappop(self.queue)[1])
+                continue
+            if self.monitor.waitForAbort(wait):
+                break
+            self.reload()
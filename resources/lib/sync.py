@@ -0,0 +1,544 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Defines the SyncEngine, that compares synced directories with the database.
+
+An update is split in two steps: SyncEngine.plan only reads plugins and
+returns a SyncPlan, without dialogs or changes to library, and SyncApplier
+executes a plan in bulk, so a plan can be computed in background, confirmed
+by the user and measured by its timings.
+"""
+
+from time import time
+from time import monotonic
+
+from resources.lib import build_contentitem
+from resources.lib import build_contentmanager
+
+from resources.lib.log import log_msg
+from resources.lib.trace import span
+from resources.lib.trace import traced
+from resources.lib.trace import traced_iter
+
+from resources.lib.utils import getstring
+from resources.lib.utils import JSON_RPC_PROPERTY_PRESETS
+
+from resources.lib.crawler import CrawlBudget
+from resources.lib.crawler import load_directory_items
+
+from resources.lib.pluginhost import PLUGIN_SCHEDULER
+
+from resources.lib.pipeline import stage
+from resources.lib.pipeline import PIPELINE_BATCH_SIZE
+from resources.lib.pipeline import batched
+from resources.lib.pipeline import tag_items
+from resources.lib.pipeline import Deduplicator
+from resources.lib.pipeline import filter_blocked
+from resources.lib.pipeline import new_contentitems
+
+# Synced directory types updated with each type of content
+SYNCED_TYPES = {
+    'movie': ['movie', 'single-movie'],
+    'tvshow': ['tvshow', 'single-tvshow'],
+}
+
+# Max age in seconds of an interrupted sync that is resumed, older ones start again
+SYNC_CHECKPOINT_MAX_AGE = 24 * 3600
+
+
+class SyncPlan(object):
+    """
+    Changes needed to make the database match a selection of synced directories.
+
+        new: number of new items, kept in sync_pending until the plan is applied
+        to_remove: files of managed items no longer available
+        crawled: number of directories listed, from plugins or cache
+        seen: number of movies and episodes found
+        blocked: number of items dropped as blocked
+        unchanged: number of items found that are already in database
+        duplicate_urls: number of items dropped as their URL was already found
+        duplicate_items: number of items dropped as the same title and episode was already found
+        failed: directories that failed to load, if any, nothing is removed
+        timings: seconds spent in each step, by name
+        staged: number of items staged while crawling, by background updates
+    """
+
+    def __init__(self, generation, _type=None):
+        """__init__ SyncPlan."""
+        self.generation = generation
+        self._type = _type
+        self.directories = 0
+        self.crawled = 0
+        self.seen = 0
+        self.blocked = 0
+        self.new = 0
+        self.to_remove = []
+        self.unchanged = 0
+        self.duplicate_urls = 0
+        self.duplicate_items = 0
+        self.failed = []
+        self.timings = dict()
+        self.staged = 0
+
+    def __bool__(self):
+        """Return True if applying the plan changes anything."""
+        return bool(self.new or self.to_remove)
+
+    __nonzero__ = __bool__
+
+    def __str__(self):
+        """Return a summary of the plan, used in logs."""
+        return (
+            'SyncPlan(%s): %s dirs, %s crawled, %s seen, %s blocked, %s to stage, '
+            '%s to remove, %s unchanged, %s duplicates (%s same url, %s same episode), '
+            '%s failed, %s'
+        ) % (
+            self._type or 'all',
+            self.directories,
+            self.crawled,
+            self.seen,
+            self.blocked,
+            self.new,
+            len(self.to_remove),
+            self.unchanged,
+            self.duplicate_urls + self.duplicate_items,
+            self.duplicate_urls,
+            self.duplicate_items,
+            len(self.failed),
+            ', '.join(
+                '%s %.2fs' % (key, val) for key, val in self.timings.items()
+            )
+        )
+
+
+def unknown_items(plan, known_paths, items):
+    """Yield items not in known_paths, counting the others as unchanged in plan."""
+    for item in items:
+        if item['file'] in known_paths:
+            plan.unchanged += 1
+            continue
+        yield item
+
+
+class SyncCheckpoint(object):
+    """
+    Progress of a SyncPlan saved in database, so an interrupted plan resumes where it stopped.
+
+    Paths seen and new items are buffered and only committed by save, in the
+    same transaction as the crawl frontier, so the saved frontier always
+    matches the saved results. New items are written to sync_pending every
+    PIPELINE_BATCH_SIZE items, so they are not held in memory until applied.
+    """
+
+    def __init__(self, database, plan, done=None, current=None, frontier=None):
+        """__init__ SyncCheckpoint."""
+        self.database = database
+        self.plan = plan
+        self.done = done or []
+        self.current = current
+        self.frontier = frontier
+        self._seen = []
+        self._new = []
+
+    @classmethod
+    def load(cls, database, _type=None):
+        """Return the checkpoint of an interrupted plan of _type, or of a new plan."""
+        saved = database.get_sync_checkpoint()
+        if (saved and saved['_type'] == _type
+                and time() - saved['updated'] < SYNC_CHECKPOINT_MAX_AGE):
+            plan = SyncPlan(saved['generation'], _type)
+            plan.unchanged = saved['unchanged']
+            plan.failed = saved['failed']
+            plan.new = len(database.get_sync_pending_files())
+            log_msg('Resuming sync of generation %s, %s directories done' % (
+                plan.generation, len(saved['done'])
+            ))
+            return cls(database, plan, saved['done'], saved['current'], saved['frontier'])
+        database.clear_sync_checkpoint()
+        return cls(database, SyncPlan(database.new_sync_generation(), _type))
+
+    def seen(self, items):
+        """Yield items unchanged, buffering their paths to be stamped as seen."""
+        for item in items:
+            self._seen.append(item['file'])
+            yield item
+
+    def new(self, contentitems):
+        """Yield contentitems unchanged, buffering them as new items."""
+        for contentitem in contentitems:
+            self._new.append(contentitem)
+            if len(self._new) >= PIPELINE_BATCH_SIZE:
+                # committed by the next save
+                self.database.add_sync_pending_items(self._new)
+                self._new = []
+            yield contentitem
+
+    def failure(self, path, error):
+        """Record a directory that failed to load, see DirectoryCrawler."""
+        self.plan.failed.append(path)
+
+    def save(self, frontier=None):
+        """Write the buffered results with the frontier of the current directory."""
+        self.frontier = frontier
+        self.database.add_sync_pending_items(self._new)
+        self.database.set_sync_checkpoint(
+            self.plan.generation,
+            self.plan._type,
+            self.done,
+            self.current,
+            frontier,
+            self.plan.unchanged,
+            time(),
+            self.plan.failed
+        )
+        # commits the checkpoint and pending items with the seen paths
+        self.database.mark_paths_seen(self._seen, self.plan.generation)
+        self._seen = []
+        self._new = []
+
+    def clear(self):
+        """Remove the saved checkpoint, after the plan is complete, keeping its new items."""
+        self.database.clear_sync_checkpoint(keep_pending=True)
+
+
+class SyncEngine(object):
+    """Crawl synced directories and build SyncPlans, without changing library."""
+
+    def __init__(self, database, progressdialog=None):
+        """__init__ SyncEngine."""
+        self.database = database
+        self.progressdialog = progressdialog
+        self.blocked = 0
+
+    def _update(self, perc, msg):
+        """Update progressdialog if there is one."""
+        if self.progressdialog:
+            self.progressdialog._update(perc, msg)
+
+    def select(self, _type=None):
+        """Return the synced directories with content of _type, or all."""
+        synced_dirs = self.database.get_synced_dirs()
+        if _type:
+            return [x for x in synced_dirs if x['type'] in SYNCED_TYPES[_type]]
+        return synced_dirs
+
+    def _count_blocked(self, _item):
+        """Count an item dropped because it is blocked."""
+        self.blocked += 1
+
+    def filter_blocked_items(self, items, _type, key='label'):
+        """Yield items in the list not blocked, counting the blocked ones in self.blocked."""
+        return filter_blocked(
+            items, self.database.blocked_matcher, _type, on_blocked=self._count_blocked, key=key
+        )
+
+    def is_blocked_show(self, item):
+        """Return True if item is the directory of a show blocked as tvshow, counting it."""
+        if item['type'] != 'tvshow':
+            return False
+        showtitle = item.get('showtitle') or item['label']
+        if self.database.blocked_matcher.is_blocked(showtitle, 'tvshow'):
+            self._count_blocked(item)
+            return True
+        return False
+
+    @traced
+    def get_movies_in_directory(self, directory, ttl=0, refresh=False, **kwargs):
+        """Yield all movies in the directory and tags them."""
+        return tag_items(
+            self.filter_blocked_items(
+                load_directory_items(
+                    progressdialog=None,
+                    _path=directory,
+                    recursive=True,
+                    sync_type='movie',
+                    properties=JSON_RPC_PROPERTY_PRESETS['movie'],
+                    database=self.database,
+                    ttl=ttl,
+                    refresh=refresh,
+                    **kwargs
+                ), _type='movie'
+            ), type='movie'
+        )
+
+    @traced
+    def get_single_tvshow(self, directory, showtitle, ttl=0, refresh=False, **kwargs):
+        """Yield the episodes of the single TV show in the directory, and tag the items."""
+        return tag_items(
+            self.filter_blocked_items(
+                load_directory_items(
+                    progressdialog=self.progressdialog,
+                    _path=directory,
+                    recursive=True,
+                    sync_type='tvshow',
+                    properties=JSON_RPC_PROPERTY_PRESETS['episode'],
+                    database=self.database,
+                    ttl=ttl,
+                    refresh=refresh,
+                    **kwargs
+                ), _type='episode'
+            ), type='tvshow', showtitle=showtitle
+        )
+
+    @traced
+    def get_tvshows_in_directory(self, directory, ttl=0, refresh=False, **kwargs):
+        """
+        Yield all episodes of TV shows in the directory, and tag the items.
+
+        Shows blocked as tvshow are not crawled, and their episodes listed
+        outside of the show directory are dropped.
+        """
+        # Shows and seasons are crawled recursively, only episodes are returned
+        return tag_items(
+            self.filter_blocked_items(
+                self.filter_blocked_items(
+                    load_directory_items(
+                        progressdialog=self.progressdialog,
+                        _path=directory,
+                        recursive=True,
+                        sync_type='tvshow',
+                        properties=JSON_RPC_PROPERTY_PRESETS['tvshow'],
+                        season_properties=JSON_RPC_PROPERTY_PRESETS['episode'],
+                        database=self.database,
+                        ttl=ttl,
+                        refresh=refresh,
+                        skip_directory=self.is_blocked_show,
+                        **kwargs
+                    ), _type='tvshow', key='showtitle'
+                ), _type='episode'
+            ), type='tvshow'
+        )
+
+    @traced
+    def get_items_in_directory(self, directory, refresh=False, **kwargs):
+        """
+        Yield all items of a synced directory, according to its type.
+
+        kwargs are passed to load_directory_items, i.e. a frontier to resume the crawl.
+        """
+        if directory['type'] == 'single-movie':
+            # Directory is just a path to a single movie
+            return iter([{
+                'file': directory['file'],
+                'label': directory['label'],
+                'title': directory['label'],
+                'year': None,
+                'type': 'movie'
+            }])
+        elif directory['type'] == 'single-tvshow':
+            # Directory is a path to a tv show folder
+            return self.get_single_tvshow(
+                directory['file'],
+                directory['label'],
+                ttl=directory.cache_ttl,
+                refresh=refresh,
+                **kwargs
+            )
+        elif directory['type'] == 'movie':
+            # Directory is a path to list of movies
+            return self.get_movies_in_directory(
+                directory['file'],
+                ttl=directory.cache_ttl,
+                refresh=refresh,
+                **kwargs
+            )
+        elif directory['type'] == 'tvshow':
+            # Directory is a path to a list of tv shows
+            return self.get_tvshows_in_directory(
+                directory['file'],
+                ttl=directory.cache_ttl,
+                refresh=refresh,
+                **kwargs
+            )
+        return iter([])
+
+    def get_items_in_synced_dirs(self, synced_dirs, checkpoint, refresh=False, budget=None):
+        """
+        Yield all items of synced_dirs not done in checkpoint, one directory after the other.
+
+        All directories share budget, a directory not crawled because it is
+        exhausted is recorded as failed in checkpoint.
+        """
+        for index, directory in enumerate(synced_dirs):
+            if directory['file'] in checkpoint.done:
+                continue
+            self._update(
+                int(99 * index / len(synced_dirs)),
+                '{label} - {type}'.format(
+                    label=directory['label'],
+                    type=directory.localize_type()
+                )
+            )
+            # resume the crawl if it was interrupted in this directory
+            frontier = checkpoint.frontier if checkpoint.current == directory['file'] else None
+            checkpoint.current = directory['file']
+            for item in self.get_items_in_directory(
+                    directory,
+                    refresh=refresh,
+                    frontier=frontier,
+                    checkpoint=checkpoint.save,
+                    on_error=checkpoint.failure,
+                    budget=budget):
+                yield item
+            checkpoint.done.append(directory['file'])
+            checkpoint.current = None
+            checkpoint.save()
+            self.database.set_synced_last_update(directory['file'], time())
+
+    @traced
+    def plan(self, synced_dirs, _type=None, refresh=False):
+        """
+        Return a SyncPlan for synced_dirs.
+
+        Items stream from the crawler to the diff, items found in more than
+        one directory are dropped before the diff, only new items are kept,
+        in sync_pending, so only their paths are held in memory, and
+        managed items of _type (or all) not found are planned for removal.
+        With refresh, cached directory listings are requested again.
+        If the last plan of _type was interrupted, it is resumed.
+        If a directory fails to load, its items would look unavailable,
+        so nothing is planned for removal. Managed items do not record their
+        synced directory, so the same applies when synced_dirs is only a part
+        of the synced directories of _type (or all).
+        """
+        checkpoint = SyncCheckpoint.load(self.database, _type)
+        plan = checkpoint.plan
+        plan.directories = len(synced_dirs)
+        start = monotonic()
+        known_paths = self.database.get_known_paths()
+        # new items found before an interruption
+        known_paths.update(
+            (x, ['pending', 'staged']) for x in self.database.get_sync_pending_files()
+        )
+        deduplicator = Deduplicator()
+        budget = CrawlBudget()
+        blocked = self.blocked
+        # duplicates are still marked as seen, so they are not removed
+        for _contentitem in checkpoint.new(
+                traced_iter('diff', new_contentitems(
+                    unknown_items(
+                        plan,
+                        known_paths,
+                        deduplicator.filter(
+                            checkpoint.seen(
+                                traced_iter('crawl', self.get_items_in_synced_dirs(
+                                    synced_dirs, checkpoint, refresh=refresh, budget=budget
+                                ))
+                            )
+                        )
+                    ),
+                    known_paths
+                ))):
+            plan.new += 1
+        plan.duplicate_urls = deduplicator.same_url
+        plan.duplicate_items = deduplicator.same_item
+        plan.crawled += budget.directories_used
+        plan.seen += budget.items_used
+        plan.blocked += self.blocked - blocked
+        plan.timings['crawl'] = monotonic() - start
+        start = monotonic()
+        missing = (
+            set(x['file'] for x in self.select(_type))
+            - set(x['file'] for x in synced_dirs)
+        )
+        if missing:
+            log_msg(
+                'Nothing planned for removal, %s synced directories not updated' % len(missing)
+            )
+        elif not plan.failed:
+            with span('sweep'):
+                plan.to_remove = self.database.get_unseen_paths(plan.generation, _type=_type)
+        plan.timings['sweep'] = monotonic() - start
+        checkpoint.clear()
+        log_msg(str(plan))
+        log_msg('Plugin requests:\n%s' % PLUGIN_SCHEDULER.summary())
+        return plan
+
+    @traced
+    def sync_directory(self, directory, stop=None):
+        """
+        Stage new items of a synced directory without any dialog.
+
+        Used by background updates, items no longer available are only
+        removed by a manual update, where the user confirms the removal.
+        The crawl ends early when stop returns a reason, see CrawlBudget.
+        Return a SyncPlan with the counts of the run, items are staged
+        while crawling, so only their number is kept, in staged.
+        """
+        plan = SyncPlan(None, directory['type'])
+        plan.directories = 1
+        start = monotonic()
+        budget = CrawlBudget(stop=stop)
+        blocked = self.blocked
+        known_paths = self.database.get_known_paths()
+        plan.staged = stage(
+            traced_iter('diff', new_contentitems(
+                unknown_items(
+                    plan,
+                    known_paths,
+                    traced_iter('crawl', self.get_items_in_directory(
+                        directory,
+                        budget=budget,
+                        on_error=lambda path, error: plan.failed.append(path)
+                    ))
+                ),
+                known_paths
+            )),
+            self.database
+        )
+        plan.crawled = budget.directories_used
+        plan.seen = budget.items_used
+        plan.blocked = self.blocked - blocked
+        plan.timings['sync'] = monotonic() - start
+        return plan
+
+
+class SyncApplier(object):
+    """Execute a SyncPlan, removing and staging items by batch."""
+
+    def __init__(self, database, progressdialog=None):
+        """__init__ SyncApplier."""
+        self.database = database
+        self.progressdialog = progressdialog
+
+    def _update(self, perc, msg):
+        """Update progressdialog if there is one."""
+        if self.progressdialog:
+            self.progressdialog._update(perc, msg)
+
+    def remove_paths(self, paths_to_remove):
+        """Remove from library and delete all items with the given paths."""
+        for batch in batched(paths_to_remove):
+            files = dict()
+            for jsonitem in self.database.load_items(batch):
+                build_contentmanager(
+                    self.database, build_contentitem(jsonitem)
+                ).remove_from_library()
+                files.setdefault(jsonitem['type'], []).append(jsonitem['file'])
+            for _type, _files in files.items():
+                self.database.delete_items_from_table(_type, _files)
+
+    @traced
+    def apply(self, plan):
+        """
+        Remove and stage the items in plan, and add the timings to it.
+
+        New items are read from sync_pending and staged by batch, then removed from it.
+        """
+        STR_REMOVING_ITEMS = getstring(32094)
+        STR_STAGING_ITEMS = getstring(32095)
+        if plan.to_remove:
+            self._update(99, STR_REMOVING_ITEMS)
+            start = monotonic()
+            with span('remove'):
+                self.remove_paths(plan.to_remove)
+            plan.timings['remove'] = monotonic() - start
+        if plan.new:
+            self._update(99, STR_STAGING_ITEMS)
+            start = monotonic()
+            with span('stage'):
+                stage(self.database.iter_sync_pending_items(), self.database)
+                self.database.clear_sync_checkpoint()
+            plan.timings['stage'] = monotonic() - start
+        log_msg(str(plan))
@@ -0,0 +1,52 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Time based helpers to yield to the UI and plugins only when needed."""
+
+from time import monotonic
+from threading import Lock
+
+import xbmc  # pylint: disable=import-error
+
+
+class Throttle(object):
+    """Tell when an action is due, so it runs at most once per interval (in seconds)."""
+
+    def __init__(self, interval):
+        """__init__ Throttle."""
+        self.interval = interval
+        self._last = None
+
+    def ready(self, force=False):
+        """Return True if the interval has passed since the last time it returned True."""
+        now = monotonic()
+        if force or self._last is None or now - self._last >= self.interval:
+            self._last = now
+            return True
+        return False
+
+
+class RateLimiter(object):
+    """
+    Space requests with the same key by a minimum interval (in seconds).
+
+    Can be shared by many threads, each caller reserves the next free slot
+    and only sleeps if that slot is in the future, an interval of 0 never sleeps.
+    """
+
+    def __init__(self, interval):
+        """__init__ RateLimiter."""
+        self.interval = interval
+        self._next_slot = dict()
+        self._lock = Lock()
+
+    def wait(self, key):
+        """Block until a request with key is allowed."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = monotonic()
+            slot = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = slot + self.interval
+        if slot > now:
+            xbmc.sleep(int(1000 * (slot - now)))
@@ -0,0 +1,241 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Call counts and timings of functions, and nested spans of the work they do.
+
+Only active with the tracing setting (a development option), otherwise
+traced returns the function unchanged and span and traced_iter do nothing,
+so tracing costs nothing when disabled. Spans nest by thread, the summary
+has the time of each function and the tree of spans, with the time spent
+in each span itself (self) and in its children, and is written to the log
+and to trace.json in the addon data folder by dump, called by entrypoints.
+"""
+
+import inspect
+
+from time import time
+from time import monotonic
+from functools import wraps
+from threading import Lock
+from threading import local
+from contextlib import nullcontext
+from contextlib import contextmanager
+
+import simplejson as json
+
+import xbmcvfs  # pylint: disable=import-error
+
+from resources import ADDON_ID
+from resources import TRACING
+
+from resources.lib.log import log_msg
+
+TRACE_FILE = 'special://userdata/addon_data/{}/trace.json'.format(ADDON_ID)
+# Percentiles of each function in the summary
+TRACE_PERCENTILES = [50, 95, 99]
+# Functions and spans in the summary written to the log, all are in the file
+TRACE_LOG_LINES = 30
+
+
+def percentile(timings, perc):
+    """Return the perc percentile of sorted timings, by nearest rank."""
+    return timings[max(0, -(-len(timings) * perc // 100) - 1)]
+
+
+class Tracer(object):
+    """Timings of each function, and count and time of each span by path."""
+
+    def __init__(self):
+        """__init__ Tracer."""
+        self.timings = dict()
+        self.spans = dict()
+        self._lock = Lock()
+        self._local = local()
+
+    @property
+    def stack(self):
+        """Return the names of the open spans of this thread."""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def record(self, name, path, elapsed):
+        """Add a call of name, that took elapsed seconds, under the span path."""
+        with self._lock:
+            self.timings.setdefault(name, []).append(elapsed)
+            span = self.spans.setdefault(path, [0, 0.])
+            span[0] += 1
+            span[1] += elapsed
+
+    @contextmanager
+    def span(self, name):
+        """Time the block as a span named name, nested in the open spans."""
+        stack = self.stack
+        stack.append(name)
+        path = '/'.join(stack)
+        start = monotonic()
+        try:
+            yield
+        finally:
+            elapsed = monotonic() - start
+            stack.pop()
+            self.record(name, path, elapsed)
+
+    def iterate(self, name, iterable):
+        """
+        Yield from iterable, timing each step as a part of a single span.
+
+        Only the time spent producing items is counted, not the time spent
+        by the consumer between items, the span is recorded when iterable ends.
+        """
+        iterator = iter(iterable)
+        stack = self.stack
+        path = '/'.join(stack + [name])
+        elapsed = 0.
+        try:
+            while True:
+                stack.append(name)
+                start = monotonic()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += monotonic() - start
+                    stack.pop()
+                yield item
+        finally:
+            self.record(name, path, elapsed)
+
+    def clear(self):
+        """Forget all timings and spans."""
+        with self._lock:
+            self.timings.clear()
+            self.spans.clear()
+
+    def functions(self):
+        """Return the count, total and percentiles of each name, the slowest total first."""
+        with self._lock:
+            timings = {x: sorted(y) for x, y in self.timings.items()}
+        summary = []
+        for name, values in timings.items():
+            stats = {
+                'name': name,
+                'count': len(values),
+                'total': sum(values),
+                'max': values[-1],
+            }
+            for perc in TRACE_PERCENTILES:
+                stats['p%s' % perc] = percentile(values, perc)
+            summary.append(stats)
+        summary.sort(key=lambda x: x['total'], reverse=True)
+        return summary
+
+    def tree(self):
+        """Return the count, total and self time of each span path, in tree order."""
+        with self._lock:
+            spans = {x: list(y) for x, y in self.spans.items()}
+        children = dict()
+        for path, (_, total) in spans.items():
+            parent = path.rpartition('/')[0]
+            children[parent] = children.get(parent, 0.) + total
+        return [
+            {
+                'path': path,
+                'count': count,
+                'total': total,
+                'self': max(0., total - children.get(path, 0.)),
+            } for path, (count, total) in sorted(spans.items())
+        ]
+
+    def summary(self):
+        """Return the summary of functions and spans as lines of text, used in logs."""
+        lines = ['%-60s %8s %10s %10s %10s %10s' % (
+            'function', 'calls', 'total', 'p50', 'p95', 'p99'
+        )]
+        lines.extend(
+            '%-60s %8s %10.4f %10.4f %10.4f %10.4f' % (
+                x['name'], x['count'], x['total'], x['p50'], x['p95'], x['p99']
+            ) for x in self.functions()[:TRACE_LOG_LINES]
+        )
+        lines.append('%-60s %8s %10s %10s' % ('span', 'calls', 'total', 'self'))
+        spans = sorted(self.tree(), key=lambda x: x['total'], reverse=True)[:TRACE_LOG_LINES]
+        lines.extend(
+            '%-60s %8s %10.4f %10.4f' % (
+                '  ' * x['path'].count('/') + x['path'].rpartition('/')[2],
+                x['count'], x['total'], x['self']
+            ) for x in sorted(spans, key=lambda x: x['path'])
+        )
+        return '\n'.join(lines)
+
+
+TRACER = Tracer()
+
+
+def trace_name(func):
+    """Return the name of func in the summary, i.e. database.Database.path_exists."""
+    module = func.__module__.replace('resources.lib', '').lstrip('.')
+    return '.'.join(x for x in [module, func.__qualname__] if x)
+
+
+def traced(func):
+    """
+    Decorator that times each call of func as a span, or func itself if not TRACING.
+
+    Calls of generator functions are timed from the first to the last item.
+    """
+    if not TRACING:
+        return func
+    name = trace_name(func)
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            """generator function wrapper."""
+            return TRACER.iterate(name, func(*args, **kwargs))
+        return generator_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        """function wrapper."""
+        with TRACER.span(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# The span of a block when not TRACING, does nothing and can be reused
+NO_SPAN = nullcontext()
+
+
+def span(name):
+    """Return a context manager that times a block as a span named name."""
+    if not TRACING:
+        return NO_SPAN
+    return TRACER.span(name)
+
+
+def traced_iter(name, iterable):
+    """Return iterable, timed as a span named name if TRACING."""
+    if not TRACING:
+        return iterable
+    return TRACER.iterate(name, iterable)
+
+
+def dump(entrypoint):
+    """Write the summary of the calls since the last dump to the log and the trace file."""
+    if not TRACING or not TRACER.timings:
+        return
+    log_msg('Trace of %s:\n%s' % (entrypoint, TRACER.summary()))
+    try:
+        with open(xbmcvfs.translatePath(TRACE_FILE), 'w') as trace_file:
+            json.dump(
+                {
+                    'entrypoint': entrypoint,
+                    'time': time(),
+                    'functions': TRACER.functions(),
+                    'spans': TRACER.tree(),
+                }, trace_file, indent=4
+            )
+    except (IOError, OSError) as error:
+        log_msg('Failed to write trace: %s' % error)
+    TRACER.clear()
@@ -7,8 +7,14 @@ import re
 import simplejson as json
 
 from os.path import join
+from os.path import basename
+from os.path import splitext
 from os.path import exists
 from os.path import expanduser
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
 
 import xbmc  # pylint: disable=import-error
 import xbmcgui  # pylint: disable=import-error
@@ -18,12 +24,14 @@ from resources import ADDON
 from resources import ADDON_ID
 from resources import ADDON_NAME
 from resources import ADDON_PATH
-from resources import RECURSION_LIMIT
 from resources import USING_CUSTOM_MANAGED_FOLDER
 
 from resources.lib.log import log_msg
+from resources.lib.trace import dump
+from resources.lib.profiler import profiled
 from resources.lib.filesystem import mkdir
 from resources.lib.version import check_version_file
+from resources.lib.providers import get_provider
 
 
 if USING_CUSTOM_MANAGED_FOLDER:
@@ -67,43 +75,160 @@ def check_subfolders():
 
 
 def entrypoint(func):
-    """Decorator to perform actions required for entrypoints."""
+    """
+    Decorator to perform actions required for entrypoints.
+
+    The entrypoint is profiled if enabled, and the trace is dumped after it.
+    """
     def wrapper(*args, **kwargs):
         """function wrapper."""
         check_version_file()
         check_managed_folder()
         check_subfolders()
-        return func(*args, **kwargs)
+        name = basename(func.__code__.co_filename)
+        try:
+            with profiled(splitext(name)[0]):
+                return func(*args, **kwargs)
+        finally:
+            dump(name)
     return wrapper
 
 
-def execute_json_rpc(method, _path):
+# JSON-RPC error codes of calls that can succeed if repeated, Files.GetDirectory
+# returns -32602 (invalid params) when a plugin fails to list a directory
+RETRYABLE_JSON_RPC_ERRORS = [-32602, -32603, -32100]
+
+
+class JSONRPCError(Exception):
+    """Error response of a JSON-RPC call, retryable if the same call can succeed later."""
+
+    def __init__(self, message, code=None, retryable=False):
+        """__init__ JSONRPCError."""
+        super(JSONRPCError, self).__init__(message)
+        self.code = code
+        self.retryable = retryable
+
+
+# Properties of the items of a directory requested by default
+JSON_RPC_PROPERTIES = [
+    'season',
+    'title',
+    'file',
+    'showtitle',
+    'year',
+    'episode',
+]
+
+# Properties needed by each kind of crawl, plugins (i.e. Netflix) can take
+# long to compute some of them, so only what the classifier reads is requested
+JSON_RPC_PROPERTY_PRESETS = {
+    # movies, only title and year are used by MovieItem
+    'movie': ['title', 'year'],
+    # shows directories, the provider rules read season and episode to tell
+    # shows from seasons, and some plugins only give the showtitle of shows
+    'tvshow': ['title', 'year', 'season', 'episode', 'showtitle'],
+    # seasons and episodes of a single show, their showtitle is the one of the show
+    'episode': ['title', 'year', 'season', 'episode'],
+}
+
+
+def json_rpc_request(method, _path, _id=1, properties=None):
+    """Return the JSON-RPC request of method for a directory, with id _id."""
+    return {
+        'jsonrpc': '2.0',
+        "method": method,
+        "params": {
+            'directory': _path,
+            'properties': properties or JSON_RPC_PROPERTIES,
+        },
+        'id': _id
+    }
+
+
+def json_rpc_response(method, _path, response):
+    """Return response, raise JSONRPCError if it is an error."""
+    if 'error' in response:
+        code = response['error'].get('code')
+        raise JSONRPCError(
+            '%s %s: %s' % (method, _path, response['error'].get('message')),
+            code=code,
+            retryable=code in RETRYABLE_JSON_RPC_ERRORS
+        )
+    return response
+
+
+def execute_json_rpc(method, _path, properties=None):
     """
     Execute a JSON-RPC command with specified method and params (as keyword arguments).
 
     See https://kodi.wiki/view/JSON-RPC_API/v10 for methods and params.
+    properties are requested for each item, see JSON_RPC_PROPERTY_PRESETS.
+    Raise JSONRPCError if the response is an error.
+    """
+    response = json.loads(
+        xbmc.executeJSONRPC(
+            # ensure_ascii ONLY scape charters in python3
+            json.dumps(json_rpc_request(method, _path, properties=properties), ensure_ascii=False)
+        )
+    )
+    return json_rpc_response(method, _path, response)
+
+
+def execute_json_rpc_batch(method, paths, properties=None):
     """
-    return json.loads(
+    Execute a JSON-RPC command for each path in paths, in a single call.
+
+    Return a list with the response, or the JSONRPCError, of each path in
+    the same order as paths, responses are matched to paths by id.
+    Raise JSONRPCError if the whole call is an error.
+    """
+    responses = json.loads(
         xbmc.executeJSONRPC(
-            json.dumps({
-                'jsonrpc': '2.0',
-                "method": method,
-                "params": {
-                    'directory': _path,
-                    'properties': [
-                        'duration',
-                        'season',
-                        'title',
-                        'file',
-                        'showtitle',
-                        'year',
-                        'episode',
-                    ],
-                },
-                'id': 1
-            }, ensure_ascii=False)  # ensure_ascii ONLY scape charters in python3
+            json.dumps(
+                [
+                    json_rpc_request(method, path, index, properties)
+                    for index, path in enumerate(paths)
+                ],
+                ensure_ascii=False
+            )
         )
     )
+    if isinstance(responses, dict):
+        # an error for the whole batch, i.e. batches not supported
+        json_rpc_response(method, ', '.join(paths), responses)
+        responses = [responses]
+    by_id = {x.get('id'): x for x in responses}
+    results = []
+    for index, path in enumerate(paths):
+        try:
+            if index not in by_id:
+                raise JSONRPCError('%s %s: no response' % (method, path), retryable=True)
+            results.append(json_rpc_response(method, path, by_id[index]))
+        except JSONRPCError as error:
+            results.append(error)
+    return results
+
+
+def plugin_id(path):
+    """Return the plugin id of a plugin:// path, e.g. plugin.video.netflix."""
+    return path.split('://', 1)[-1].split('/', 1)[0].split('?', 1)[0]
+
+
+def normalize_url(path):
+    """
+    Return the same string for equivalent plugin URLs, used to detect directories visited twice.
+
+    Scheme and plugin id are lowercased, trailing slashes, query parameters
+    order and fragment are ignored.
+    """
+    parts = urlsplit(path)
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path.rstrip('/'),
+        urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True))),
+        ''
+    ))
 
 
 def videolibrary(method, database='video', path=None):
@@ -116,54 +241,75 @@ def videolibrary(method, database='video', path=None):
 
 
 
-SKIP_STRINGS = [
+# Patterns are always case insensitive, see compile_patterns
+SKIP_STRINGS = (
     'resumo',
     'suggested',
     'extras',
     'trailer',
-    r'(?i)\#(?:\d{1,5}\.\d{1,5}|SP)',
-]
+    r'\#(?:\d{1,5}\.\d{1,5}|SP)',
+)
+
+# Kodi types of items crawled in a tvshow sync
+TVSHOW_TYPES = ('tvshow', 'season', 'episode', 'unknown', 'directory')
+
+_COMPILED_PATTERNS = dict()
+
+
+def compile_patterns(patterns):
+    """
+    Return a list of patterns merged in a single case insensitive regex.
+
+    Compiled once for each tuple of patterns, so lists checked for every
+    crawled item should be tuples constants, lists are converted on each call.
+    """
+    if not isinstance(patterns, tuple):
+        patterns = tuple(patterns)
+    try:
+        return _COMPILED_PATTERNS[patterns]
+    except KeyError:
+        compiled = re.compile(
+            '|'.join('(?:%s)' % x for x in patterns) or '(?!)', re.I
+        )
+        _COMPILED_PATTERNS[patterns] = compiled
+        return compiled
 
 
 def re_search(string, tosearch=None):
     """Function check if string exist with re."""
-    return bool(any(re.search(rgx, string, re.I) for rgx in tosearch))
+    return bool(compile_patterns(tosearch).search(string))
 
 
 def skip_filter(contents_json, _key, toskip):
     """Function to iterate jsons in a list and filter by key with re."""
+    search = compile_patterns(toskip).search
     try:
         for item in contents_json:
-            if not bool(any(re.search(rgx, item[_key], re.I) for rgx in toskip)):
+            if not search(item[_key]):
                 yield item
     except TypeError:
         yield None
 
 
-def list_reorder(contents_json, showtitle, year=False, sync_type=False):
-    """Return a list of elements reordered by number id."""
+def list_reorder(contents_json, showtitle, year=False, sync_type=False, provider=None):
+    """
+    Return a list of elements reordered by number id.
+
+    Items are classified by the rules of provider, see providers.py, if None
+    the provider is picked from the plugin of the first item.
+    """
     reordered = [''] * len(contents_json)
     years = []
     stored_title = None
     stored_season = None
+    if provider is None and contents_json:
+        provider = get_provider(plugin_id(contents_json[0]['file']))
     for index, item in enumerate(contents_json):
-        # TODO: check if logic is real necessary, test is for all languages eficient
-        IS_A_SEASON = re_search(
-            item['label'],
-            ['season', 'temporada', r'S\d{1,4}']
-        )
         if sync_type != 'all_items':
             if sync_type == 'movie' and item['type'] == 'movie':
                 pass
             elif sync_type == 'tvshow':
-                tvshow_search = [
-                    'tvshow',
-                    'season',
-                    'episode',
-                    'unknown',
-                    'directory'
-                ]
-                if re_search(item['type'], tvshow_search):
+                if re_search(item['type'], TVSHOW_TYPES):
                     pass
             elif sync_type == 'music' and item['type'] == 'music':
                 pass
@@ -172,7 +318,7 @@ def list_reorder(contents_json, showtitle, year=False, sync_type=False):
 
         item['number'] = index + 1
         # 1601 é o ano que aparece quando a informação de ano correta não existe
-        if item['year'] == 1601:
+        if item.get('year') == 1601:
             if year is not False:
                 item['year'] = int(year)
             else:
@@ -180,160 +326,29 @@ def list_reorder(contents_json, showtitle, year=False, sync_type=False):
 
         # MOVIES: detect movies in dir
         if item['filetype'] == 'file' and item['type'] == 'movie':
-            del item['episode']
-            del item['season']
-            del item['showtitle']
+            item.pop('episode', None)
+            item.pop('season', None)
+            item.pop('showtitle', None)
             reordered[item['number'] - 1] = item
         else:
-            # CRUNCHYROLL
-            if 'crunchyroll' in item['file']:
-                # CRUNCHYROLL SHOW DIRECTORY
-                if item['filetype'] == 'directory':
-                    if re_search(item['type'], ['tvshow', 'unknown']):
-                        if re_search(item['file'], [r'mode\=series']):
-                            item['type'] = 'tvshow'
-                            del item['episode']
-                            del item['season']
-                            del item['title']
-                            reordered[item['number'] - 1] = item
-                    # CRUNCHYROLL SEASON DIRECTORY
-                    if item['type'] == 'unknown':
-                        if not re_search(item['file'], [r'mode\=series']):
-                            if not re_search(item['file'], [r'episode\=']):
-                                del item['episode']
-                                item['type'] = 'season'
-                                item['showtitle'] = showtitle
-                                if item['season'] == 0:
-                                    item['season'] = 1
-                                try:
-                                    years.append(item['year'])
-                                except KeyError:
-                                    pass
-                                reordered[item['number'] - 1] = item
-                elif item['filetype'] == 'file':
-                    # CRUNCHYROLL EPISODE FILE
-                    if re_search(item['file'], [r'episode\=']):
-                        item['type'] = 'episode'
-                        if item['season'] == 0:
-                            item['season'] = 1
-                        try:
-                            years.append(item['year'])
-                        except KeyError:
-                            pass
-                        reordered[item['number'] - 1] = item
-            # AMAZON
-            if 'amazon' in item['file']:
-                if item['filetype'] == 'directory':
-                    # AMAZON SHOW DIRECTORY
-                    if item['episode'] == -1:
-                        if not IS_A_SEASON:
-                            if re_search(item['type'], ['tvshow', 'unknown']):
-                                item['type'] = 'tvshow'
-                                item['showtitle'] = item['label']
-                                del item['episode']
-                                del item['season']
-                                reordered[item['number'] - 1] = item
-                    # AMAZON SEASON DIRECTORY
-                    if IS_A_SEASON is True:
-                        del item['episode']
-                        del item['number']
-                        item['type'] = 'season'
-                        item['showtitle'] = showtitle
-                        try:
-                            years.append(item['year'])
-                        except KeyError:
-                            pass
-                        reordered[item['season'] - 1] = item
-                elif item['filetype'] == 'file':
-                    # AMAZON EPISODE FILE
-                    if item['episode'] != -1:
-                        if item['season'] != -1:
-                            if item['type'] == 'episode':
-                                try:
-                                    years.append(item['year'])
-                                except KeyError:
-                                    pass
-                                reordered[item['episode'] - 1] = item
-            # DISNEY
-            if 'disney' in item['file']:
-                # DISNEY SHOW DIRECTORY
-                if item['filetype'] == 'directory':
-                    if item['type'] == 'tvshow':
-                        if item['season'] == -1:
-                            if IS_A_SEASON is False:
-                                item['showtitle'] = item['title']
-                                item['type'] = 'tvshow'
-                                del item['episode']
-                                del item['season']
-                                reordered[item['number'] - 1] = item
-                    # DISNEY SEASON DIRECTORY
-                    if item['type'] == 'unknown':
-                        if IS_A_SEASON is True:
-                            item['showtitle'] = showtitle
-                            del item['episode']
-                            item['type'] = 'season'
-                            try:
-                                years.append(item['year'])
-                            except KeyError:
-                                pass
-                            reordered[item['season'] - 1] = item
-                elif item['filetype'] == 'file':
-                    # DISNEY EPISODE FILE
-                    if item['type'] == 'episode':
-                        try:
-                            years.append(item['year'])
-                        except KeyError:
-                            pass
-                        reordered[item['episode'] - 1] = item
-            # NETFLIX
-            if 'netflix' in item['file']:
-                if item['filetype'] == 'directory':
-                    # NETFLIX SHOW DIRECTORY
-                    if re_search(item['type'], ['tvshow']):
-                        if not re_search(item['file'], ['season', 'episode']):
-                            del item['episode']
-                            del item['season']
-                            reordered[item['number'] - 1] = item
-                    # NETFLIX SEASON DIRECTORY
-                    if item['type'] == 'unknown':
-                        if re_search(item['file'], ['show', 'season']):
-                            if not re_search(item['file'], ['episode']):
-                                if IS_A_SEASON is True:
-                                    item['showtitle'] = showtitle
-                                    item['type'] = 'season'
-                                    del item['episode']
-                                    try:
-                                        years.append(item['year'])
-                                    except KeyError:
-                                        pass
-                                    reordered[item['season'] - 1] = item
-                elif item['filetype'] == 'file':
-                    # NETFLIX EPISODE FILE
-                    if item['type'] == 'episode':
-                        if re_search(item['file'], ['show', 'season', 'episode']):
-                            try:
-                                years.append(item['year'])
-                            except KeyError:
-                                pass
-                            if item['episode'] != item['number']:
-                                item['episode'] = item['number']
-                                reordered[item['number'] - 1] = item
-                            else:
-                                reordered[item['episode'] - 1] = item
+            # SHOWS, SEASONS AND EPISODES: classified by provider rules
+            position = provider.classify(item, showtitle, years) if provider else None
+            if position is not None:
+                reordered[position - 1] = item
             # this part of code detect episodes with < 30 in season with 'Next Page'
             # works with CRUNCHYROLL, but can work for all
             if item['filetype'] == 'file' and item['type'] == 'episode':
                 if stored_season and stored_title is None:
-                    stored_title = item['showtitle']
-                    stored_season = item['season']
-                if (item['season'] == stored_season and
-                        item['showtitle'] == stored_title and
-                        item['episode'] < 30):
+                    stored_title = item.get('showtitle')
+                    stored_season = item.get('season')
+                if (item.get('season') == stored_season and
+                        item.get('showtitle') == stored_title and
+                        item.get('episode', -1) < 30):
                     item['episode'] = item['number']
-                if item['season'] != stored_season:
-                    stored_season = item['season']
-                if item['showtitle'] != stored_title:
-                    stored_title = item['showtitle']
+                if item.get('season') != stored_season:
+                    stored_season = item.get('season')
+                if item.get('showtitle') != stored_title:
+                    stored_title = item.get('showtitle')
     for item in reordered:
         if item:
             try:
@@ -366,111 +381,6 @@ def selected_list(results):
         yield None
 
 
-def load_directory_items(progressdialog, _path, recursive=False,
-                         allow_directories=False, depth=1, showtitle=False,
-                         season=False, year=False, sync_type=False):
-    """Load items in a directory using the JSON-RPC interface."""
-    if RECURSION_LIMIT and depth > RECURSION_LIMIT:
-        yield []
-    results = execute_json_rpc(
-        'Files.GetDirectory',
-        _path=_path
-    )['result']['files']
-    if sync_type == 'filter':
-        sync_type = 'all_items'
-        results = list(selected_list(results))
-    try:
-        filtered = list(skip_filter(
-            results,
-            'label',
-            SKIP_STRINGS
-        )
-        )
-        listofitems = list(
-            list_reorder(
-                filtered,
-                showtitle=showtitle,
-                year=year,
-                sync_type=sync_type
-            )
-        )
-    except (KeyError, TypeError):
-        listofitems = []
-    if not allow_directories:
-        for item in listofitems:
-            if item and item['filetype'] == 'file':
-                yield item
-    directories = []
-    for index, item in enumerate(listofitems):
-        if item['type'] == 'movie':
-            progressdialog._update(
-                index / len(listofitems),
-                'Processando items:\n%s' % item['title']
-            )
-            if item:
-                yield item
-        else:
-            if season:
-                item['season'] = season
-            if year:
-                item['year'] = year
-            # if content is a directory will be added to directories list
-            if item['filetype'] == 'directory':
-                if re_search(item['type'], ['season', 'tvshow']):
-                    showtitle = item['showtitle']
-                    progressdialog._update(
-                        index / len(listofitems),
-                        'Coletando itens no diretorio!\n%s' % item['label']
-                    )
-                    directories.append(item)
-            # if content is a episode, will be stored with yeld
-            if item['type'] == 'episode':
-                # change type to 'tvshow' to padronize in build_contentitem
-                item['type'] = 'tvshow'
-                progressdialog._update(
-                    index / len(listofitems),
-                    'Processando items:\n%s' % item['label']
-                )
-                xbmc.sleep(100)
-                item['showtitle'] = showtitle
-                if item:
-                    yield item
-    if recursive and directories:
-        for _dir in directories:
-            # close the progress bar during JSONRPC process
-            try:
-                title = _dir['showtitle']
-                recursive = True
-            except KeyError:
-                title = False
-            try:
-                season = _dir['season']
-                recursive = True
-            except KeyError:
-                season = False
-            try:
-                year = _dir['year']
-                recursive = True
-            except KeyError:
-                year = False
-            new_items = list(
-                load_directory_items(
-                    progressdialog=progressdialog,
-                    _path=_dir['file'],
-                    recursive=recursive,
-                    allow_directories=allow_directories,
-                    depth=depth + 1,
-                    showtitle=title,
-                    season=season,
-                    year=year,
-                    sync_type=sync_type
-                )
-            )
-            for new in new_items:
-                if item:
-                    yield new
-
-
 def notification(message, time=3000, icon=join(ADDON_PATH, 'ntf_icon.png')):
     """Provide a shorthand for xbmc builtin notification with addon name."""
     xbmcgui.Dialog().notification(
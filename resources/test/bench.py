@@ -0,0 +1,123 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Defines function to call benchmark modules and compare them with a baseline.
+
+A benchmark is a function named bench_* in a module named bench_*.py, it
+prepares its data and returns the function to time, or a tuple of setup,
+run and teardown functions (setup and teardown can be None): only run is
+timed, setup runs before each timing and teardown once after the last.
+A benchmark returns None to be skipped.
+"""
+
+
+import os
+import inspect
+import importlib
+
+from time import monotonic
+
+import simplejson as json
+
+from resources.lib.utils import log_msg
+from resources.lib.utils import notification
+
+BENCH_PATH = os.path.dirname(os.path.abspath(__file__))
+BENCH_REPORT = 'bench_report.json'
+BENCH_BASELINE = 'bench_baseline.json'
+# timings of each benchmark, the median is compared to the baseline
+BENCH_REPEAT = 5
+# a benchmark slower than the baseline by this ratio is a regression
+BENCH_TOLERANCE = 1.25
+
+
+def load_benchmarks(pattern='bench_'):
+    """Return (name, function) of all benchmarks in modules starting with pattern."""
+    benchmarks = []
+    for filename in sorted(os.listdir(BENCH_PATH)):
+        if not (filename.startswith(pattern) and filename.endswith('.py')):
+            continue
+        module = importlib.import_module('resources.test.%s' % filename[:-3])
+        functions = [
+            x for x in vars(module).values()
+            if inspect.isfunction(x) and x.__module__ == module.__name__
+            and x.__name__.startswith('bench_')
+        ]
+        # in the order they are defined
+        functions.sort(key=lambda x: x.__code__.co_firstlineno)
+        benchmarks.extend(('%s.%s' % (filename[:-3], x.__name__), x) for x in functions)
+    return benchmarks
+
+
+def measure(run, setup=None, repeat=BENCH_REPEAT):
+    """Return the timings of run, in seconds, calling setup before each one."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = monotonic()
+        run()
+        timings.append(monotonic() - start)
+    timings.sort()
+    return {
+        'min': timings[0],
+        'median': timings[len(timings) // 2],
+        'max': timings[-1],
+        'repeat': repeat,
+    }
+
+
+def compare(results, baseline, tolerance=BENCH_TOLERANCE):
+    """Add the ratio to the baseline median to results, return the names of regressions."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or not baseline[name]['median']:
+            continue
+        result['ratio'] = result['median'] / baseline[name]['median']
+        result['regression'] = result['ratio'] > tolerance
+        if result['regression']:
+            regressions.append(name)
+    return regressions
+
+
+def bench(save_baseline=False, pattern='bench_', path=BENCH_PATH):
+    """
+    Run all benchmarks, write the results as JSON and return the regressions.
+
+    The results are compared to the baseline in path, if there is one,
+    with save_baseline the results become the new baseline.
+    """
+    results = dict()
+    for name, benchmark in load_benchmarks(pattern):
+        prepared = benchmark()
+        if prepared is None:
+            log_msg('Benchmark %s skipped' % name)
+            continue
+        setup, run, teardown = prepared if isinstance(prepared, tuple) else (None, prepared, None)
+        try:
+            results[name] = measure(run, setup)
+        finally:
+            if teardown:
+                teardown()
+        log_msg('Benchmark %s: %.4fs' % (name, results[name]['median']))
+
+    baseline_file = os.path.join(path, BENCH_BASELINE)
+    regressions = []
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            regressions = compare(results, json.load(f))
+    with open(os.path.join(path, BENCH_REPORT), 'w') as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+    if save_baseline:
+        with open(baseline_file, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+    if regressions:
+        notification('Benchmark regressions: %s' % len(regressions))
+        for name in regressions:
+            log_msg('Benchmark regression %s: %.2fx' % (name, results[name]['ratio']))
+    else:
+        notification('Benchmarks successful')
+    log_msg('Benchmark results: %s' % len(results))
+    return regressions
@@ -0,0 +1,54 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Defines benchmarks of the sync module, against simulated plugins."""
+
+import xbmc  # pylint: disable=import-error
+
+from resources.lib.database import Database
+from resources.lib.sync import SyncEngine
+from resources.lib.sync import SyncApplier
+
+
+def bench_update_all():
+    """
+    Plan and apply an update of all synced directories, as SyncedMenu.update.
+
+    Needs the JSON-RPC handler of the stub xbmc module, so it only runs
+    with headless.py, the simulated directories are removed after it.
+    """
+    if not hasattr(xbmc, 'set_json_rpc_handler'):
+        return None
+    from resources.test.simulator import SHAPES, PluginSimulator, install
+    plugins = [
+        PluginSimulator(x, shows=20, seasons=5, episodes=10, movies=200) for x in SHAPES
+    ]
+    install(*plugins)
+    database = Database()
+    roots = []
+    for plugin in plugins:
+        database.add_item_to_synced('%s shows' % plugin.provider, plugin.tvshows_root, 'tvshow')
+        database.add_item_to_synced('%s movies' % plugin.provider, plugin.movies_root, 'movie')
+        roots.extend([plugin.tvshows_root, plugin.movies_root])
+    staged = []
+
+    def setup():
+        for _type in ['movie', 'tvshow']:
+            database.delete_items_from_table(
+                _type, [x['file'] for x in staged if x['type'] == _type]
+            )
+        del staged[:]
+
+    def run():
+        engine = SyncEngine(database)
+        synced_dirs = [x for x in engine.select() if x['file'] in roots]
+        plan = engine.plan(synced_dirs, refresh=True)
+        staged.extend(database.get_sync_pending_items())
+        SyncApplier(database).apply(plan)
+
+    def teardown():
+        setup()
+        for root in roots:
+            database.delete_dir_from_synced(root)
+        xbmc.set_json_rpc_handler(None)
+    return setup, run, teardown
@@ -0,0 +1,125 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Defines benchmarks of the utils, manipulator, database and filesystem modules."""
+
+import shutil
+import tempfile
+
+from os.path import join
+
+from resources.lib.utils import list_reorder
+from resources.lib.manipulator import Cleaner
+from resources.lib.database import Database
+from resources.lib.filesystem import CreateNfo
+from resources.lib.filesystem import create_stream_file
+
+BENCH_ITEMS = 5000
+BENCH_FILE = 'plugin://plugin.video.amazon-test/?mode=PlayVideo&asin=BENCH%sX1E%s'
+
+
+def episodes(shows=BENCH_ITEMS // 100, number=100):
+    """Return number episodes of each show, as listed by Amazon."""
+    return [
+        {
+            'filetype': 'file', 'type': 'episode', 'file': BENCH_FILE % (show, episode),
+            'label': 'Episode %s' % episode, 'title': 'Episode %s' % episode,
+            'showtitle': 'Show %s' % show, 'season': 1, 'episode': episode, 'year': 2020,
+        } for show in range(shows) for episode in range(1, number + 1)
+    ]
+
+
+def staged_episodes():
+    """Return the episodes of episodes as items of the tvshow table."""
+    return [
+        {
+            'file': x['file'], 'title': x['title'], 'type': 'tvshow', 'year': x['year'],
+            'showtitle': x['showtitle'], 'season': x['season'], 'episode': x['episode'],
+        } for x in episodes()
+    ]
+
+
+def bench_list_reorder():
+    """Reorder directories of 100 episodes."""
+    directories = [episodes(shows=1)] * (BENCH_ITEMS // 100)
+
+    def run():
+        for directory in directories:
+            list(list_reorder([dict(x) for x in directory], 'Show', sync_type='tvshow'))
+    return run
+
+
+def bench_cleaner_title():
+    """Clean titles of episodes with dirty showtitles, without memoization."""
+    titles = [
+        ('Show %s (Portuguese Dub) #%s - Episode: Part 1' % (x % 100, x),
+         'Show %s (Portuguese Dub)' % (x % 100))
+        for x in range(BENCH_ITEMS)
+    ]
+
+    def run():
+        cleaner = Cleaner(cache_size=0)
+        for title, showtitle in titles:
+            cleaner.title(title, showtitle)
+    return run
+
+
+def bench_cleaner_showtitle():
+    """Clean showtitles, repeated as in a sync, with memoization."""
+    showtitles = ['Show %s (Legendado) S1 [cc]' % (x % 100) for x in range(BENCH_ITEMS)]
+
+    def run():
+        cleaner = Cleaner()
+        for showtitle in showtitles:
+            cleaner.showtitle(showtitle)
+    return run
+
+
+def bench_db_insert():
+    """Stage episodes in bulk."""
+    database = Database()
+    jsonitems = staged_episodes()
+    files = [x['file'] for x in jsonitems]
+
+    def run():
+        database.add_content_items(jsonitems)
+
+    def teardown():
+        database.delete_items_from_table('tvshow', files)
+    return teardown, run, teardown
+
+
+def bench_db_select():
+    """Load staged episodes, all known paths and a path of each show."""
+    database = Database()
+    jsonitems = staged_episodes()
+    files = [x['file'] for x in jsonitems]
+
+    def setup():
+        database.add_content_items(jsonitems)
+
+    def run():
+        list(database.load_items(files))
+        database.get_known_paths()
+        for file in files[::100]:
+            database.path_exists(file)
+
+    def teardown():
+        database.delete_items_from_table('tvshow', files)
+    return setup, run, teardown
+
+
+def bench_write_files():
+    """Write a .strm and an .nfo file of each episode."""
+    items = episodes()[:BENCH_ITEMS // 5]
+    folder = tempfile.mkdtemp(prefix='bench-')
+
+    def run():
+        for index, item in enumerate(items):
+            path = join(folder, str(index))
+            create_stream_file(item['file'], path + '.strm')
+            CreateNfo('episodedetails', path + '.nfo', item)
+
+    def teardown():
+        shutil.rmtree(folder, ignore_errors=True)
+    return None, run, teardown
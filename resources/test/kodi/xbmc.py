@@ -0,0 +1,98 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in for the xbmc module of Kodi, used to run the addon headless.
+
+JSON-RPC calls are answered by the handler set with set_json_rpc_handler,
+i.e. a PluginSimulator, log messages are written to stderr from LOG_LEVEL.
+"""
+
+import sys
+import time
+
+import simplejson as json
+
+LOGDEBUG = 0
+LOGINFO = 1
+LOGWARNING = 2
+LOGERROR = 3
+LOGFATAL = 4
+LOGNONE = 5
+
+# Min level of the messages written to stderr
+LOG_LEVEL = LOGWARNING
+
+_JSON_RPC_HANDLER = None
+
+# Seconds since the last user input, see getGlobalIdleTime
+IDLE_TIME = 3600
+
+
+def set_json_rpc_handler(handler):
+    """Answer executeJSONRPC with handler, a function from request to response strings."""
+    global _JSON_RPC_HANDLER  # pylint: disable=global-statement
+    _JSON_RPC_HANDLER = handler
+
+
+def executeJSONRPC(request):  # pylint: disable=invalid-name
+    """Return the response of the handler, or an error if there is none."""
+    if _JSON_RPC_HANDLER:
+        return _JSON_RPC_HANDLER(request)
+    return json.dumps({
+        'jsonrpc': '2.0',
+        'id': 1,
+        'error': {'code': -32601, 'message': 'Method not found.'}
+    })
+
+
+def log(msg, level=LOGDEBUG):
+    """Write msg to stderr if level is at least LOG_LEVEL."""
+    if level >= LOG_LEVEL:
+        sys.stderr.write('%s\n' % msg)
+
+
+def sleep(msec):
+    """Sleep for msec milliseconds."""
+    time.sleep(msec / 1000.)
+
+
+def executebuiltin(function, wait=False):  # pylint: disable=invalid-name,unused-argument
+    """Ignore builtin functions, i.e. library scans."""
+
+
+def getInfoLabel(label):  # pylint: disable=invalid-name,unused-argument
+    """Return an empty info label."""
+    return ''
+
+
+def getLocalizedString(string_id):  # pylint: disable=invalid-name
+    """Return the id of a string of Kodi, there are no Kodi strings headless."""
+    return str(string_id)
+
+
+def getGlobalIdleTime():  # pylint: disable=invalid-name
+    """Return IDLE_TIME."""
+    return IDLE_TIME
+
+
+class Monitor(object):
+    """Monitor that is never asked to abort."""
+
+    def abortRequested(self):  # pylint: disable=invalid-name
+        """Return False."""
+        return False
+
+    def waitForAbort(self, timeout=None):  # pylint: disable=invalid-name
+        """Sleep for timeout seconds and return False."""
+        if timeout:
+            time.sleep(timeout)
+        return False
+
+
+class Player(object):
+    """Player that never plays."""
+
+    def isPlaying(self):  # pylint: disable=invalid-name
+        """Return False."""
+        return False
@@ -0,0 +1,100 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in for the xbmcaddon module of Kodi, used to run the addon headless.
+
+Settings have the defaults of resources/settings.xml, changed by SETTINGS,
+and strings are read from the en_gb strings.po of the addon.
+"""
+
+import os
+import re
+
+from xml.etree import ElementTree
+
+import xbmcvfs  # pylint: disable=import-error
+
+ADDON_PATH = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+# Settings changed from their defaults, i.e. by headless.py
+SETTINGS = dict()
+
+
+def _addon_info():
+    """Return the id, name and version in addon.xml."""
+    root = ElementTree.parse(os.path.join(ADDON_PATH, 'addon.xml')).getroot()
+    return {
+        'id': root.get('id'),
+        'name': root.get('name'),
+        'version': root.get('version'),
+    }
+
+
+def _default_settings():
+    """Return the default of each setting in settings.xml."""
+    root = ElementTree.parse(
+        os.path.join(ADDON_PATH, 'resources', 'settings.xml')
+    ).getroot()
+    return {
+        x.get('id'): x.get('default', '') for x in root.iter('setting') if x.get('id')
+    }
+
+
+def _strings():
+    """Return the en_gb strings of the addon by id."""
+    with open(os.path.join(
+            ADDON_PATH, 'resources', 'language', 'resource.language.en_gb', 'strings.po'
+    ), encoding='utf-8') as po_file:
+        return {
+            int(key): val for key, val in re.findall(
+                r'msgctxt "#(\d+)"\s*\nmsgid "(.*)"', po_file.read()
+            )
+        }
+
+
+class Addon(object):
+    """The addon in ADDON_PATH, with settings in SETTINGS."""
+
+    _info = None
+    _settings = None
+    _strings = None
+
+    def __init__(self, id=None):  # pylint: disable=redefined-builtin,unused-argument
+        """__init__ Addon."""
+        if Addon._info is None:
+            Addon._info = _addon_info()
+            Addon._settings = _default_settings()
+            Addon._strings = _strings()
+
+    def getAddonInfo(self, key):  # pylint: disable=invalid-name
+        """Return id, name, version, path or profile of the addon."""
+        if key == 'path':
+            return ADDON_PATH
+        if key == 'profile':
+            return xbmcvfs.translatePath(
+                'special://profile/addon_data/%s/' % self._info['id']
+            )
+        return self._info.get(key, '')
+
+    def getSetting(self, key):  # pylint: disable=invalid-name
+        """Return a setting as string."""
+        return str(SETTINGS.get(key, self._settings.get(key, '')))
+
+    def getSettingBool(self, key):  # pylint: disable=invalid-name
+        """Return a setting as bool."""
+        return self.getSetting(key).lower() == 'true'
+
+    def getSettingInt(self, key):  # pylint: disable=invalid-name
+        """Return a setting as int."""
+        return int(self.getSetting(key) or 0)
+
+    def setSetting(self, key, value):  # pylint: disable=invalid-name
+        """Change a setting for this process."""
+        SETTINGS[key] = value
+
+    def getLocalizedString(self, string_id):  # pylint: disable=invalid-name
+        """Return a string of the addon."""
+        return self._strings.get(string_id, '')
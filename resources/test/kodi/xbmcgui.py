@@ -0,0 +1,70 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in for the xbmcgui module of Kodi, used to run the addon headless.
+
+Dialogs are not shown, they return the answers in ANSWERS, so a headless
+run confirms every prompt and selects every entry by default.
+"""
+
+ANSWERS = {
+    'yesno': True,
+    'select': 0,
+    'input': '',
+}
+
+
+class Dialog(object):
+    """Dialog that answers without user input."""
+
+    def ok(self, heading, message):  # pylint: disable=unused-argument
+        """Return True."""
+        return True
+
+    def yesno(self, heading, message, *args, **kwargs):  # pylint: disable=unused-argument
+        """Return ANSWERS['yesno']."""
+        return ANSWERS['yesno']
+
+    def select(self, heading, _list, *args, **kwargs):  # pylint: disable=unused-argument
+        """Return ANSWERS['select']."""
+        return ANSWERS['select']
+
+    def multiselect(self, heading, options, *args, **kwargs):  # pylint: disable=unused-argument
+        """Return all options."""
+        return list(range(len(options)))
+
+    def input(self, heading, defaultt='', *args, **kwargs):  # pylint: disable=unused-argument
+        """Return defaultt, or ANSWERS['input']."""
+        return defaultt or ANSWERS['input']
+
+    def notification(self, heading, message, *args, **kwargs):  # pylint: disable=unused-argument
+        """Ignore notifications."""
+
+    def textviewer(self, heading, text, *args, **kwargs):  # pylint: disable=unused-argument
+        """Ignore the text."""
+
+
+class DialogProgress(object):
+    """Progress dialog that is never canceled."""
+
+    def create(self, heading, message=''):  # pylint: disable=unused-argument
+        """Ignore the dialog."""
+
+    def update(self, percent, message=''):  # pylint: disable=unused-argument
+        """Ignore the progress."""
+
+    def iscanceled(self):
+        """Return False."""
+        return False
+
+    def close(self):
+        """Ignore the dialog."""
+
+
+class DialogProgressBG(DialogProgress):
+    """Background progress dialog that is never finished by the user."""
+
+    def isFinished(self):  # pylint: disable=invalid-name
+        """Return False."""
+        return False
@@ -0,0 +1,46 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in for the xbmcvfs module of Kodi, used to run the addon headless.
+
+special:// paths are translated to folders in KODI_HOME, a temporary
+folder unless the environment variable of the same name is set.
+"""
+
+import os
+import tempfile
+
+KODI_HOME = os.environ.get('KODI_HOME') or tempfile.mkdtemp(prefix='kodi-')
+
+SPECIAL_PATHS = {
+    'special://home/': '',
+    'special://userdata/': 'userdata/',
+    'special://profile/': 'userdata/',
+    'special://masterprofile/': 'userdata/',
+    'special://temp/': 'temp/',
+}
+
+
+def translatePath(path):  # pylint: disable=invalid-name
+    """Return the path in KODI_HOME of a special:// path, other paths unchanged."""
+    for special, folder in SPECIAL_PATHS.items():
+        if path.startswith(special):
+            return os.path.join(KODI_HOME, folder, path[len(special):])
+    return path
+
+
+def validatePath(path):  # pylint: disable=invalid-name
+    """Return path unchanged."""
+    return path
+
+
+def exists(path):
+    """Return True if path exists."""
+    return os.path.exists(translatePath(path))
+
+
+def mkdirs(path):
+    """Create path and its parents, return True on success."""
+    os.makedirs(translatePath(path), exist_ok=True)
+    return True
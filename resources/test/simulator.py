@@ -0,0 +1,246 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic plugins answering Files.GetDirectory, used to run syncs headless.
+
+A PluginSimulator serves a tree of shows, seasons and episodes (and a
+directory of movies) with the URLs and fields of a real plugin, so the
+provider rules classify its items as they would classify the real ones.
+Install simulators with install, the stub xbmc module then sends each
+JSON-RPC request to the simulator of its plugin.
+"""
+
+import random
+
+from time import sleep
+from threading import Lock
+
+import simplejson as json
+
+import xbmc  # pylint: disable=import-error
+
+from resources.lib.utils import plugin_id
+
+# URLs of each directory and item, and Kodi types of directories, by provider
+SHAPES = {
+    'netflix': {
+        'plugin': 'plugin.video.netflix',
+        'shows': 'directory/genres/83/',
+        'movies': 'directory/genres/34399/',
+        'show': 'directory/show/{show}/',
+        'season': 'directory/show/{show}/season/{season}/',
+        'episode': 'play/show/{show}/season/{season}/episode/{episode}/',
+        'movie': 'play/movie/{movie}/',
+        'show_type': 'tvshow',
+        'season_type': 'unknown',
+    },
+    'amazon': {
+        'plugin': 'plugin.video.amazon-test',
+        'shows': '?mode=listCategories&url=tv',
+        'movies': '?mode=listCategories&url=movies',
+        'show': '?mode=listContent&asin=B{show}',
+        'season': '?mode=listContent&asin=B{show}X{season}',
+        'episode': '?mode=PlayVideo&asin=B{show}X{season}E{episode}',
+        'movie': '?mode=PlayVideo&asin=M{movie}',
+        'show_type': 'tvshow',
+        'season_type': 'season',
+    },
+    'disney': {
+        'plugin': 'plugin.video.disneyplus',
+        'shows': '?_=collection&slug=series',
+        'movies': '?_=collection&slug=movies',
+        'show': '?_=series&series_id={show}',
+        'season': '?_=season&series_id={show}&season_id={season}',
+        'episode': '?_=play&series_id={show}&season_id={season}&content_id={episode}',
+        'movie': '?_=play&family_id={movie}',
+        'show_type': 'tvshow',
+        'season_type': 'unknown',
+    },
+    'crunchyroll': {
+        'plugin': 'plugin.video.crunchyroll',
+        'shows': '?mode=genre&genre=all',
+        'movies': '?mode=genre&genre=movies',
+        'show': '?mode=series&series_id={show}',
+        'season': '?mode=episodes&series_id={show}&collection_id={season}',
+        'episode': '?mode=videoplay&series_id={show}&collection_id={season}&episode={episode}',
+        'movie': '?mode=videoplay&movie={movie}',
+        'show_type': 'tvshow',
+        'season_type': 'unknown',
+    },
+}
+
+
+class PluginSimulator(object):
+    """
+    A synthetic plugin of a provider in SHAPES.
+
+        shows, seasons, episodes: size of the tree of shows
+        movies: number of movies in the directory of movies
+        latency: seconds to list a directory
+        call_latency: seconds added to each call, a batch of requests is a single call
+        item_latency: seconds added to latency for each item listed
+        error_rate: probability (0 to 1) of a retryable error, as when a plugin fails
+        seed: seed of the errors, so runs can be repeated
+    """
+
+    def __init__(self, provider, shows=500, seasons=10, episodes=20, movies=1000,
+                 latency=0., item_latency=0., call_latency=0., error_rate=0., seed=0):
+        """__init__ PluginSimulator."""
+        self.provider = provider
+        self.shape = SHAPES[provider]
+        self.plugin = self.shape['plugin']
+        self.shows = shows
+        self.seasons = seasons
+        self.episodes = episodes
+        self.movies = movies
+        self.latency = latency
+        self.item_latency = item_latency
+        self.call_latency = call_latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.requests = 0
+        self.errors = 0
+        self._lock = Lock()
+        # kind and ids of the directories listed so far, by URL
+        self._directories = {
+            self.tvshows_root: ('shows', {}),
+            self.movies_root: ('movies', {}),
+        }
+
+    def url(self, kind, **ids):
+        """Return the URL of a directory or item of kind, i.e. 'season'."""
+        return 'plugin://%s/%s' % (self.plugin, self.shape[kind].format(**ids))
+
+    @property
+    def tvshows_root(self):
+        """Return the URL of the directory with all shows."""
+        return self.url('shows')
+
+    @property
+    def movies_root(self):
+        """Return the URL of the directory with all movies."""
+        return self.url('movies')
+
+    @property
+    def total_episodes(self):
+        """Return the number of episodes of all shows."""
+        return self.shows * self.seasons * self.episodes
+
+    def _item(self, filetype, _type, file, label, **fields):
+        """Return an item of a listing, with all properties a plugin can return."""
+        item = {
+            'filetype': filetype,
+            'type': _type,
+            'file': file,
+            'label': label,
+            'title': label,
+            'showtitle': '',
+            'season': -1,
+            'episode': -1,
+            'year': 2000,
+        }
+        item.update(fields)
+        return item
+
+    def _directory(self, kind, label, **ids):
+        """Return a directory item, so it can be listed later."""
+        url = self.url(kind, **ids)
+        self._directories[url] = (kind, ids)
+        if kind == 'show':
+            return self._item(
+                'directory', self.shape['show_type'], url, label, showtitle=label,
+                year=2000 + ids['show'] % 20
+            )
+        return self._item(
+            'directory', self.shape['season_type'], url, label, season=ids['season'],
+            year=2000 + ids['show'] % 20
+        )
+
+    def listing(self, path):
+        """Return all items of directory path, raise KeyError if it was not listed."""
+        kind, ids = self._directories[path]
+        if kind == 'shows':
+            return [
+                self._directory('show', 'Show %s' % show, show=show)
+                for show in range(self.shows)
+            ]
+        if kind == 'show':
+            return [
+                self._directory('season', 'Season %s' % season, season=season, **ids)
+                for season in range(1, self.seasons + 1)
+            ]
+        if kind == 'season':
+            return [
+                self._item(
+                    'file', 'episode', self.url('episode', episode=episode, **ids),
+                    'Episode %s' % episode, showtitle='Show %s' % ids['show'],
+                    season=ids['season'], episode=episode, year=2000 + ids['show'] % 20
+                ) for episode in range(1, self.episodes + 1)
+            ]
+        return [
+            self._item('file', 'movie', self.url('movie', movie=movie), 'Movie %s' % movie)
+            for movie in range(self.movies)
+        ]
+
+    def get_directory(self, request):
+        """Return the response to a single Files.GetDirectory request."""
+        path = request['params']['directory']
+        properties = set(request['params'].get('properties', []))
+        with self._lock:
+            self.requests += 1
+            error = self.error_rate and self.random.random() < self.error_rate
+            self.errors += bool(error)
+        if error:
+            return {
+                'jsonrpc': '2.0', 'id': request.get('id'),
+                'error': {'code': -32602, 'message': 'Invalid params.'}
+            }
+        try:
+            files = self.listing(path)
+        except KeyError:
+            return {
+                'jsonrpc': '2.0', 'id': request.get('id'),
+                'error': {'code': -32602, 'message': 'Invalid params.'}
+            }
+        sleep(self.latency + self.item_latency * len(files))
+        # only the requested properties, as Kodi does
+        keys = properties | {'filetype', 'type', 'file', 'label'}
+        return {
+            'jsonrpc': '2.0', 'id': request.get('id'),
+            'result': {
+                'files': [{x: y for x, y in item.items() if x in keys} for item in files],
+                'limits': {'start': 0, 'end': len(files), 'total': len(files)},
+            }
+        }
+
+    def handle(self, request):
+        """Return the response string to a request string, a single request or a batch."""
+        with self._lock:
+            self.calls += 1
+        sleep(self.call_latency)
+        request = json.loads(request)
+        if isinstance(request, list):
+            # Kodi runs the requests of a batch one after the other
+            return json.dumps([self.get_directory(x) for x in request])
+        return json.dumps(self.get_directory(request))
+
+    def __str__(self):
+        """Return a summary of the requests, used in logs."""
+        return '%s: %s calls, %s directories, %s errors' % (
+            self.plugin, self.calls, self.requests, self.errors
+        )
+
+
+def install(*simulators):
+    """Answer JSON-RPC requests of the stub xbmc module with the simulator of each plugin."""
+    by_plugin = {x.plugin: x for x in simulators}
+
+    def handle(request):
+        """Send request to the simulator of the plugin of its directory."""
+        first = json.loads(request)
+        if isinstance(first, list):
+            first = first[0]
+        return by_plugin[plugin_id(first['params']['directory'])].handle(request)
+    xbmc.set_json_rpc_handler(handle)
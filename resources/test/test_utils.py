@@ -4,16 +4,53 @@
 """Defines class for testing utils module."""
 
 import unittest
+import simplejson as json
+import xbmc  # pylint: disable=import-error
 import xbmcaddon  # pylint: disable=import-error
 
+from concurrent.futures import Future
+
 from resources.lib.version import Version
 from resources.lib.utils import re_search
+from resources.lib.utils import plugin_id
+from resources.lib.utils import skip_filter
+from resources.lib.utils import SKIP_STRINGS
+from resources.lib.utils import normalize_url
+from resources.lib.utils import compile_patterns
+from resources.lib.utils import JSONRPCError
+from resources.lib.utils import list_reorder
+from resources.lib.utils import JSON_RPC_PROPERTIES
+from resources.lib.utils import JSON_RPC_PROPERTY_PRESETS
+from resources.lib.throttle import Throttle
+from resources.lib.providers import get_provider
+from resources.lib.pluginhost import PluginHost
+from resources.lib.pluginhost import CircuitBreaker
+from resources.lib.pluginhost import PluginUnavailable
 from resources.lib.manipulator import Cleaner, clean_name
 
 from resources import ADDON_NAME, ADDON_VERSION
 
 from resources.lib.database import Database
-from resources.lib.log import logged_function
+from resources.lib.database import MIGRATIONS
+from resources.lib.items.blocked import BlockedItem
+from resources.lib.items.blocked import BlockedMatcher
+from resources.lib.items.synced import SyncedItem
+from resources.lib.crawler import CrawlJob
+from resources.lib.crawler import CrawlBudget
+from resources.lib.crawler import DirectoryCrawler
+from resources.lib.crawler import CrawlBudgetExceeded
+from resources.lib.crawler import fetch_directories
+from resources.lib.pipeline import stage
+from resources.lib.pipeline import batched
+from resources.lib.pipeline import Deduplicator
+from resources.lib.pipeline import new_contentitems
+from resources.lib.sync import SyncPlan
+from resources.lib.sync import SyncEngine
+from resources.lib.sync import SyncApplier
+from resources.lib.sync import SyncCheckpoint
+from resources.lib.trace import traced
+from resources.lib.trace import Tracer
+from resources.lib.trace import percentile
 
 TESTE_MOVIE_QUERY = '''
                         INSERT OR IGNORE INTO
@@ -60,7 +97,7 @@ TESTE_BLOCKED_QUERY = '''
 
 class TestUtils(unittest.TestCase):
     """Test cases for utils module."""
-    @logged_function
+    @traced
     def test_title_cleaner(self):
         cleaner = Cleaner()
         # db = Database()
@@ -96,7 +133,18 @@ class TestUtils(unittest.TestCase):
         # for key, value in test_names.items():
         #     self.assertEqual(clean_name(key), value)
 
-    @logged_function
+    @traced
+    def test_cleaner_passes(self):
+        cleaner = Cleaner()
+        # Patterns that match the replacements of previous patterns
+        self.assertEqual(cleaner.showtitle('Movie: Part.1'), 'Movie Part One')
+        self.assertEqual(cleaner.showtitle('Show (Leg)S1 Title'), 'Show Title')
+        self.assertEqual(cleaner.title('A.Title  [cc]'), 'A Title')
+        self.assertEqual(clean_name('Show$: Final Season'), 'Show')
+        cleaner.showtitle('Show (Leg)S1 Title')
+        self.assertEqual(cleaner._clean.cache_info().hits, 1)
+
+    @traced
     def test_db_if_is_blocked(self):
         db = Database()
         db.cur.execute(TESTE_BLOCKED_QUERY)
@@ -111,7 +159,31 @@ class TestUtils(unittest.TestCase):
             FAKE_BLOCK_TESTE['notexit']), None)
         db.delete_entrie_from_blocked(FAKE_BLOCK_TESTE['exist'], 'tvshow')
 
-    @logged_function
+    @traced
+    def test_blocked_matcher(self):
+        matcher = BlockedMatcher([
+            BlockedItem('Karakuri Circus', 'tvshow'),
+            BlockedItem('A Vida em um Ano', 'movie'),
+            BlockedItem('trailer', 'keyword'),
+        ])
+        self.assertTrue(matcher.is_blocked('Karakuri Circus', 'tvshow'))
+        self.assertTrue(matcher.is_blocked('Karakuri Circus'))
+        self.assertFalse(matcher.is_blocked('Karakuri Circus', 'movie'))
+        self.assertTrue(matcher.is_blocked('Official Trailer 2', 'movie'))
+        self.assertFalse(matcher.is_blocked('To Your Eternity', 'tvshow'))
+        self.assertFalse(matcher.is_blocked(None))
+
+    @traced
+    def test_db_blocked_matcher_invalidation(self):
+        db = Database()
+        value = 'I am blocked only after being added'
+        self.assertFalse(db.blocked_matcher.is_blocked(value, 'movie'))
+        db.add_blocked_item(value, 'movie')
+        self.assertTrue(db.blocked_matcher.is_blocked(value, 'movie'))
+        db.delete_entrie_from_blocked(value, 'movie')
+        self.assertFalse(db.blocked_matcher.is_blocked(value, 'movie'))
+
+    @traced
     def test_db_path_exists(self):
         db = Database()
         db.cur.execute(TESTE_MOVIE_QUERY)
@@ -133,7 +205,395 @@ class TestUtils(unittest.TestCase):
         db.delete_item_from_table('movie', FAKE_FILE_TESTE['movie'])
         db.delete_item_from_table('tvshow', FAKE_FILE_TESTE['tvshow'])
 
-    @logged_function
+    @traced
+    def test_db_get_known_paths(self):
+        db = Database()
+        db.cur.execute(TESTE_MOVIE_QUERY)
+        db.cur.execute(TESTE_SHOW_QUERY)
+        db.conn.commit()
+        known_paths = db.get_known_paths()
+        for _type, file in [
+                ('movie', 'plugin://plugin.video.amazon-test/?mode=PlayVideo&name=123_movie'),
+                ('tvshow', 'plugin://plugin.video.amazon-test/?mode=PlayVideo&name=xyz_tvshow')]:
+            self.assertEqual(known_paths[file], db.path_exists(file))
+            db.delete_item_from_table(_type, file)
+
+    @traced
+    def test_db_add_content_items(self):
+        db = Database()
+        FAKE_FILES = [
+            'plugin://plugin.video.amazon-test/?mode=PlayVideo&name=batch_movie_%s' % x
+            for x in range(3)
+        ]
+        items = [
+            {'file': file, 'title': 'Batch movie', 'type': 'movie', 'year': '2020'}
+            for file in FAKE_FILES
+        ]
+        added = []
+        db._auto_add_to_library = lambda jsondata: added.append(jsondata['file'])
+        # duplicated rows are ignored and not counted
+        self.assertEqual(db.add_content_items(items + items[:1]), 3)
+        self.assertEqual(added, FAKE_FILES)
+        # rows already staged are not added to library again
+        self.assertEqual(db.add_content_items(items), 0)
+        self.assertEqual(added, FAKE_FILES)
+        for file in FAKE_FILES:
+            self.assertEqual(db.path_exists(file), ['movie', 'staged'])
+            db.delete_item_from_table('movie', file)
+        self.assertEqual(db.add_content_items([]), 0)
+        # a transaction of the caller is left open, to commit or roll back
+        db.cur.execute('BEGIN')
+        self.assertEqual(db.add_content_items(items), 3)
+        self.assertTrue(db.conn.in_transaction)
+        db.conn.rollback()
+        for file in FAKE_FILES:
+            self.assertIsNone(db.path_exists(file))
+
+    @traced
+    def test_pipeline_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batched([], 2)), [])
+
+    @traced
+    def test_pipeline_stage(self):
+        db = Database()
+        FAKE_FILES = [
+            'plugin://plugin.video.amazon-test/?mode=PlayVideo&name=stream_episode_%s' % x
+            for x in range(3)
+        ]
+        # a generator, the same item found in two directories is staged once
+        items = (
+            {
+                'file': file, 'title': 'Episode %s' % index, 'type': 'tvshow',
+                'year': '2020', 'showtitle': 'Stream show', 'season': 1, 'episode': index
+            } for index, file in enumerate(FAKE_FILES + FAKE_FILES[:1])
+        )
+        known_paths = db.get_known_paths()
+        self.assertEqual(stage(new_contentitems(items, known_paths), db, size=2), 3)
+        for file in FAKE_FILES:
+            self.assertEqual(known_paths[file], ['tvshow', 'staged'])
+            self.assertEqual(db.path_exists(file), ['tvshow', 'staged'])
+            db.delete_item_from_table('tvshow', file)
+
+    @traced
+    def test_pipeline_dedup(self):
+        FILE = 'plugin://plugin.video.netflix/play/%s/'
+        items = [
+            {'file': FILE % 1, 'type': 'tvshow', 'showtitle': 'Dark', 'season': 1, 'episode': 1},
+            # the same url in another form, from an overlapping directory
+            {'file': FILE % 1 + '?', 'type': 'tvshow', 'showtitle': 'Dark', 'season': 1, 'episode': 1},
+            # another url to the same episode
+            {'file': FILE % 2, 'type': 'tvshow', 'showtitle': 'Dark (Dub PT)', 'season': 1, 'episode': 1},
+            {'file': FILE % 3, 'type': 'tvshow', 'showtitle': 'Dark', 'season': 1, 'episode': 2},
+            {'file': FILE % 4, 'type': 'movie', 'title': 'Dark', 'year': 2017},
+            {'file': FILE % 5, 'type': 'movie', 'title': 'Dark', 'year': 2005},
+            {'file': FILE % 6, 'type': 'movie', 'title': 'Dark', 'year': 2005},
+        ]
+        deduplicator = Deduplicator()
+        self.assertEqual(
+            [x['file'] for x in deduplicator.filter(items)],
+            [FILE % x for x in [1, 3, 4, 5]]
+        )
+        self.assertEqual((deduplicator.same_url, deduplicator.same_item), (1, 2))
+
+    @traced
+    def test_crawler_visited_depth_budget(self):
+        ROOT = 'plugin://plugin.video.netflix/directory/genres/%s/'
+
+        def entry(filetype, _type, file, label):
+            return {
+                'file': file, 'filetype': filetype, 'type': _type, 'label': label,
+                'title': label, 'year': 2020, 'showtitle': '', 'season': -1, 'episode': -1
+            }
+        LISTINGS = {
+            ROOT % 1: [
+                ('file', 'movie', ROOT % 1 + '?movie=a'),
+                ('directory', 'tvshow', ROOT % 2),
+                # the same directory in another form, must not loop
+                ('directory', 'tvshow', 'PLUGIN://plugin.video.netflix/directory/genres/1'),
+            ],
+            ROOT % 2: [
+                ('file', 'movie', ROOT % 2 + '?movie=b'),
+                ('directory', 'tvshow', ROOT % 1),
+                ('directory', 'tvshow', ROOT % 3),
+            ],
+            ROOT % 3: [
+                ('file', 'movie', ROOT % 3 + '?movie=c'),
+                ('directory', 'tvshow', ROOT % 4),
+            ],
+            ROOT % 4: [('file', 'movie', ROOT % 4 + '?movie=d')],
+        }
+
+        class FakeCrawler(DirectoryCrawler):
+            def _schedule(self, pool, job):
+                future = Future()
+                future.set_result([
+                    entry(*x, label='Item %s' % index)
+                    for index, x in enumerate(LISTINGS[job.path])
+                ])
+                return future, False
+        crawler = FakeCrawler(sync_type='all_items', max_depth=3)
+        files = [x['file'] for x in crawler.crawl(ROOT % 1)]
+        self.assertEqual(files, [
+            ROOT % 1 + '?movie=a', ROOT % 2 + '?movie=b', ROOT % 3 + '?movie=c'
+        ])
+        self.assertEqual(crawler.directories_revisited, 2)
+        self.assertEqual(crawler.directories_too_deep, 1)
+        errors = []
+        crawler = FakeCrawler(
+            sync_type='all_items', budget=CrawlBudget(directories=2, items=0, seconds=0),
+            on_error=lambda path, error: errors.append((path, type(error)))
+        )
+        self.assertEqual(len(list(crawler.crawl(ROOT % 1))), 2)
+        self.assertEqual(errors, [(ROOT % 1, CrawlBudgetExceeded)])
+        errors = []
+        crawler = FakeCrawler(
+            sync_type='all_items', budget=CrawlBudget(stop=lambda: 'playback started'),
+            on_error=lambda path, error: errors.append((path, str(error)))
+        )
+        self.assertEqual(list(crawler.crawl(ROOT % 1)), [])
+        self.assertEqual(errors, [(ROOT % 1, 'playback started')])
+
+        class MalformedCrawler(FakeCrawler):
+            def _schedule(self, pool, job):
+                if job.path != ROOT % 2:
+                    return super(MalformedCrawler, self)._schedule(pool, job)
+                future = Future()
+                future.set_exception(KeyError('files'))
+                return future, False
+        errors = []
+        crawler = MalformedCrawler(
+            sync_type='all_items', on_error=lambda path, error: errors.append((path, type(error)))
+        )
+        self.assertEqual([x['file'] for x in crawler.crawl(ROOT % 1)], [ROOT % 1 + '?movie=a'])
+        self.assertEqual(errors, [(ROOT % 2, JSONRPCError)])
+        self.assertEqual(crawler.listings_failed, 1)
+        # seasons are listed with their own properties, shows with the others
+        crawler = DirectoryCrawler(
+            properties=JSON_RPC_PROPERTY_PRESETS['tvshow'],
+            season_properties=JSON_RPC_PROPERTY_PRESETS['episode']
+        )
+        self.assertEqual(
+            crawler._properties(CrawlJob(ROOT % 1, 2, 'Show', False, 2020)),
+            JSON_RPC_PROPERTY_PRESETS['tvshow']
+        )
+        self.assertEqual(
+            crawler._properties(CrawlJob(ROOT % 2, 3, 'Show', 1, 2020)),
+            JSON_RPC_PROPERTY_PRESETS['episode']
+        )
+        self.assertEqual(
+            normalize_url('plugin://Plugin.Video.X/dir/?b=2&a=1'),
+            normalize_url('plugin://plugin.video.x/dir?a=1&b=2')
+        )
+
+    @traced
+    def test_json_rpc_batch(self):
+        PATH = 'plugin://plugin.video.batch-test/directory/%s/'
+
+        def execute(request):
+            # responses in any order, demultiplexed by id
+            responses = []
+            for call in reversed(json.loads(request)):
+                if call['params']['directory'] == PATH % 'error':
+                    responses.append({'id': call['id'], 'error': {'code': -32601, 'message': 'x'}})
+                else:
+                    responses.append({'id': call['id'], 'result': {
+                        'files': [{'file': call['params']['directory'] + 'item'}]
+                    }})
+            return json.dumps(responses)
+        paths = [PATH % 'a', PATH % 'error', PATH % 'b', PATH % 'cancelled']
+        futures = [Future() for _ in paths]
+        futures[3].cancel()
+        execute_json_rpc = xbmc.executeJSONRPC
+        xbmc.executeJSONRPC = execute
+        try:
+            fetch_directories(paths, futures)
+        finally:
+            xbmc.executeJSONRPC = execute_json_rpc
+        self.assertEqual(futures[0].result(), [{'file': PATH % 'a' + 'item'}])
+        self.assertEqual(futures[2].result(), [{'file': PATH % 'b' + 'item'}])
+        self.assertIsInstance(futures[1].exception(), JSONRPCError)
+        self.assertTrue(futures[3].cancelled())
+
+    @unittest.skipUnless(hasattr(xbmc, 'set_json_rpc_handler'), 'needs headless.py')
+    @traced
+    def test_simulated_providers(self):
+        from resources.test.simulator import SHAPES, PluginSimulator, install
+        plugins = [PluginSimulator(x, shows=3, seasons=2, episodes=4, movies=5) for x in SHAPES]
+        install(*plugins)
+        try:
+            for plugin in plugins:
+                episodes = list(
+                    DirectoryCrawler(sync_type='tvshow').crawl(plugin.tvshows_root)
+                )
+                self.assertEqual(len(episodes), plugin.total_episodes)
+                self.assertEqual(
+                    (episodes[-1]['showtitle'], episodes[-1]['season'], episodes[-1]['episode']),
+                    ('Show 2', 2, 4)
+                )
+                movies = list(DirectoryCrawler(sync_type='movie').crawl(plugin.movies_root))
+                self.assertEqual(len(movies), plugin.movies)
+        finally:
+            xbmc.set_json_rpc_handler(None)
+
+    @unittest.skipUnless(hasattr(xbmc, 'set_json_rpc_handler'), 'needs headless.py')
+    @traced
+    def test_sync_blocked_show(self):
+        from resources.test.simulator import PluginSimulator, install
+        plugin = PluginSimulator('amazon', shows=3, seasons=2, episodes=2, movies=0)
+        install(plugin)
+        db = Database()
+        db.add_item_to_synced('Blocked show', plugin.tvshows_root, 'tvshow')
+        db.add_blocked_item('Show 1', 'tvshow')
+        try:
+            directory = [x for x in db.get_synced_dirs() if x['file'] == plugin.tvshows_root]
+            plan = SyncEngine(db).plan(directory, refresh=True)
+            self.assertEqual(
+                sorted(set(x['showtitle'] for x in db.get_sync_pending_items())),
+                ['Show 0', 'Show 2']
+            )
+            # the root and the 2 seasons of the 2 shows not blocked
+            self.assertEqual(plugin.requests, 1 + 2 * 3)
+            self.assertEqual(plan.blocked, 1)
+        finally:
+            xbmc.set_json_rpc_handler(None)
+            db.delete_entrie_from_blocked('Show 1', 'tvshow')
+            db.delete_dir_from_synced(plugin.tvshows_root)
+
+    @traced
+    def test_sync_plan_apply(self):
+        db = Database()
+        FAKE_FILES = [
+            'plugin://plugin.video.amazon-test/?mode=PlayVideo&name=plan_episode_%s' % x
+            for x in range(3)
+        ]
+        jsonitems = [
+            {
+                'file': file, 'title': 'Episode %s' % index, 'type': 'tvshow',
+                'year': '2020', 'showtitle': 'Plan show', 'season': 1, 'episode': index
+            } for index, file in enumerate(FAKE_FILES)
+        ]
+        stage(new_contentitems(jsonitems[:2], db.get_known_paths()), db)
+        plan = SyncPlan(db.new_sync_generation(), 'tvshow')
+        self.assertFalse(plan)
+        plan.to_remove = FAKE_FILES[:1]
+        db.add_sync_pending_items(new_contentitems(jsonitems, db.get_known_paths()))
+        plan.new = len(db.get_sync_pending_files())
+        self.assertTrue(plan)
+        self.assertEqual(plan.new, 1)
+        self.assertEqual(len(list(db.load_items(FAKE_FILES))), 2)
+        SyncApplier(db).apply(plan)
+        self.assertIn('remove', plan.timings)
+        self.assertIn('stage', plan.timings)
+        self.assertEqual(db.load_item(FAKE_FILES[0]), None)
+        self.assertEqual(db.load_item(FAKE_FILES[2])['file'], FAKE_FILES[2])
+        self.assertEqual(db.get_sync_pending_items(), [])
+        for file in FAKE_FILES:
+            db.delete_item_from_table('tvshow', file)
+
+    @traced
+    def test_sync_checkpoint_resume(self):
+        db = Database()
+        checkpoint = SyncCheckpoint.load(db, 'tvshow')
+        generation = checkpoint.plan.generation
+        checkpoint.done.append('plugin://plugin.video.netflix/directory/genres/83/')
+        checkpoint.current = 'plugin://plugin.video.netflix/directory/genres/81/'
+        contentitem = {'file': 'plugin://plugin.video.netflix/play/1/', 'type': 'tvshow'}
+        list(checkpoint.new([contentitem]))
+        frontier = [['plugin://plugin.video.netflix/directory/show/1/', 2, 'Show', False, 2020]]
+        checkpoint.save(frontier)
+        resumed = SyncCheckpoint.load(db, 'tvshow')
+        self.assertEqual(resumed.plan.generation, generation)
+        self.assertEqual(resumed.done, checkpoint.done)
+        self.assertEqual(resumed.current, checkpoint.current)
+        self.assertEqual(resumed.frontier, frontier)
+        self.assertEqual(resumed.plan.new, 1)
+        # new items are kept until the plan is applied or a new plan starts
+        resumed.clear()
+        self.assertEqual(db.get_sync_checkpoint(), None)
+        self.assertEqual(db.get_sync_pending_items(), [contentitem])
+        SyncCheckpoint.load(db, 'tvshow')
+        self.assertEqual(db.get_sync_pending_items(), [])
+
+    @traced
+    def test_db_migrations(self):
+        db = Database()
+        self.assertEqual(db.migrate(), len(MIGRATIONS))
+        self.assertEqual(
+            db.cur.execute('PRAGMA user_version').fetchone()[0],
+            len(MIGRATIONS)
+        )
+
+    @traced
+    def test_db_sync_generation_sweep(self):
+        db = Database()
+        FAKE_FILES = [
+            'plugin://plugin.video.amazon-test/?mode=PlayVideo&name=sweep_%s' % x
+            for x in range(2)
+        ]
+        db.add_content_items([
+            {'file': file, 'title': 'Sweep movie', 'type': 'movie', 'year': '2020'}
+            for file in FAKE_FILES
+        ])
+        for file in FAKE_FILES:
+            db.update_status_in_database(file, 'movie', 'managed')
+        generation = db.new_sync_generation()
+        self.assertGreater(db.new_sync_generation(), generation)
+        generation = db.new_sync_generation()
+        db.mark_paths_seen(FAKE_FILES[:1], generation)
+        unseen = db.get_unseen_paths(generation, _type='movie')
+        self.assertNotIn(FAKE_FILES[0], unseen)
+        self.assertIn(FAKE_FILES[1], unseen)
+        for file in FAKE_FILES:
+            db.delete_item_from_table('movie', file)
+
+    @traced
+    def test_sync_partial_sweep(self):
+        db = Database()
+        FAKE_FILE = 'plugin://plugin.video.amazon-test/?mode=PlayVideo&name=partial_sweep'
+        FAKE_DIR = 'plugin://plugin.video.amazon-test/?mode=Browse&name=partial_sweep'
+        db.add_content_items([
+            {'file': FAKE_FILE, 'title': 'Sweep movie', 'type': 'movie', 'year': '2020'}
+        ])
+        db.update_status_in_database(FAKE_FILE, 'movie', 'managed')
+        db.add_item_to_synced('Partial sweep', FAKE_DIR, 'movie')
+        try:
+            # the item could come from the directory not updated
+            plan = SyncEngine(db).plan([], _type='movie')
+            self.assertEqual(plan.to_remove, [])
+        finally:
+            db.delete_dir_from_synced(FAKE_DIR)
+            db.delete_item_from_table('movie', FAKE_FILE)
+
+    @traced
+    def test_db_listing_cache(self):
+        db = Database()
+        path = 'plugin://plugin.video.amazon-test/?mode=listing_cache_test'
+        files = [{'file': path + '&name=1', 'label': 'Item 1'}]
+        db.set_cached_listing(path, files, 'fingerprint', 1.0)
+        self.assertEqual(db.get_cached_listing(path), (files, 'fingerprint', 1.0))
+        # same fingerprint only updates the fetch time
+        db.set_cached_listing(path, files, 'fingerprint', 2.0)
+        self.assertEqual(db.get_cached_listing(path)[2], 2.0)
+        db.clear_listing_cache()
+        self.assertEqual(db.get_cached_listing(path), None)
+
+    @traced
+    def test_synced_next_update(self):
+        directory = 'plugin://plugin.video.netflix/directory/genres/83/'
+        self.assertEqual(SyncedItem(directory, 'Séries', 'tvshow').next_update, None)
+        self.assertEqual(
+            SyncedItem(directory, 'Séries', 'tvshow', update_interval=6).next_update,
+            6 * 3600
+        )
+        self.assertEqual(
+            SyncedItem(
+                directory, 'Séries', 'tvshow', update_interval=6, last_update=100.0
+            ).next_update,
+            100.0 + 6 * 3600
+        )
+
+    @traced
     def test_re_search(self):
         item = {
             "type": "unknown",
@@ -164,7 +624,214 @@ class TestUtils(unittest.TestCase):
         self.assertNotEqual(
             re_search(item2['label'], ['season', 'temporada', r'S\d{1,4}']), True)
 
-    @logged_function
+    @traced
+    def test_compile_patterns(self):
+        self.assertIs(compile_patterns(SKIP_STRINGS), compile_patterns(SKIP_STRINGS))
+        self.assertIs(compile_patterns(['a', 'b']), compile_patterns(('a', 'b')))
+        self.assertFalse(compile_patterns([]).search('anything'))
+        items = [
+            {'label': 'Official TRAILER'},
+            {'label': 'Episódio #1.5'},
+            {'label': 'Stranger Things'},
+            {'label': 'Resumo da temporada'},
+        ]
+        self.assertEqual(
+            list(skip_filter(items, 'label', SKIP_STRINGS)), [{'label': 'Stranger Things'}]
+        )
+
+    @traced
+    def test_plugin_id(self):
+        self.assertEqual(
+            plugin_id('plugin://plugin.video.netflix/directory/show/80057281/'),
+            'plugin.video.netflix'
+        )
+        self.assertEqual(
+            plugin_id('plugin://plugin.video.crunchyroll?mode=series&id=1'),
+            'plugin.video.crunchyroll'
+        )
+
+    @traced
+    def test_throttle(self):
+        throttle = Throttle(60)
+        self.assertTrue(throttle.ready())
+        self.assertFalse(throttle.ready())
+        self.assertTrue(throttle.ready(force=True))
+
+    @traced
+    def test_provider_rules(self):
+        self.assertEqual(get_provider('plugin.video.netflix').name, 'netflix')
+        self.assertEqual(get_provider('plugin.video.amazon-test').name, 'amazon')
+        self.assertEqual(get_provider('plugin.video.youtube'), None)
+        years = []
+        season = {
+            'file': 'plugin://plugin.video.netflix/directory/show/80057281/season/80077209/',
+            'filetype': 'directory', 'type': 'unknown', 'label': 'Temporada 2',
+            'showtitle': '', 'season': 2, 'episode': -1, 'year': 2017, 'number': 1
+        }
+        self.assertEqual(
+            get_provider('plugin.video.netflix').classify(season, 'Stranger Things', years), 2
+        )
+        self.assertEqual(season['type'], 'season')
+        self.assertEqual(season['showtitle'], 'Stranger Things')
+        self.assertNotIn('episode', season)
+        self.assertEqual(years, [2017])
+        # a genre directory is not classified as a season
+        movie_dir = {
+            'file': 'plugin://plugin.video.netflix/directory/genres/34399/',
+            'filetype': 'directory', 'type': 'unknown', 'label': 'Ação',
+            'showtitle': '', 'season': -1, 'episode': -1, 'year': 1601, 'number': 2
+        }
+        self.assertEqual(get_provider('plugin.video.netflix').classify(movie_dir, '', []), None)
+
+    @traced
+    def test_property_presets(self):
+        # items only have the properties of their preset
+        amazon = get_provider('plugin.video.amazon-test')
+        show = {
+            'file': 'plugin://plugin.video.amazon-test/?mode=list&show=1',
+            'filetype': 'directory', 'type': 'tvshow', 'label': 'The Boys', 'number': 1,
+            'title': 'The Boys', 'year': 2019
+        }
+        # the show rule needs the episode, the season rule the label of a season
+        self.assertEqual(amazon.classify(show, '', []), None)
+        show.update(episode=-1, season=-1)
+        self.assertEqual(amazon.classify(show, '', []), 1)
+        self.assertNotIn('season', show)
+        movies = list(list_reorder([{
+            'file': 'plugin://plugin.video.amazon-test/?mode=PlayVideo&name=1',
+            'filetype': 'file', 'type': 'movie', 'label': 'Movie',
+            'title': 'Movie', 'year': 1601
+        }], showtitle=False, year=2020, sync_type='movie'))
+        self.assertEqual(movies[0]['year'], 2020)
+        for properties in JSON_RPC_PROPERTY_PRESETS.values():
+            self.assertTrue(set(properties).issubset(JSON_RPC_PROPERTIES))
+
+    @traced
+    def test_plugin_host_concurrency(self):
+        host = PluginHost('plugin.video.netflix')
+        limit = host.limit
+        for _ in range(10):
+            host.acquire()
+            host.release(0.1)
+        self.assertGreater(host.limit, limit)
+        limit = host.limit
+        host.acquire()
+        host.release(0.1, error=True)
+        self.assertEqual(host.limit, limit / 2)
+        self.assertEqual(host.in_flight, 0)
+        self.assertEqual(host.stats.requests, 11)
+        self.assertEqual(host.stats.errors, 1)
+
+    @traced
+    def test_circuit_breaker(self):
+        breaker = CircuitBreaker(failures=2, cooldown=0)
+        breaker.failure()
+        self.assertFalse(breaker.is_open)
+        breaker.failure()
+        self.assertTrue(breaker.is_open)
+        # after cooldown only one trial request is allowed
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.success()
+        self.assertFalse(breaker.is_open)
+        host = PluginHost('plugin.video.amazon')
+        host.breaker = CircuitBreaker(failures=1, cooldown=60)
+        host.acquire()
+        host.release(0.1, error=True)
+        self.assertRaises(PluginUnavailable, host.acquire)
+
+    @traced
+    def test_sync_metrics(self):
+        from resources.lib.metrics import SyncMetrics, run_report
+        db = Database()
+        metrics = SyncMetrics(db, 'movie')
+        db.add_content_items([
+            {'file': 'plugin://plugin.video.amazon-test/?metrics_movie', 'title': 'Metrics',
+             'type': 'movie', 'year': '2020'}
+        ])
+        db.delete_item_from_table('movie', 'plugin://plugin.video.amazon-test/?metrics_movie')
+        plan = SyncPlan(0, 'movie')
+        plan.seen = 2
+        plan.blocked = 1
+        plan.timings['crawl'] = 1.5
+        plan.staged = 3
+        result = metrics.finish(plan)
+        self.assertGreaterEqual(result['statements'], 4)
+        self.assertEqual(result['commits'], 2)
+        # the time of the run, not the sum of the timings of the plan
+        self.assertLess(result['seconds'], 1.5)
+        self.assertEqual(result['to_stage'], 3)
+        self.assertFalse(result['applied'])
+        self.assertEqual(db.get_sync_runs(1)[0], result)
+        self.assertIn('1 blocked', run_report(result))
+        # statements after finish are not counted
+        db.get_known_paths()
+        self.assertEqual(metrics.statements, result['statements'])
+        db.cur.execute('DELETE FROM sync_runs WHERE started = ?', (result['started'],))
+        db.conn.commit()
+
+    @traced
+    def test_save_profile(self):
+        import os
+        import shutil
+        import cProfile
+        import tempfile
+        from resources.lib import profiler
+        folder = tempfile.mkdtemp()
+        kept = profiler.PROFILES_KEPT
+        profiler.PROFILES_KEPT = 1
+        try:
+            for name in ['first', 'second']:
+                profile = cProfile.Profile()
+                profile.runcall(sorted, range(100))
+                path = profiler.save_profile(profile, name, 1.5, folder)
+            with open(path + '.txt') as summary:
+                self.assertIn('second: 1.50s', summary.read())
+            # only the last profile is kept, names start with the date
+            self.assertEqual(
+                sorted(os.listdir(folder)),
+                [os.path.basename(path) + '.prof', os.path.basename(path) + '.txt']
+            )
+        finally:
+            profiler.PROFILES_KEPT = kept
+            shutil.rmtree(folder)
+
+    @traced
+    def test_tracer(self):
+        tracer = Tracer()
+        with tracer.span('sync'):
+            with tracer.span('stage'):
+                pass
+            for _ in tracer.iterate('crawl', range(3)):
+                with tracer.span('consumer'):
+                    pass
+        tree = {x['path']: x for x in tracer.tree()}
+        self.assertEqual(sorted(tree), ['sync', 'sync/consumer', 'sync/crawl', 'sync/stage'])
+        self.assertEqual(tree['sync/crawl']['count'], 1)
+        self.assertEqual(tree['sync/consumer']['count'], 3)
+        self.assertLessEqual(tree['sync']['self'], tree['sync']['total'])
+        functions = {x['name']: x for x in tracer.functions()}
+        self.assertEqual(functions['consumer']['count'], 3)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
+        self.assertEqual(percentile([1], 95), 1)
+        self.assertIn('stage', tracer.summary())
+
+    @traced
+    def test_bench_compare(self):
+        from resources.test.bench import measure, compare
+        calls = []
+        result = measure(lambda: calls.append('run'), lambda: calls.append('setup'), repeat=3)
+        self.assertEqual(calls, ['setup', 'run'] * 3)
+        self.assertLessEqual(result['min'], result['median'])
+        results = {'a': {'median': 2.}, 'b': {'median': 1.}, 'new': {'median': 1.}}
+        baseline = {'a': {'median': 1.}, 'b': {'median': 1.}}
+        self.assertEqual(compare(results, baseline, tolerance=1.25), ['a'])
+        self.assertEqual(results['a']['ratio'], 2.)
+        self.assertFalse(results['b']['regression'])
+        self.assertNotIn('ratio', results['new'])
+
+    @traced
     def test_constants(self):
         """Check values returned by constants in utils."""
         addon = xbmcaddon.Addon(id='script.library.integration.tool')
@@ -178,7 +845,7 @@ class TestUtils(unittest.TestCase):
         )
         # TODO: test all contants, including type
 
-    @logged_function
+    @traced
     def test_version_comparison(self):
         """Test the comparison operators for the Version class."""
         reference = Version('1.2.3')
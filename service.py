@@ -0,0 +1,43 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Background service started with Kodi.
+
+The purpose is to update synced directories that have an update interval,
+without a dialog, while Kodi is idle.
+"""
+
+import xbmc  # pylint: disable=import-error
+
+from resources.lib.utils import check_managed_folder
+from resources.lib.scheduler import SyncScheduler
+
+
+class SyncService(xbmc.Monitor):
+    """Monitor that runs the SyncScheduler until Kodi exits."""
+
+    def __init__(self):
+        """__init__ SyncService."""
+        super(SyncService, self).__init__()
+        self.scheduler = SyncScheduler(self)
+
+    def onSettingsChanged(self):  # pylint: disable=invalid-name
+        """Reload the schedule, intervals can be changed from the synced menu."""
+        self.scheduler.reload()
+
+    def run(self):
+        """Start the scheduler and wait for Kodi abort."""
+        self.scheduler.start()
+        self.waitForAbort()
+        self.scheduler.join()
+
+
+def main():
+    """Main entrypoint for the service."""
+    check_managed_folder()
+    SyncService().run()
+
+
+if __name__ == '__main__':
+    main()